@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import abc
+import logging
+import threading
+import typing
+from types import ModuleType
+
+# NumPy is only required for array based acquisition
+try:
+    # noinspection PyPackageRequirements
+    import numpy
+except ImportError:
+    numpy: typing.Optional[ModuleType] = None
+
+from pylinkam import interface, poll, records, sdk
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def require_numpy(error: typing.Type[Exception] = ImportError, feature: str = 'array acquisition') -> ModuleType:
+    """ Get NumPy module, raising a feature specific error if it is not installed.
+
+    :param error: exception type to raise
+    :param feature: description of the feature requiring NumPy, used in the error message
+    :return: numpy module
+    """
+    if numpy is None:
+        raise error(f"NumPy is required for {feature}")
+
+    return numpy
+
+
+def magnitude(value: typing.Any) -> float:
+    """ Get plain float from a reading that may be a quantity.
+
+    :param value: float or quantity
+    :return: float in the units of the reading
+    """
+    return float(getattr(value, 'magnitude', value))
+
+
+class BlockAcquisition(abc.ABC):
+    """ Base class for continuous acquisition of a fixed set of channels. All channels are read in a single batch each
+    cycle so that every row is a consistent snapshot, rows are converted to arrays a block at a time and stored in
+    preallocated columns.
+
+    Subclasses set FIELDS and implement _row, and may add derived columns in _derive or track running results in
+    _extended. """
+
+    # Column names, the first is always the sample timestamp and any columns after those returned by _row are derived
+    FIELDS: typing.ClassVar[typing.Tuple[str, ...]] = ('timestamp',)
+
+    # Raised if NumPy is not installed
+    ERROR: typing.ClassVar[typing.Type[Exception]] = ImportError
+
+    # Description used in error and log messages
+    DESCRIPTION: typing.ClassVar[str] = 'acquisition'
+
+    def __init__(self, connection: sdk.SDKWrapper.Connection, value_types: typing.Sequence[interface.StageValueType],
+                 period: typing.Optional[float] = None, batch_size: int = 16, capacity: int = 4096,
+                 callback: typing.Optional[typing.Callable[[typing.Dict[str, typing.Any]], None]] = None):
+        """ Create new acquisition, reading does not begin until start() is called.
+
+        :param connection: controller connection
+        :param value_types: channels read every cycle
+        :param period: requested sampling period in seconds, rounded to a multiple of the controller data rate,
+        defaults to the controller data rate
+        :param batch_size: number of samples processed together
+        :param capacity: initial number of samples to allocate
+        :param callback: optional callable to receive each processed block as a dict of arrays
+        """
+        require_numpy(self.ERROR, self.DESCRIPTION)
+
+        if batch_size < 1:
+            raise ValueError('Batch size must be at least 1')
+
+        self._connection = connection
+        self._batch_size = batch_size
+        self._callback = callback
+
+        self._lock = threading.Lock()
+        self._buffer = records.ColumnBuffer(self.FIELDS, capacity)
+        self._pending: typing.List[typing.Tuple[float, ...]] = []
+
+        self._poller = poll.Poller(connection, value_types, period=period, prune=False, callback=self._on_sample)
+
+    def __enter__(self) -> BlockAcquisition:
+        self.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def poller(self) -> poll.Poller:
+        return self._poller
+
+    def start(self) -> None:
+        """ Start acquisition. """
+        self._poller.start()
+
+    def stop(self, timeout: typing.Optional[float] = None) -> None:
+        """ Stop acquisition and process any remaining samples.
+
+        :param timeout: maximum time to wait for the acquisition thread to exit
+        """
+        self._poller.stop(timeout)
+        self.flush()
+
+    def flush(self) -> None:
+        """ Process samples not yet part of a complete block. """
+        with self._lock:
+            block = self._process()
+
+        if block is not None:
+            self._notify(block)
+
+    def clear(self) -> None:
+        """ Discard all acquired samples. """
+        with self._lock:
+            self._pending.clear()
+            self._buffer.clear()
+
+    def get_data(self) -> typing.Dict[str, typing.Any]:
+        """ Get copy of all processed samples.
+
+        :return: dict of arrays, one for each of FIELDS
+        """
+        with self._lock:
+            return self._buffer.to_dict()
+
+    @abc.abstractmethod
+    def _row(self, sample: poll.Sample) -> typing.Tuple[float, ...]:
+        # Measured values following the timestamp, in FIELDS order
+        pass
+
+    def _derive(self, block: typing.Dict[str, typing.Any]) -> None:
+        # Add derived columns to a block before it is stored, called with lock held
+        pass
+
+    def _extended(self, start: int, block: typing.Dict[str, typing.Any]) -> None:
+        # Called with lock held once a block has been stored from row start onwards
+        pass
+
+    def _on_sample(self, sample: poll.Sample) -> None:
+        row = (sample.timestamp,) + tuple(self._row(sample))
+
+        with self._lock:
+            self._pending.append(row)
+
+            block = self._process() if len(self._pending) >= self._batch_size else None
+
+        if block is not None:
+            self._notify(block)
+
+    def _process(self) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        # Convert pending samples to arrays in one step, must be called with lock held
+        if len(self._pending) == 0:
+            return None
+
+        pending = require_numpy(self.ERROR, self.DESCRIPTION).array(self._pending, dtype=float)
+        self._pending.clear()
+
+        block = {field: pending[:, column] for column, field in enumerate(self.FIELDS[:pending.shape[1]])}
+        self._derive(block)
+
+        start = len(self._buffer)
+        self._buffer.extend(block)
+        self._extended(start, block)
+
+        return block
+
+    def _notify(self, block: typing.Dict[str, typing.Any]) -> None:
+        if self._callback is not None:
+            try:
+                self._callback(block)
+            except Exception:
+                _LOGGER.exception(f"Unhandled exception in {self.DESCRIPTION} callback")
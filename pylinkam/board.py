@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+import math
+import struct
+import time
+import typing
+
+from pylinkam import interface, poll
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8
+    shared_memory = None
+
+_LOGGER = logging.getLogger(__name__)
+
+
+_MAGIC = b'LKMB'
+_VERSION = 1
+
+# Magic, layout version, channel count, padding, sequence number
+_HEADER = struct.Struct('<4sHHQ')
+_SEQUENCE = struct.Struct('<Q')
+_SEQUENCE_OFFSET = 8
+
+# Timestamp, status present flag, status word, followed by one float64 per channel
+_SAMPLE_HEADER = struct.Struct('<dQQ')
+
+
+class BoardError(Exception):
+    pass
+
+
+def _get_layout(count: int) -> typing.Tuple[int, int, int]:
+    # Channel directory follows the header, sample data is aligned to 8 bytes after the directory
+    directory_offset = _HEADER.size
+    data_offset = directory_offset + 8 * math.ceil(2 * count / 8)
+    size = data_offset + _SAMPLE_HEADER.size + 8 * count
+
+    return directory_offset, data_offset, size
+
+
+class LatestValueBoard:
+    """ Most recent reading of a set of channels held in shared memory, so that other local processes can read current
+    values without access to the SDK. A single process publishes, any number of processes read.
+
+    Updates are protected by a sequence lock: the writer makes the sequence number odd while writing and even when
+    done, readers retry if the sequence number was odd or changed while they copied the data. """
+
+    def __init__(self, memory: typing.Any, value_types: typing.Sequence[interface.StageValueType], owner: bool):
+        """ Wrap shared memory block, use LatestValueBoard.create or LatestValueBoard.attach instead.
+
+        :param memory: shared_memory.SharedMemory instance
+        :param value_types: channels in board order
+        :param owner: True if this process created the block
+        """
+        self._memory = memory
+        self._value_types = tuple(value_types)
+        self._owner = owner
+
+        _, self._data_offset, _ = _get_layout(len(self._value_types))
+        self._values_struct = struct.Struct(f"<{len(self._value_types)}d")
+        self._data_size = _SAMPLE_HEADER.size + self._values_struct.size
+
+        # Samples are packed here before being copied to the board
+        self._staging = bytearray(self._data_size)
+
+        self._sequence = _SEQUENCE.unpack_from(self._memory.buf, _SEQUENCE_OFFSET)[0]
+
+    def __enter__(self) -> LatestValueBoard:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @classmethod
+    def create(cls, value_types: typing.Iterable[interface.StageValueType],
+               name: typing.Optional[str] = None) -> LatestValueBoard:
+        """ Create new board for publishing.
+
+        :param value_types: channels to publish
+        :param name: shared memory name, defaults to a random name
+        :return: LatestValueBoard
+        """
+        if shared_memory is None:
+            raise BoardError('Shared memory requires Python 3.8 or later')
+
+        value_types = list(dict.fromkeys(value_types))
+        directory_offset, data_offset, size = _get_layout(len(value_types))
+
+        memory = shared_memory.SharedMemory(name, create=True, size=size)
+
+        _HEADER.pack_into(memory.buf, 0, _MAGIC, _VERSION, len(value_types), 0)
+        struct.pack_into(f"<{len(value_types)}H", memory.buf, directory_offset, *value_types)
+
+        return cls(memory, value_types, True)
+
+    @classmethod
+    def attach(cls, name: str) -> LatestValueBoard:
+        """ Attach to an existing board for reading.
+
+        :param name: shared memory name
+        :return: LatestValueBoard
+        """
+        if shared_memory is None:
+            raise BoardError('Shared memory requires Python 3.8 or later')
+
+        memory = shared_memory.SharedMemory(name)
+
+        try:
+            from multiprocessing import resource_tracker
+
+            # Readers must not remove the block when they exit
+            resource_tracker.unregister(memory._name, 'shared_memory')
+        except (ImportError, AttributeError):
+            pass
+
+        magic, version, count, _ = _HEADER.unpack_from(memory.buf, 0)
+
+        if magic != _MAGIC or version != _VERSION:
+            memory.close()
+            raise BoardError(f"Shared memory {name!r} is not a compatible board")
+
+        value_types = [interface.StageValueType(x) for x in struct.unpack_from(f"<{count}H", memory.buf, _HEADER.size)]
+
+        return cls(memory, value_types, False)
+
+    @property
+    def name(self) -> str:
+        return typing.cast(str, self._memory.name)
+
+    @property
+    def value_types(self) -> typing.Tuple[interface.StageValueType, ...]:
+        return self._value_types
+
+    def close(self) -> None:
+        """ Detach from shared memory, the board is removed when closed by the creating process. """
+        if self._memory is None:
+            return
+
+        self._memory.close()
+
+        if self._owner:
+            self._memory.unlink()
+
+        self._memory = None
+
+    def publish(self, sample: poll.Sample) -> None:
+        """ Write a sample, channels missing from the sample are set to NaN. Can be used directly as a Poller or Bus
+        callback.
+
+        :param sample: poll.Sample to publish
+        """
+        if not self._owner:
+            raise BoardError('Only the creating process may publish')
+
+        buf = self._memory.buf
+        status = sample.status
+
+        # Pack first so a bad sample raises before the board is touched
+        _SAMPLE_HEADER.pack_into(self._staging, 0, sample.timestamp, status is not None,
+                                 status.value if status is not None else 0)
+        self._values_struct.pack_into(self._staging, _SAMPLE_HEADER.size,
+                                      *(float(getattr(value, 'magnitude', value)) if value is not None else math.nan
+                                        for value in (sample.values.get(x) for x in self._value_types)))
+
+        # Odd sequence number marks update in progress
+        self._sequence += 1
+        _SEQUENCE.pack_into(buf, _SEQUENCE_OFFSET, self._sequence)
+
+        try:
+            buf[self._data_offset:self._data_offset + self._data_size] = self._staging
+        finally:
+            # Never leave readers spinning on an odd sequence number
+            self._sequence += 1
+            _SEQUENCE.pack_into(buf, _SEQUENCE_OFFSET, self._sequence)
+
+    def _read_raw(self, timeout: float) -> typing.Optional[bytes]:
+        buf = self._memory.buf
+        deadline: typing.Optional[float] = None
+
+        while True:
+            before = _SEQUENCE.unpack_from(buf, _SEQUENCE_OFFSET)[0]
+
+            if before == 0:
+                # Nothing published yet
+                return None
+
+            if before % 2 == 0:
+                data = bytes(buf[self._data_offset:self._data_offset + self._data_size])
+
+                if _SEQUENCE.unpack_from(buf, _SEQUENCE_OFFSET)[0] == before:
+                    return data
+
+            # Only pay for the clock once contended
+            if deadline is None:
+                deadline = time.monotonic() + timeout
+            elif time.monotonic() > deadline:
+                raise TimeoutError('Board update did not complete, publisher may have stopped mid-update')
+
+    def read(self, timeout: float = 0.1) -> typing.Optional[poll.Sample]:
+        """ Read a consistent copy of the latest sample.
+
+        :param timeout: maximum time in seconds to retry while an update is in progress
+        :return: poll.Sample with float values, None if nothing has been published yet
+        """
+        data = self._read_raw(timeout)
+
+        if data is None:
+            return None
+
+        timestamp, has_status, status = _SAMPLE_HEADER.unpack_from(data)
+        values = self._values_struct.unpack_from(data, _SAMPLE_HEADER.size)
+
+        return poll.Sample(
+            timestamp,
+            dict(zip(self._value_types, values)),
+            interface.ControllerStatus(value=status) if has_status else None
+        )
+
+    def get(self, value_type: interface.StageValueType, timeout: float = 0.1) -> float:
+        """ Read latest value of a single channel.
+
+        :param value_type: channel to read
+        :param timeout: maximum time in seconds to retry while an update is in progress
+        :return: float value, NaN if nothing has been published yet
+        """
+        index = self._value_types.index(value_type)
+        data = self._read_raw(timeout)
+
+        if data is None:
+            return math.nan
+
+        return typing.cast(float, struct.unpack_from('<d', data, _SAMPLE_HEADER.size + 8 * index)[0])
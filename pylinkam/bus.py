@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import collections
+import enum
+import threading
+import typing
+
+from pylinkam import interface, poll, sdk
+
+
+class Backpressure(enum.Enum):
+    """ Action taken when a subscriber queue is full. """
+
+    # Discard the oldest queued sample to make room
+    DROP_OLDEST = 'drop_oldest'
+
+    # Discard the new sample
+    DROP_NEWEST = 'drop_newest'
+
+    # Wait for the subscriber to make room, this delays delivery to all subscribers
+    BLOCK = 'block'
+
+
+class Subscription:
+    """ Bounded queue of samples delivered to a single subscriber. """
+
+    def __init__(self, bus: Bus, value_types: typing.Iterable[interface.StageValueType], status: bool,
+                 maxsize: int, backpressure: Backpressure, block_timeout: typing.Optional[float]):
+        """ Create new subscription, use Bus.subscribe instead.
+
+        :param bus: parent bus
+        :param value_types: parameters delivered to this subscriber
+        :param status: if True deliver controller status
+        :param maxsize: maximum number of queued samples
+        :param backpressure: action taken when the queue is full
+        :param block_timeout: maximum time to wait when blocking, None to wait indefinitely
+        """
+        if maxsize < 1:
+            raise ValueError('Subscription queue must hold at least one sample')
+
+        self._bus = bus
+        self._value_types = tuple(dict.fromkeys(value_types))
+        self._status = status
+        self._maxsize = maxsize
+        self._backpressure = backpressure
+        self._block_timeout = block_timeout
+
+        self._queue: typing.Deque[poll.Sample] = collections.deque()
+        self._condition = threading.Condition()
+
+        self._closed = False
+        self._delivered = 0
+        self._dropped = 0
+
+    def __enter__(self) -> Subscription:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self) -> typing.Iterator[poll.Sample]:
+        """ Iterate over samples until the subscription is closed. """
+        while True:
+            try:
+                yield self.get()
+            except EOFError:
+                return
+
+    @property
+    def value_types(self) -> typing.Tuple[interface.StageValueType, ...]:
+        return self._value_types
+
+    @property
+    def status(self) -> bool:
+        return self._status
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def delivered(self) -> int:
+        """ Number of samples queued for this subscriber. """
+        return self._delivered
+
+    @property
+    def dropped(self) -> int:
+        """ Number of samples discarded because the queue was full. """
+        return self._dropped
+
+    def qsize(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def close(self) -> None:
+        """ Stop receiving samples, queued samples can still be read. """
+        self._bus.unsubscribe(self)
+
+    def get(self, timeout: typing.Optional[float] = None) -> poll.Sample:
+        """ Get next sample, blocking until one is available.
+
+        :param timeout: maximum time to wait in seconds, None to wait indefinitely
+        :return: poll.Sample containing only the subscribed parameters
+        :raises TimeoutError: if no sample arrives before the timeout
+        :raises EOFError: if the subscription is closed and no samples remain
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: len(self._queue) > 0 or self._closed, timeout):
+                raise TimeoutError('No sample received')
+
+            if len(self._queue) == 0:
+                raise EOFError('Subscription closed')
+
+            sample = self._queue.popleft()
+            self._condition.notify_all()
+
+            return sample
+
+    def get_nowait(self) -> typing.Optional[poll.Sample]:
+        """ Get next sample if one is available.
+
+        :return: poll.Sample or None if the queue is empty
+        """
+        with self._condition:
+            if len(self._queue) == 0:
+                return None
+
+            sample = self._queue.popleft()
+            self._condition.notify_all()
+
+            return sample
+
+    def _close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _put(self, sample: poll.Sample) -> None:
+        # Only pass on the parameters this subscriber asked for
+        sample = sample._replace(
+            values={value_type: sample.values[value_type] for value_type in self._value_types
+                    if value_type in sample.values},
+            status=sample.status if self._status else None
+        )
+
+        with self._condition:
+            if self._closed:
+                return
+
+            if len(self._queue) >= self._maxsize:
+                if self._backpressure == Backpressure.DROP_NEWEST:
+                    self._dropped += 1
+                    return
+                elif self._backpressure == Backpressure.DROP_OLDEST:
+                    self._queue.popleft()
+                    self._dropped += 1
+                elif not self._condition.wait_for(lambda: len(self._queue) < self._maxsize or self._closed,
+                                                  self._block_timeout):
+                    self._dropped += 1
+                    return
+                elif self._closed:
+                    return
+
+            self._queue.append(sample)
+            self._delivered += 1
+            self._condition.notify_all()
+
+
+class Bus:
+    """ Shares a single polling loop between several consumers. Each subscriber receives the parameters and status it
+    asked for through its own bounded queue, the union of all subscriptions is read from the controller once per
+    cycle. """
+
+    def __init__(self, connection: sdk.SDKWrapper.Connection, period: typing.Optional[float] = None,
+                 prune: bool = True):
+        """ Create new bus, polling does not begin until start() is called.
+
+        :param connection: connection to poll
+        :param period: requested polling period in seconds, rounded to a multiple of the controller data rate, defaults
+        to the controller data rate
+        :param prune: if True skip parameters not supported by the attached hardware
+        """
+        self._lock = threading.Lock()
+        self._subscriptions: typing.List[Subscription] = []
+
+        self._poller = poll.Poller(connection, (), period=period, prune=prune, callback=self._publish)
+
+    def __enter__(self) -> Bus:
+        self.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def poller(self) -> poll.Poller:
+        return self._poller
+
+    @property
+    def subscriptions(self) -> typing.List[Subscription]:
+        with self._lock:
+            return list(self._subscriptions)
+
+    def subscribe(self, value_types: typing.Iterable[interface.StageValueType] = (), status: bool = False,
+                  maxsize: int = 100, backpressure: Backpressure = Backpressure.DROP_OLDEST,
+                  block_timeout: typing.Optional[float] = None) -> Subscription:
+        """ Subscribe to parameters and/or controller status, takes effect from the next polling cycle.
+
+        :param value_types: parameters to receive
+        :param status: if True also receive controller status
+        :param maxsize: maximum number of queued samples
+        :param backpressure: action taken when the queue is full
+        :param block_timeout: maximum time to wait when backpressure is BLOCK, the sample is dropped if the queue is
+        still full, None to wait indefinitely
+        :return: Subscription
+        """
+        subscription = Subscription(self, value_types, status, maxsize, backpressure, block_timeout)
+
+        with self._lock:
+            self._subscriptions.append(subscription)
+            self._update()
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """ Remove subscription, any blocked delivery to it is released.
+
+        :param subscription: Subscription to remove
+        """
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+                self._update()
+
+        subscription._close()
+
+    def start(self) -> None:
+        """ Start shared polling loop. """
+        self._poller.start()
+
+    def stop(self, timeout: typing.Optional[float] = None) -> None:
+        """ Stop shared polling loop and close all subscriptions.
+
+        :param timeout: maximum time to wait for the polling thread to exit
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        # Release blocked deliveries so the polling thread can exit
+        for subscription in subscriptions:
+            self.unsubscribe(subscription)
+
+        self._poller.stop(timeout)
+
+    def _update(self) -> None:
+        value_types: typing.Dict[interface.StageValueType, None] = {}
+
+        for subscription in self._subscriptions:
+            value_types.update(dict.fromkeys(subscription.value_types))
+
+        self._poller.set_value_types(value_types)
+        self._poller.set_include_status(any(subscription.status for subscription in self._subscriptions))
+
+    def _publish(self, sample: poll.Sample) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            subscription._put(sample)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import typing
+
+from pylinkam import interface
+
+# Hardware features and the controller/stage configuration flags that indicate them, a feature is considered present if
+# any of the listed flags are set
+_CONTROLLER_FEATURES: typing.Dict[str, typing.Tuple[str, ...]] = {
+    'heater': ('supportsHeater',),
+    'heater2': ('supportsDualHeater',),
+    'vacuum': ('vacuumOption',),
+    'tensile': ('tensileForceCardReady', 'tensileMotorCardReady'),
+    'dsc': ('dscCardReady',),
+    'motor_x': ('xMotorCardReady',),
+    'motor_y': ('yMotorCardReady',),
+    'motor_z': ('zMotorCardReady',),
+    'motor_valve': ('motorValveCardReady',),
+    'graded': ('gradedMotorCardReady',),
+    'css': ('cssMotorCardReady',),
+    'lnp': ('lnpReady', 'lnpDualReady'),
+    'humidity': ('humidityReady',)
+}
+
+_STAGE_FEATURES: typing.Dict[str, typing.Tuple[str, ...]] = {
+    'heater': ('heater1',),
+    'heater2': ('heater2',),
+    'vacuum': ('supportsVacuum',),
+    'tensile': ('tensileStage',),
+    'dsc': ('dscStage',),
+    'motor_x': ('motorX',),
+    'motor_y': ('motorY',),
+    'motor_z': ('motorZ',),
+    'graded': ('gradedStage',),
+    'css': ('css450Stage',),
+    'lnp': ('coolingAutomatic', 'coolingDual'),
+    'humidity': ('supportsHumidity',),
+    'water_cooling': ('waterCoolingSensorFitted',)
+}
+
+# Features required by StageValueType members, matched against member names in order. Values that don't match any rule
+# are assumed to be supported
+_VALUE_RULES: typing.Tuple[typing.Tuple[str, typing.Tuple[str, ...]], ...] = (
+    ('HEATER1_LNP_SPEED', ('lnp',)),
+    ('HEATER2_LNP_SPEED', ('heater2', 'lnp')),
+    ('HEATER2_', ('heater2',)),
+    ('HEATER', ('heater',)),
+    ('WATER_COOLING_', ('water_cooling',)),
+    ('HUMIDITY', ('humidity',)),
+    ('MANUAL_HUMIDITY', ('humidity',)),
+    ('STAGE_HUMIDITY', ('humidity',)),
+    ('VACUUM', ('vacuum',)),
+    ('PRESSURE', ('vacuum',)),
+    ('VAC_MOTOR_VALVE_', ('motor_valve',)),
+    ('MOTOR_POS_X', ('motor_x',)),
+    ('MOTOR_VEL_X', ('motor_x',)),
+    ('MOTOR_SETPOINT_X', ('motor_x',)),
+    ('MOTOR_X_', ('motor_x',)),
+    ('MOTOR_POS_Y', ('motor_y',)),
+    ('MOTOR_VEL_Y', ('motor_y',)),
+    ('MOTOR_SETPOINT_Y', ('motor_y',)),
+    ('MOTOR_Y_', ('motor_y',)),
+    ('MOTOR_POS_Z', ('motor_z',)),
+    ('MOTOR_VEL_Z', ('motor_z',)),
+    ('MOTOR_SETPOINT_Z', ('motor_z',)),
+    ('MOTOR_Z_', ('motor_z',)),
+    ('MOTOR_TST_', ('tensile',)),
+    ('MOTOR_GS_', ('graded',)),
+    ('MOTOR_GRADIENT_', ('graded',)),
+    ('GRADED_', ('graded',)),
+    ('TST_', ('tensile',)),
+    ('DSC', ('dsc',)),
+    ('CSS_', ('css',))
+)
+
+def _match(rules: typing.Tuple[typing.Tuple[str, typing.Tuple[str, ...]], ...],
+           name: str) -> typing.Optional[typing.Tuple[str, ...]]:
+    for prefix, features in rules:
+        if name.startswith(prefix):
+            return features
+
+    return None
+
+
+class Capabilities:
+    """ Summary of the features and values supported by the attached controller and stage. """
+
+    def __init__(self, controller_config: interface.ControllerConfig, stage_config: interface.StageConfig):
+        """ Derive capabilities from configuration flags.
+
+        :param controller_config: configuration returned by Connection.get_controller_config()
+        :param stage_config: configuration returned by Connection.get_stage_config()
+        """
+        self.controller_config = controller_config
+        self.stage_config = stage_config
+
+        features = set()
+
+        for flags, feature_map in ((controller_config.flags, _CONTROLLER_FEATURES),
+                                   (stage_config.flags, _STAGE_FEATURES)):
+            for feature, flag_names in feature_map.items():
+                if any(getattr(flags, flag_name) for flag_name in flag_names):
+                    features.add(feature)
+
+        self.features: typing.FrozenSet[str] = frozenset(features)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}({', '.join(sorted(self.features))})>"
+
+    def supports_value(self, value_type: interface.StageValueType) -> bool:
+        """ Check if a parameter can be read or written on the attached hardware.
+
+        :param value_type: parameter to check
+        :return: True if supported or support is unknown, False if unsupported
+        """
+        required = _match(_VALUE_RULES, value_type.name)
+
+        return required is None or all(feature in self.features for feature in required)
+
+    def prune(self, value_types: typing.Iterable[interface.StageValueType]) -> typing.List[interface.StageValueType]:
+        """ Remove parameters not supported by the attached hardware.
+
+        :param value_types: parameters to filter
+        :return: list of supported parameters in original order
+        """
+        return [value_type for value_type in value_types if self.supports_value(value_type)]
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import time
+import typing
+
+from pylinkam import sdk
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DeviceInfo(typing.NamedTuple):
+    """ Result of probing a single USB serial number or serial port. """
+
+    transport: str
+    address: typing.Optional[str]
+    found: bool
+    error: typing.Optional[str] = None
+    controller_name: typing.Optional[str] = None
+    controller_serial: typing.Optional[str] = None
+    stage_name: typing.Optional[str] = None
+    stage_serial: typing.Optional[str] = None
+    duration: float = 0.0
+
+
+def probe(wrapper: sdk.SDKWrapper, transport: str, address: typing.Optional[str],
+          timeout: typing.Optional[float] = None) -> DeviceInfo:
+    """ Attempt to connect to a single device and read its identity.
+
+    :param wrapper: SDK wrapper
+    :param transport: 'usb' or 'serial'
+    :param address: USB serial number (None for the default device) or serial port name
+    :param timeout: maximum time in seconds to wait for the probe, None to wait indefinitely, a probe that times out is
+    reported as not found and continues in the background, closing any connection it opens
+    :return: DeviceInfo
+    """
+    if timeout is None:
+        return _probe(wrapper, transport, address)
+
+    start = time.monotonic()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='pylinkam-probe')
+
+    try:
+        return executor.submit(_probe, wrapper, transport, address).result(timeout)
+    except concurrent.futures.TimeoutError:
+        _LOGGER.warning(f"Probe of {transport} device {address or '(default)'} timed out")
+
+        return DeviceInfo(transport, address, False, 'Timeout', duration=time.monotonic() - start)
+    finally:
+        executor.shutdown(wait=False)
+
+
+def _probe(wrapper: sdk.SDKWrapper, transport: str, address: typing.Optional[str]) -> DeviceInfo:
+    start = time.monotonic()
+
+    try:
+        # Opening connections is the slow part, allow probes to overlap
+        if transport == 'usb':
+            connection = wrapper.connect_usb(address, exclusive=False)
+        elif transport == 'serial':
+            if address is None:
+                raise ValueError('Serial port name required')
+
+            connection = wrapper.connect_serial(address, exclusive=False)
+        else:
+            raise ValueError(f"Unknown transport {transport!r}")
+    except (sdk.SDKError, sdk.ControllerConnectError) as exc:
+        return DeviceInfo(transport, address, False, str(exc), duration=time.monotonic() - start)
+
+    try:
+        return DeviceInfo(
+            transport,
+            address,
+            True,
+            controller_name=connection.get_controller_name(),
+            controller_serial=connection.get_controller_serial(),
+            stage_name=connection.get_stage_name(),
+            stage_serial=connection.get_stage_serial(),
+            duration=time.monotonic() - start
+        )
+    except sdk.SDKError as exc:
+        return DeviceInfo(transport, address, True, str(exc), duration=time.monotonic() - start)
+    finally:
+        connection.close()
+
+
+def discover(wrapper: sdk.SDKWrapper, serial_numbers: typing.Sequence[typing.Optional[str]] = (None,),
+             ports: typing.Sequence[str] = (), timeout: float = 5.0,
+             max_workers: typing.Optional[int] = None) -> typing.List[DeviceInfo]:
+    """ Probe several USB devices and serial ports concurrently.
+
+    :param wrapper: SDK wrapper
+    :param serial_numbers: USB serial numbers to probe, None for the default device
+    :param ports: serial port names to probe
+    :param timeout: maximum time in seconds to wait for each probe, measured from when the probe starts, see probe()
+    :param max_workers: maximum number of concurrent probes, defaults to one per target, a probe that times out frees
+    its place for the next target
+    :return: list of DeviceInfo in the same order as the requested targets, USB devices first
+    """
+    targets = [('usb', serial_number) for serial_number in serial_numbers] + [('serial', port) for port in ports]
+
+    if len(targets) == 0:
+        return []
+
+    # Ensure the SDK is initialised before probes start
+    wrapper.open()
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or len(targets),
+                                                     thread_name_prefix='pylinkam-discover')
+
+    try:
+        # Each probe enforces its own deadline so targets queued behind a slow probe still get the full timeout
+        futures = [executor.submit(probe, wrapper, transport, address, timeout) for transport, address in targets]
+        concurrent.futures.wait(futures)
+
+        results = []
+
+        for (transport, address), future in zip(targets, futures):
+            exc = future.exception()
+
+            if exc is not None:
+                results.append(DeviceInfo(transport, address, False, str(exc)))
+            else:
+                results.append(future.result())
+
+        return results
+    finally:
+        executor.shutdown(wait=False)
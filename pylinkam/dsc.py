@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+import typing
+
+from pylinkam import acquisition, interface, poll, sdk
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Channels read together in every acquisition cycle
+DSC_VALUES: typing.Tuple[interface.StageValueType, ...] = (
+    interface.StageValueType.HEATER1_TEMP,
+    interface.StageValueType.DSC,
+    interface.StageValueType.DSC_POWER
+)
+
+GAIN_VALUES: typing.Tuple[interface.StageValueType, ...] = (
+    interface.StageValueType.DSC_GAIN1,
+    interface.StageValueType.DSC_GAIN2,
+    interface.StageValueType.DSC_GAIN3
+)
+
+# Baseline power polynomial in stage temperature, constant term first
+BASELINE_VALUES: typing.Tuple[interface.StageValueType, ...] = (
+    interface.StageValueType.DSC_BASELINE_CONST_TERM,
+    interface.StageValueType.DSC_BASELINE_POWER_TERM1,
+    interface.StageValueType.DSC_BASELINE_POWER_TERM2,
+    interface.StageValueType.DSC_BASELINE_POWER_TERM3,
+    interface.StageValueType.DSC_BASELINE_POWER_TERM4
+)
+
+# Power polynomial, constant term first
+POWER_VALUES: typing.Tuple[interface.StageValueType, ...] = (
+    interface.StageValueType.DSC_CONSTANT_TERM,
+    interface.StageValueType.DSC_POWER_TERM1,
+    interface.StageValueType.DSC_POWER_TERM2,
+    interface.StageValueType.DSC_POWER_TERM3,
+    interface.StageValueType.DSC_POWER_TERM4,
+    interface.StageValueType.DSC_POWER_TERM5,
+    interface.StageValueType.DSC_POWER_TERM6
+)
+
+
+class DSCError(Exception):
+    pass
+
+
+def _send(connection: sdk.SDKWrapper.Connection, value_types: typing.Sequence[interface.StageValueType],
+          values: typing.Sequence[float], message: interface.Message) -> None:
+    if len(values) > len(value_types):
+        raise ValueError(f"At most {len(value_types)} values accepted, got {len(values)}")
+
+    # Unspecified higher order terms are cleared
+    values = list(values) + [0.0] * (len(value_types) - len(values))
+
+    results = connection.set_values(dict(zip(value_types, values)))
+    failed = [value_type.name for value_type, result in results.items() if not result]
+
+    if len(failed) > 0:
+        raise sdk.SDKError(f"Failed to set {', '.join(failed)}")
+
+    connection.send_dsc_values(message)
+
+
+def send_gains(connection: sdk.SDKWrapper.Connection, gains: typing.Sequence[float]) -> None:
+    """ Write and apply DSC amplifier gains.
+
+    :param connection: controller connection
+    :param gains: up to 3 gain values
+    """
+    _send(connection, GAIN_VALUES, gains, interface.Message.SEND_DSC_GAIN_VALUES)
+
+
+def send_baseline(connection: sdk.SDKWrapper.Connection, coefficients: typing.Sequence[float]) -> None:
+    """ Write and apply DSC baseline power polynomial.
+
+    :param connection: controller connection
+    :param coefficients: up to 5 polynomial coefficients in stage temperature, constant term first
+    """
+    _send(connection, BASELINE_VALUES, coefficients, interface.Message.SEND_DSC_BASELINE_POWER_VALUES)
+
+
+def send_power_terms(connection: sdk.SDKWrapper.Connection, coefficients: typing.Sequence[float]) -> None:
+    """ Write and apply DSC power polynomial.
+
+    :param connection: controller connection
+    :param coefficients: up to 7 polynomial coefficients, constant term first
+    """
+    _send(connection, POWER_VALUES, coefficients, interface.Message.SEND_DSC_POWER_VALUE)
+
+
+def get_baseline(connection: sdk.SDKWrapper.Connection) -> typing.List[float]:
+    """ Read DSC baseline power polynomial from the controller.
+
+    :param connection: controller connection
+    :return: list of coefficients, constant term first
+    """
+    values = connection.get_values(BASELINE_VALUES)
+
+    return [acquisition.magnitude(values[value_type]) for value_type in BASELINE_VALUES]
+
+
+class DSCAcquisition(acquisition.BlockAcquisition):
+    """ Continuous acquisition of DSC signal, DSC power and stage temperature. All channels are read in a single batch
+    each cycle, samples are stored in preallocated arrays and baseline-corrected heat flow is computed for blocks of
+    samples at a time. """
+
+    FIELDS = ('timestamp', 'temperature', 'dsc', 'power', 'heat_flow')
+
+    ERROR = DSCError
+
+    DESCRIPTION = 'DSC acquisition'
+
+    def __init__(self, connection: sdk.SDKWrapper.Connection, period: typing.Optional[float] = None,
+                 baseline: typing.Optional[typing.Sequence[float]] = None, batch_size: int = 16, capacity: int = 4096,
+                 callback: typing.Optional[typing.Callable[[typing.Dict[str, typing.Any]], None]] = None):
+        """ Create new acquisition, reading does not begin until start() is called.
+
+        :param connection: controller connection
+        :param period: requested sampling period in seconds, rounded to a multiple of the controller data rate,
+        defaults to the controller data rate
+        :param baseline: baseline power polynomial in stage temperature, constant term first, defaults to the
+        coefficients stored on the controller
+        :param batch_size: number of samples processed together
+        :param capacity: initial number of samples to allocate
+        :param callback: optional callable to receive each processed block as a dict of arrays
+        """
+        super().__init__(connection, DSC_VALUES, period, batch_size, capacity, callback)
+
+        self._baseline = acquisition.require_numpy(DSCError, self.DESCRIPTION).asarray(
+            baseline if baseline is not None else get_baseline(connection), dtype=float
+        )
+
+    def __enter__(self) -> DSCAcquisition:
+        self.start()
+
+        return self
+
+    @property
+    def baseline(self) -> typing.Any:
+        return self._baseline.copy()
+
+    def set_baseline(self, coefficients: typing.Sequence[float], send: bool = False) -> None:
+        """ Change baseline polynomial, heat flow is recomputed for all samples acquired so far.
+
+        :param coefficients: baseline power polynomial in stage temperature, constant term first
+        :param send: if True also write the polynomial to the controller
+        """
+        if send:
+            send_baseline(self._connection, coefficients)
+
+        with self._lock:
+            self._baseline = acquisition.require_numpy(DSCError, self.DESCRIPTION).asarray(coefficients, dtype=float)
+
+            self._buffer.view('heat_flow')[:] = self._heat_flow(self._buffer.view('temperature'),
+                                                                self._buffer.view('power'))
+
+    def _heat_flow(self, temperature: typing.Any, power: typing.Any) -> typing.Any:
+        np = acquisition.require_numpy(DSCError, self.DESCRIPTION)
+
+        return power - np.polynomial.polynomial.polyval(temperature, self._baseline)
+
+    def _row(self, sample: poll.Sample) -> typing.Tuple[float, ...]:
+        values = sample.values
+
+        return (
+            acquisition.magnitude(values[interface.StageValueType.HEATER1_TEMP]),
+            acquisition.magnitude(values[interface.StageValueType.DSC]),
+            acquisition.magnitude(values[interface.StageValueType.DSC_POWER])
+        )
+
+    def _derive(self, block: typing.Dict[str, typing.Any]) -> None:
+        block['heat_flow'] = self._heat_flow(block['temperature'], block['power'])
@@ -67,8 +67,8 @@ class Message(enum.IntEnum):
     GET_CONTROLLER_HARDWARE_VERSION = 0x26
     GET_STAGE_FIRMWARE_VERSION = 0x27
     GET_STAGE_HARDWARE_VERSION = 0x28
-    GET_DATA_RATE = 0x29
-    SET_DATA_RATE = 0x2A
+    GET_DATA_RATE = 0x29, 'vUint32'
+    SET_DATA_RATE = 0x2A, 'vBoolean'
     # GET_STAGE_CABLE_LIMITS = 0x2B, 'vStageCableLimit'
     SEND_DSC_GAIN_VALUES = 0x2C, 'vBoolean'
     SEND_DSC_POWER_VALUE = 0x2D, 'vBoolean'
@@ -186,6 +186,12 @@ class CommsType(enum.IntEnum):
     USB = 2
 
 
+class TriggerSignal(enum.IntEnum):
+    BLUE = 0
+    GREEN = 1
+    PINK = 2
+
+
 class CommsInfoSerial(ctypes.Structure, _InterfaceMixin):
     _fields_ = [
         ('port', 64 * ctypes.c_char),
@@ -886,6 +892,29 @@ class StageValueType(enum.IntEnum):
     # MAX_VALUE = 65535
 
 
+# Readings available from the RHUnit structure returned for STAGE_HUMIDITY_UNIT_DATA, mapped to structure field names
+RH_UNIT_VALUES: typing.Dict[StageValueType, str] = {
+    StageValueType.HUMIDITY: 'rh',
+    StageValueType.HUMIDITY_SETPOINT: 'rhSetpoint',
+    StageValueType.HUMIDITY_TEMP: 'rhTemp',
+    StageValueType.HUMIDITY_DRYING_TIME_LEFT: 'dryTimeSecs',
+    StageValueType.HUMIDITY_DRYING_TIME_SETPOINT: 'setDryTimeSecs',
+    StageValueType.HUMIDITY_SWAP_TIME_LEFT: 'swapTimeSecs',
+    StageValueType.HUMIDITY_SWAP_TIME_SETPOINT: 'setSwapTimeSecs',
+    StageValueType.HUMIDITY_PIPE_TEMP_SETPOINT: 'tubeSetpoint',
+    StageValueType.HUMIDITY_WATER_TEMP: 'waterTemp',
+    StageValueType.HUMIDITY_WATER_TEMP_SETPOINT: 'waterSetpoint'
+}
+
+
+# Readings available from the Running structure returned for GET_PROGRAM_STATE, mapped to structure field names
+RUNNING_VALUES: typing.Dict[StageValueType, str] = {
+    StageValueType.HEATER1_LNP_SPEED: 'lnpSpeed',
+    StageValueType.HEATER1_POWER: 'pwm',
+    StageValueType.RAMP_HOLD_REMAINING: 'timeLeft'
+}
+
+
 class Variant(ctypes.Union):
     _fields_ = [
         ('vChar', ctypes.c_char),
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import tempfile
+import typing
+
+from pylinkam import capabilities, interface, sdk
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Incremented when the stored layout changes, older files are rebuilt
+_FORMAT_VERSION = 1
+
+
+def _default_cache_path() -> str:
+    root = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+
+    return os.path.join(root, 'pylinkam', 'inventory')
+
+
+class Inventory(typing.NamedTuple):
+    """ Static metadata of a controller and its attached stage. """
+
+    controller_serial: str
+    controller_name: str
+    controller_firmware_version: str
+    controller_hardware_version: str
+    controller_config: int
+    stage_serial: str
+    stage_name: str
+    stage_firmware_version: str
+    stage_hardware_version: str
+    stage_config: int
+    heater_details: typing.List[typing.Dict[str, float]]
+    value_ranges: typing.Dict[str, typing.Tuple[typing.Any, typing.Any]]
+
+    @classmethod
+    def build(cls, connection: sdk.SDKWrapper.Connection,
+              value_types: typing.Optional[typing.Iterable[interface.StageValueType]] = None) -> Inventory:
+        """ Read all static metadata from a controller.
+
+        :param connection: controller connection
+        :param value_types: parameters to read allowable ranges for, defaults to all parameters supported by the
+        attached hardware
+        :return: Inventory
+        """
+        controller_config = connection.get_controller_config()
+        stage_config = connection.get_stage_config()
+
+        caps = capabilities.Capabilities(controller_config, stage_config)
+
+        heater_details = []
+
+        for channel, feature in enumerate(('heater', 'heater2')):
+            if feature in caps.features:
+                details = connection.get_heater_details(channel)
+                heater_details.append({field[0]: getattr(details, field[0]) for field in details._fields_})
+
+        if value_types is None:
+            value_types = caps.prune(interface.StageValueType)
+
+        value_ranges = {}
+
+        for value_type in value_types:
+            try:
+                minimum, maximum = connection.get_value_range(value_type)
+            except sdk.SDKError:
+                _LOGGER.debug(f"Unable to read range of {value_type.name}", exc_info=True)
+                continue
+
+            # Strip units, they are restored from the value type when read back
+            value_ranges[value_type.name] = (getattr(minimum, 'magnitude', minimum),
+                                             getattr(maximum, 'magnitude', maximum))
+
+        return cls(
+            controller_serial=connection.get_controller_serial(),
+            controller_name=connection.get_controller_name(),
+            controller_firmware_version=connection.get_controller_firmware_version(),
+            controller_hardware_version=connection.get_controller_hardware_version(),
+            controller_config=int(controller_config.value),
+            stage_serial=connection.get_stage_serial(),
+            stage_name=connection.get_stage_name(),
+            stage_firmware_version=connection.get_stage_firmware_version(),
+            stage_hardware_version=connection.get_stage_hardware_version(),
+            stage_config=int(stage_config.value),
+            heater_details=heater_details,
+            value_ranges=value_ranges
+        )
+
+    @classmethod
+    def from_mapping(cls, mapping: typing.Mapping[str, typing.Any]) -> Inventory:
+        fields = {field: mapping[field] for field in cls._fields}
+        fields['value_ranges'] = {name: tuple(limits) for name, limits in fields['value_ranges'].items()}
+
+        return cls(**fields)
+
+    def to_mapping(self) -> typing.Dict[str, typing.Any]:
+        return self._asdict()
+
+    def get_capabilities(self) -> capabilities.Capabilities:
+        """ Get capabilities of the controller and stage.
+
+        :return: capabilities.Capabilities
+        """
+        return capabilities.Capabilities(self.get_controller_config(), self.get_stage_config())
+
+    def get_controller_config(self) -> interface.ControllerConfig:
+        return interface.ControllerConfig(value=self.controller_config)
+
+    def get_stage_config(self) -> interface.StageConfig:
+        return interface.StageConfig(value=self.stage_config)
+
+    def get_heater_details(self, channel: int = 0) -> interface.HeaterDetails:
+        """ Get temperature controller characteristics.
+
+        :param channel: channel number for controllers with multiple temperature regulators
+        :return: interface.HeaterDetails
+        """
+        if channel >= len(self.heater_details):
+            raise KeyError(f"No heater details stored for channel {channel}")
+
+        return interface.HeaterDetails(**self.heater_details[channel])
+
+    def get_value_range(self, value_type: interface.StageValueType) -> typing.Tuple[typing.Any, typing.Any]:
+        """ Get stored allowable range of a parameter.
+
+        :param value_type: parameter to look up
+        :return: tuple with 2 elements containing minimum and maximum, type varies
+        """
+        if value_type.name not in self.value_ranges:
+            raise KeyError(f"No range stored for {value_type.name}")
+
+        minimum, maximum = self.value_ranges[value_type.name]
+
+        return sdk.SDKWrapper.Connection._wrap_value(value_type, minimum), \
+            sdk.SDKWrapper.Connection._wrap_value(value_type, maximum)
+
+
+class InventoryCache:
+    """ On-disk store of controller inventories keyed by controller serial number. A stored inventory is reused when
+    the controller serial, controller firmware version and stage serial read on connection match, avoiding the many
+    requests otherwise needed to rebuild it. """
+
+    def __init__(self, path: typing.Optional[str] = None):
+        """ Create new cache.
+
+        :param path: directory to store inventory files in, defaults to a per-user cache directory
+        """
+        self._path = path or _default_cache_path()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _get_filename(self, controller_serial: str) -> str:
+        # Serial numbers are reported by the controller, don't trust them as file names
+        return os.path.join(self._path, re.sub(r'[^A-Za-z0-9_.-]', '_', controller_serial) + '.json')
+
+    def get(self, connection: sdk.SDKWrapper.Connection,
+            value_types: typing.Optional[typing.Iterable[interface.StageValueType]] = None) -> Inventory:
+        """ Get inventory of a connected controller, from disk if still valid, otherwise read from the controller and
+        stored.
+
+        :param connection: controller connection
+        :param value_types: parameters to read allowable ranges for when rebuilding, defaults to all parameters
+        supported by the attached hardware
+        :return: Inventory
+        """
+        controller_serial = connection.get_controller_serial()
+
+        if len(controller_serial) == 0:
+            # Can't identify controller, don't cache
+            return Inventory.build(connection, value_types)
+
+        inventory = self.load(controller_serial)
+
+        if inventory is not None:
+            if inventory.controller_firmware_version != connection.get_controller_firmware_version():
+                _LOGGER.info(f"Controller {controller_serial} firmware changed, rebuilding inventory")
+            elif inventory.stage_serial != connection.get_stage_serial():
+                _LOGGER.info(f"Controller {controller_serial} stage changed, rebuilding inventory")
+            else:
+                return inventory
+
+        inventory = Inventory.build(connection, value_types)
+        self.save(inventory)
+
+        return inventory
+
+    def load(self, controller_serial: str) -> typing.Optional[Inventory]:
+        """ Load stored inventory.
+
+        :param controller_serial: controller serial number
+        :return: Inventory or None if not stored or unreadable
+        """
+        try:
+            with open(self._get_filename(controller_serial), 'r') as f:
+                mapping = json.load(f)
+
+            if mapping.get('format') != _FORMAT_VERSION:
+                return None
+
+            inventory = Inventory.from_mapping(mapping['inventory'])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            _LOGGER.warning(f"Discarding unreadable inventory for {controller_serial}", exc_info=True)
+            return None
+
+        if inventory.controller_serial != controller_serial:
+            return None
+
+        return inventory
+
+    def save(self, inventory: Inventory) -> None:
+        """ Store inventory, replacing any previous version for the same controller.
+
+        :param inventory: Inventory to store
+        """
+        os.makedirs(self._path, exist_ok=True)
+
+        filename = self._get_filename(inventory.controller_serial)
+
+        # Write to a temporary file first so that concurrent readers never see a partial file
+        fd, temp_filename = tempfile.mkstemp(suffix='.tmp', dir=self._path)
+
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'format': _FORMAT_VERSION, 'inventory': inventory.to_mapping()}, f, indent=2)
+
+            os.replace(temp_filename, filename)
+        except BaseException:
+            os.unlink(temp_filename)
+            raise
+
+    def invalidate(self, controller_serial: str) -> None:
+        """ Remove stored inventory.
+
+        :param controller_serial: controller serial number
+        """
+        try:
+            os.unlink(self._get_filename(controller_serial))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+import typing
+
+from pylinkam import interface, scheduler, sdk, timing
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Sample(typing.NamedTuple):
+    """ Set of readings taken during a single polling cycle. """
+
+    timestamp: float
+    values: typing.Dict[interface.StageValueType, typing.Any]
+    status: typing.Optional[interface.ControllerStatus] = None
+
+    # Maximum error of timestamp in seconds
+    uncertainty: float = 0.0
+
+
+def align_period(period: typing.Optional[float], update_interval: typing.Optional[float]) -> float:
+    """ Align a polling period to a whole multiple of the controller update interval.
+
+    :param period: requested period in seconds, None to poll at the controller update rate
+    :param update_interval: controller update interval in seconds, None if unknown
+    :return: float aligned period in seconds
+    """
+    if update_interval is None or update_interval <= 0:
+        if period is None:
+            raise ValueError('Polling period required when controller update interval is unknown')
+
+        return period
+
+    if period is None:
+        return update_interval
+
+    return max(1, round(period / update_interval)) * update_interval
+
+
+class Poller:
+    """ Background polling of a set of values from a single connection. The polling period is aligned to the
+    controller data rate to avoid reading stale duplicates or skipping updates. """
+
+    def __init__(self, connection: sdk.SDKWrapper.Connection,
+                 value_types: typing.Iterable[interface.StageValueType], period: typing.Optional[float] = None,
+                 include_status: bool = False, prune: bool = True,
+                 callback: typing.Optional[typing.Callable[[Sample], None]] = None):
+        """ Create new poller, polling does not begin until start() is called.
+
+        :param connection: connection to poll
+        :param value_types: parameters to read each cycle
+        :param period: requested polling period in seconds, rounded to a multiple of the controller data rate, defaults
+        to the controller data rate
+        :param include_status: if True also read controller status each cycle
+        :param prune: if True skip parameters not supported by the attached hardware
+        :param callback: optional callable to receive each Sample
+        """
+        self._connection = connection
+        self._value_types = list(dict.fromkeys(value_types))
+        self._requested_period = period
+        self._include_status = include_status
+        self._prune = prune
+
+        self._callbacks: typing.List[typing.Callable[[Sample], None]] = []
+
+        if callback is not None:
+            self._callbacks.append(callback)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+        self._period: typing.Optional[float] = None
+        self._latest: typing.Optional[Sample] = None
+        self._overruns = 0
+
+    def __enter__(self) -> Poller:
+        self.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def connection(self) -> sdk.SDKWrapper.Connection:
+        return self._connection
+
+    @property
+    def latest(self) -> typing.Optional[Sample]:
+        return self._latest
+
+    @property
+    def overruns(self) -> int:
+        """ Number of cycles skipped because polling took longer than the period. """
+        return self._overruns
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def period(self) -> float:
+        """ Polling period in seconds after alignment to the controller data rate. """
+        if self._period is None:
+            self._period = align_period(self._requested_period, self.get_update_interval())
+
+        return self._period
+
+    @property
+    def value_types(self) -> typing.List[interface.StageValueType]:
+        with self._lock:
+            return list(self._value_types)
+
+    def set_value_types(self, value_types: typing.Iterable[interface.StageValueType]) -> None:
+        """ Change parameters read each cycle, takes effect from the next cycle.
+
+        :param value_types: parameters to read
+        """
+        with self._lock:
+            self._value_types = list(dict.fromkeys(value_types))
+
+    def set_include_status(self, include_status: bool) -> None:
+        """ Change whether controller status is read each cycle, takes effect from the next cycle.
+
+        :param include_status: if True also read controller status each cycle
+        """
+        with self._lock:
+            self._include_status = include_status
+
+    def set_period(self, period: typing.Optional[float]) -> None:
+        """ Change requested polling period, takes effect from the next cycle.
+
+        :param period: requested period in seconds, None to poll at the controller update rate
+        """
+        self._requested_period = period
+        self._period = None
+
+    def add_callback(self, callback: typing.Callable[[Sample], None]) -> None:
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def remove_callback(self, callback: typing.Callable[[Sample], None]) -> None:
+        with self._lock:
+            self._callbacks.remove(callback)
+
+    def get_update_interval(self) -> typing.Optional[float]:
+        """ Read controller update interval.
+
+        :return: interval in seconds, None if unavailable
+        """
+        try:
+            interval = self._connection.get_data_rate()
+        except sdk.SDKError:
+            _LOGGER.warning('Unable to read controller data rate', exc_info=True)
+            return None
+
+        if interval <= 0:
+            return None
+
+        return interval / 1000
+
+    def poll(self) -> Sample:
+        """ Perform a single polling cycle and notify callbacks.
+
+        :return: Sample
+        """
+        with self._lock:
+            value_types = list(self._value_types)
+            include_status = self._include_status
+            callbacks = list(self._callbacks)
+
+        # Background reads yield to control commands
+        with self._connection.priority(scheduler.Priority.BACKGROUND):
+            readings = self._connection.get_values_timed(value_types, prune=self._prune)
+            status = self._connection.get_status() if include_status else None
+            status_timing = self._connection.get_last_timing() if include_status else None
+
+        # Timestamp the middle of the window in which the controller was sampled
+        timings = [timing.Timing(reading.monotonic - reading.uncertainty, reading.monotonic + reading.uncertainty)
+                   for reading in readings.values()]
+
+        if status_timing is not None:
+            timings.append(status_timing)
+
+        if len(timings) > 0:
+            window = timing.Timing(min(x.start for x in timings), max(x.end for x in timings))
+            timestamp, uncertainty = timing.get_wall_clock().to_wall(window.midpoint), window.uncertainty
+        else:
+            timestamp, uncertainty = time.time(), 0.0
+
+        sample = Sample(timestamp, {value_type: reading.value for value_type, reading in readings.items()}, status,
+                        uncertainty)
+        self._latest = sample
+
+        for callback in callbacks:
+            try:
+                callback(sample)
+            except Exception:
+                _LOGGER.exception('Unhandled exception in poll callback')
+
+        return sample
+
+    def start(self) -> None:
+        """ Start background polling thread. """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        # Resolve period before polling begins so that configuration errors are raised to the caller
+        period = self.period
+        _LOGGER.debug(f"Polling every {period:.3f} s")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(period,), name='pylinkam-poll', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: typing.Optional[float] = None) -> None:
+        """ Stop background polling thread.
+
+        :param timeout: maximum time to wait for the thread to exit
+        """
+        self._stop.set()
+
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+        self._thread = None
+
+    def _run(self, period: float) -> None:
+        deadline = time.monotonic()
+
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                _LOGGER.exception('Error while polling controller')
+
+            try:
+                period = self.period
+            except Exception:
+                _LOGGER.exception(f"Unable to resolve polling period, continuing every {period:.3f} s")
+
+            deadline += period
+            now = time.monotonic()
+
+            if now > deadline:
+                # Skip missed cycles but stay on the original schedule
+                missed = math.ceil((now - deadline) / period)
+                self._overruns += missed
+                deadline += missed * period
+
+            self._stop.wait(deadline - now)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import asyncio
+import enum
+import json
+import struct
+import typing
+
+# Frame header, frame type followed by payload length
+FRAME_HEADER = struct.Struct('<BI')
+
+# Upper limit on payload size, guards against reading garbage as a huge length
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class FrameType(enum.IntEnum):
+    """ Types of frame exchanged between local servers and clients. """
+
+    # Telemetry subscription request, JSON
+    HELLO = 1
+
+    # Telemetry channel list, JSON
+    CHANNELS = 2
+
+    # Telemetry sample, binary
+    DATA = 3
+
+    # Error description, JSON
+    ERROR = 4
+
+    # Remote control request, JSON
+    REQUEST = 5
+
+    # Remote control reply, JSON
+    RESPONSE = 6
+
+
+def pack_frame(frame_type: FrameType, payload: bytes) -> bytes:
+    """ Build a frame.
+
+    :param frame_type: type of frame
+    :param payload: frame payload
+    :return: bytes
+    """
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame payload of {len(payload)} bytes exceeds limit")
+
+    return FRAME_HEADER.pack(frame_type, len(payload)) + payload
+
+
+def pack_json_frame(frame_type: FrameType, obj: typing.Any) -> bytes:
+    """ Build a frame with a JSON payload.
+
+    :param frame_type: type of frame
+    :param obj: JSON serializable object
+    :return: bytes
+    """
+    return pack_frame(frame_type, json.dumps(obj, separators=(',', ':')).encode())
+
+
+async def read_frame(reader: asyncio.StreamReader) -> typing.Tuple[FrameType, bytes]:
+    """ Read a single frame.
+
+    :param reader: stream to read from
+    :return: tuple of frame type and payload
+    :raises asyncio.IncompleteReadError: if the stream ends part way through a frame
+    :raises ProtocolError: if the frame is malformed
+    """
+    header = await reader.readexactly(FRAME_HEADER.size)
+    frame_type, length = FRAME_HEADER.unpack(header)
+
+    if length > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame payload of {length} bytes exceeds limit")
+
+    try:
+        frame_type = FrameType(frame_type)
+    except ValueError:
+        raise ProtocolError(f"Unknown frame type {frame_type}") from None
+
+    return frame_type, await reader.readexactly(length)
+
+
+def unpack_json(payload: bytes) -> typing.Any:
+    """ Decode a JSON payload.
+
+    :param payload: frame payload
+    :return: decoded object
+    :raises ProtocolError: if the payload is not valid JSON
+    """
+    try:
+        return json.loads(payload)
+    except ValueError as exc:
+        raise ProtocolError(f"Invalid JSON payload: {exc!s}") from None
+
+
+def recv_frame(stream: typing.BinaryIO) -> typing.Tuple[FrameType, bytes]:
+    """ Read a single frame from a blocking stream.
+
+    :param stream: binary stream to read from, for example from socket.makefile('rb')
+    :return: tuple of frame type and payload
+    :raises EOFError: if the stream ends part way through a frame
+    :raises ProtocolError: if the frame is malformed
+    """
+    header = stream.read(FRAME_HEADER.size)
+
+    if header is None or len(header) < FRAME_HEADER.size:
+        raise EOFError('Stream closed')
+
+    frame_type, length = FRAME_HEADER.unpack(header)
+
+    if length > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame payload of {length} bytes exceeds limit")
+
+    try:
+        frame_type = FrameType(frame_type)
+    except ValueError:
+        raise ProtocolError(f"Unknown frame type {frame_type}") from None
+
+    payload = stream.read(length)
+
+    if payload is None or len(payload) < length:
+        raise EOFError('Stream closed')
+
+    return frame_type, payload
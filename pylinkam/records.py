@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import ctypes
+import functools
+import typing
+from types import ModuleType
+
+# NumPy is only required for record array support
+try:
+    # noinspection PyPackageRequirements
+    import numpy
+except ImportError:
+    numpy: typing.Optional[ModuleType] = None
+
+
+class RecordError(Exception):
+    pass
+
+
+def _require_numpy() -> ModuleType:
+    if numpy is None:
+        raise RecordError('NumPy is required for record array support')
+
+    return numpy
+
+
+def _is_flag_union(ctype: typing.Any) -> bool:
+    # Bit field unions (ControllerStatus etc.) all expose a raw integer as "value"
+    return isinstance(ctype, type) and issubclass(ctype, ctypes.Union) and \
+        any(field[0] == 'value' for field in ctype._fields_)
+
+
+def _field_dtype(ctype: typing.Any) -> typing.Any:
+    np = _require_numpy()
+
+    if _is_flag_union(ctype):
+        return _field_dtype(dict((field[0], field[1]) for field in ctype._fields_)['value'])
+
+    if isinstance(ctype, type) and issubclass(ctype, ctypes.Array):
+        if ctype._type_ is ctypes.c_char:
+            return np.dtype(f"S{ctype._length_}")
+
+        return np.dtype((_field_dtype(ctype._type_), (ctype._length_,)))
+
+    if isinstance(ctype, type) and issubclass(ctype, (ctypes.Structure, ctypes.Union)):
+        return get_dtype(ctype)
+
+    return np.dtype(ctype)
+
+
+@functools.lru_cache(maxsize=None)
+def get_dtype(struct_type: typing.Type[ctypes.Structure]) -> typing.Any:
+    """ Generate a NumPy structured dtype with identical memory layout to a ctypes structure from interface.
+
+    Bit field unions such as ControllerStatus are represented by their underlying integer, use unpack_flags to expand
+    these into individual fields.
+
+    :param struct_type: ctypes.Structure or ctypes.Union type
+    :return: numpy.dtype
+    """
+    np = _require_numpy()
+
+    if _is_flag_union(struct_type):
+        return _field_dtype(struct_type)
+
+    names = []
+    formats = []
+    offsets = []
+
+    for field in struct_type._fields_:
+        if len(field) >= 3:
+            raise RecordError(f"Bit fields in {struct_type.__name__} cannot be mapped directly, use the parent union")
+
+        names.append(field[0])
+        formats.append(_field_dtype(field[1]))
+        offsets.append(getattr(struct_type, field[0]).offset)
+
+    return np.dtype({
+        'names': names,
+        'formats': formats,
+        'offsets': offsets,
+        'itemsize': ctypes.sizeof(struct_type)
+    })
+
+
+def from_buffer(struct_type: typing.Type[ctypes.Structure], buffer: typing.Any, count: int = -1,
+                offset: int = 0) -> typing.Any:
+    """ View raw structure bytes as a record array without copying.
+
+    :param struct_type: ctypes structure type contained in buffer
+    :param buffer: object exposing the buffer interface, including ctypes instances
+    :param count: number of records to read, -1 for all
+    :param offset: offset into buffer in bytes
+    :return: numpy.ndarray
+    """
+    return _require_numpy().frombuffer(buffer, dtype=get_dtype(struct_type), count=count, offset=offset)
+
+
+def stack(structs: typing.Sequence[ctypes.Structure]) -> typing.Any:
+    """ Combine several structure instances of the same type into a single record array.
+
+    :param structs: sequence of ctypes structures
+    :return: numpy.ndarray
+    """
+    if len(structs) == 0:
+        raise RecordError('At least one structure is required')
+
+    recorder = RecordBuffer(type(structs[0]), len(structs))
+
+    for struct in structs:
+        recorder.append(struct)
+
+    return recorder.records
+
+
+def unpack_flags(flags_type: typing.Type[ctypes.Structure], values: typing.Any) -> typing.Dict[str, typing.Any]:
+    """ Expand integer bit field values from a record array into individual arrays.
+
+    :param flags_type: bit field structure type, eg. interface.ControllerStatusFlags
+    :param values: array of raw integer values
+    :return: dict of field name to array, single bit fields are returned as bool
+    """
+    np = _require_numpy()
+
+    values = np.asarray(values)
+    mapping = {}
+    shift = 0
+
+    for field in flags_type._fields_:
+        width = field[2]
+
+        if 'unused' not in field[0] and 'padding' not in field[0]:
+            field_values = (values >> shift) & ((1 << width) - 1)
+
+            if width == 1:
+                field_values = field_values.astype(bool)
+
+            mapping[field[0]] = field_values
+
+        shift += width
+
+    return mapping
+
+
+class RecordBuffer:
+    """ Preallocated, growable record array for accumulating a series of structure snapshots. """
+
+    def __init__(self, struct_type: typing.Type[ctypes.Structure], capacity: int = 1024):
+        """ Create new buffer.
+
+        :param struct_type: ctypes structure type to store
+        :param capacity: initial number of records to allocate
+        """
+        self._struct_type = struct_type
+        self._dtype = get_dtype(struct_type)
+        self._array = _require_numpy().zeros(max(capacity, 1), dtype=self._dtype)
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def dtype(self) -> typing.Any:
+        return self._dtype
+
+    @property
+    def records(self) -> typing.Any:
+        """ View of all records appended so far. """
+        return self._array[:self._length]
+
+    def append(self, struct: ctypes.Structure) -> None:
+        """ Copy a structure instance into the buffer.
+
+        :param struct: instance of the buffer structure type
+        """
+        if not isinstance(struct, self._struct_type):
+            raise RecordError(f"Expected {self._struct_type.__name__}, got {type(struct).__name__}")
+
+        if self._length == len(self._array):
+            array = _require_numpy().zeros(2 * len(self._array), dtype=self._dtype)
+            array[:self._length] = self._array
+            self._array = array
+
+        ctypes.memmove(self._array.ctypes.data + self._length * self._dtype.itemsize, ctypes.addressof(struct),
+                       self._dtype.itemsize)
+        self._length += 1
+
+    def clear(self) -> None:
+        self._length = 0
+
+
+class ColumnBuffer:
+    """ Preallocated, growable set of equal length numeric columns for accumulating blocks of samples. """
+
+    def __init__(self, fields: typing.Sequence[str], capacity: int = 1024, dtype: typing.Any = float):
+        """ Create new buffer.
+
+        :param fields: column names
+        :param capacity: initial number of rows to allocate
+        :param dtype: column data type
+        """
+        np = _require_numpy()
+
+        self._columns = {field: np.zeros(max(capacity, 1), dtype=dtype) for field in fields}
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def fields(self) -> typing.Tuple[str, ...]:
+        return tuple(self._columns)
+
+    def extend(self, block: typing.Mapping[str, typing.Any]) -> None:
+        """ Append rows to all columns.
+
+        :param block: mapping of every column name to an array of new values, all of the same length
+        """
+        lengths = {len(block[field]) for field in self._columns}
+
+        if len(lengths) != 1:
+            raise RecordError('All columns must be extended by the same number of rows')
+
+        start = self._length
+        end = start + lengths.pop()
+        capacity = len(next(iter(self._columns.values())))
+
+        if end > capacity:
+            np = _require_numpy()
+
+            for field, column in self._columns.items():
+                grown = np.zeros(max(end, 2 * capacity), dtype=column.dtype)
+                grown[:start] = column[:start]
+                self._columns[field] = grown
+
+        for field, column in self._columns.items():
+            column[start:end] = block[field]
+
+        self._length = end
+
+    def view(self, field: str) -> typing.Any:
+        """ Writable view of a column, only valid until the buffer is next extended.
+
+        :param field: column name
+        :return: array
+        """
+        return self._columns[field][:self._length]
+
+    def to_dict(self) -> typing.Dict[str, typing.Any]:
+        """ Copy all columns.
+
+        :return: dict of column name to array
+        """
+        return {field: column[:self._length].copy() for field, column in self._columns.items()}
+
+    def clear(self) -> None:
+        self._length = 0
+
@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import asyncio
+import base64
+import concurrent.futures
+import ctypes
+import enum
+import functools
+import itertools
+import logging
+import socket
+import threading
+import typing
+from contextlib import contextmanager
+
+from pylinkam import capabilities, interface, protocol, sdk, timing, util
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Connection methods that only make sense locally
+_LOCAL_METHODS = frozenset(('close', 'priority', 'get_capabilities', 'get_last_timing'))
+
+# Exceptions re-raised by the client with their original type, anything else is raised as RemoteError
+_EXCEPTIONS: typing.Dict[str, typing.Type[Exception]] = {
+    exc.__name__: exc for exc in (
+        sdk.SDKError, sdk.SDKTimeoutError, sdk.SDKStalledError, sdk.ConnectionLostError, sdk.ControllerConnectError,
+        KeyError, TypeError, ValueError
+    )
+}
+
+# Named tuples returned by Connection methods, restored with their original type by the client
+_NAMED_TUPLES: typing.Dict[str, typing.Type[typing.Tuple[typing.Any, ...]]] = {
+    cls.__name__: cls for cls in (timing.Reading, timing.Timing)
+}
+
+
+class RemoteError(sdk.SDKError):
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def get_remote_methods() -> typing.FrozenSet[str]:
+    """ Get names of Connection methods available through the remote control server.
+
+    :return: frozenset of method names
+    """
+    return frozenset(
+        name for name, attr in vars(sdk.SDKWrapper.Connection).items()
+        if callable(attr) and not name.startswith('_') and name not in _LOCAL_METHODS
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_interface_types() -> typing.Dict[str, type]:
+    return {
+        name: attr for name, attr in vars(interface).items()
+        if isinstance(attr, type) and issubclass(attr, (ctypes.Structure, ctypes.Union, enum.IntEnum))
+    }
+
+
+def encode(value: typing.Any) -> typing.Any:
+    """ Convert a value to a JSON serializable form. Structures are sent as raw bytes and quantities as magnitude and
+    unit.
+
+    :param value: value to encode
+    :return: JSON serializable object
+    """
+    if isinstance(value, enum.IntEnum):
+        return {'__enum__': type(value).__name__, 'name': value.name}
+    elif isinstance(value, (ctypes.Structure, ctypes.Union)):
+        return {'__struct__': type(value).__name__, 'data': base64.b64encode(bytes(value)).decode()}
+    elif isinstance(value, dict):
+        return {'__dict__': [[encode(k), encode(v)] for k, v in value.items()]}
+    elif _NAMED_TUPLES.get(type(value).__name__) is type(value):
+        return {'__namedtuple__': type(value).__name__, 'fields': [encode(x) for x in value]}
+    elif isinstance(value, tuple):
+        return {'__tuple__': [encode(x) for x in value]}
+    elif isinstance(value, list):
+        return [encode(x) for x in value]
+    elif hasattr(value, 'magnitude') and hasattr(value, 'units'):
+        return {'__quantity__': encode(value.magnitude), 'unit': str(value.units)}
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def decode(obj: typing.Any) -> typing.Any:
+    """ Restore a value converted by encode. Quantities are returned as magnitudes if pint is not available.
+
+    :param obj: decoded JSON object
+    :return: original value
+    """
+    if isinstance(obj, list):
+        return [decode(x) for x in obj]
+    elif not isinstance(obj, dict):
+        return obj
+
+    if '__enum__' in obj:
+        return _get_interface_types()[obj['__enum__']][obj['name']]
+    elif '__struct__' in obj:
+        return _get_interface_types()[obj['__struct__']].from_buffer_copy(base64.b64decode(obj['data']))
+    elif '__dict__' in obj:
+        return {decode(k): decode(v) for k, v in obj['__dict__']}
+    elif '__namedtuple__' in obj:
+        return _NAMED_TUPLES[obj['__namedtuple__']](*(decode(x) for x in obj['fields']))
+    elif '__tuple__' in obj:
+        return tuple(decode(x) for x in obj['__tuple__'])
+    elif '__quantity__' in obj:
+        pint = util.get_pint()
+        magnitude = decode(obj['__quantity__'])
+
+        return pint.Quantity(magnitude, obj['unit']) if pint is not None else magnitude
+
+    raise protocol.ProtocolError(f"Cannot decode {obj!r}")
+
+
+class RemoteServer:
+    """ Exposes a single controller connection to other local processes over TCP or a Unix socket.
+
+    Clients send REQUEST frames containing a JSON list of calls, each {"id": ..., "method": ..., "args": [...],
+    "kwargs": {...}}, and receive one RESPONSE frame per request frame with a matching list of {"id": ..., "result":
+    ...} or {"id": ..., "error": {"type": ..., "message": ...}}. Clients may send further requests without waiting for
+    replies, requests from a single client are executed in the order sent. """
+
+    def __init__(self, connection: sdk.SDKWrapper.Connection, max_pending: int = 1024):
+        """ Create new server, call start_tcp or start_unix to begin accepting clients.
+
+        :param connection: connection to expose
+        :param max_pending: maximum number of request frames queued for each client before reading pauses
+        """
+        self._connection = connection
+        self._max_pending = max_pending
+
+        self._server: typing.Optional[asyncio.AbstractServer] = None
+        self._clients: typing.Set[asyncio.StreamWriter] = set()
+
+        # SDK calls block, run them off the event loop
+        self._executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix='pylinkam-remote')
+
+    async def __aenter__(self) -> RemoteServer:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def sockets(self) -> typing.Tuple[typing.Any, ...]:
+        """ Listening sockets, use to find the bound port when started with port 0. """
+        return tuple(self._server.sockets) if self._server is not None else ()
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    async def start_tcp(self, host: str = '127.0.0.1', port: int = 0) -> None:
+        """ Accept clients over TCP.
+
+        :param host: address to listen on, defaults to localhost only
+        :param port: port to listen on, 0 to pick a free port
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+
+    async def start_unix(self, path: str) -> None:
+        """ Accept clients over a Unix socket.
+
+        :param path: socket path
+        """
+        self._server = await asyncio.start_unix_server(self._handle, path)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            raise RuntimeError('Server not started')
+
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """ Stop accepting clients and disconnect existing clients. The connection itself is left open. """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        for writer in list(self._clients):
+            writer.close()
+
+        self._executor.shutdown(wait=False)
+
+    def _execute(self, requests: typing.List[typing.Any]) -> typing.List[typing.Dict[str, typing.Any]]:
+        # Runs a whole batch in one executor job
+        responses = []
+
+        for request in requests:
+            request_id = request.get('id') if isinstance(request, dict) else None
+
+            try:
+                method = request['method']
+
+                if method not in get_remote_methods():
+                    raise ValueError(f"Unknown method {method!r}")
+
+                args = decode(request.get('args', []))
+                kwargs = {k: decode(v) for k, v in request.get('kwargs', {}).items()}
+
+                result = getattr(self._connection, method)(*args, **kwargs)
+
+                responses.append({'id': request_id, 'result': encode(result)})
+            except Exception as exc:
+                responses.append({'id': request_id, 'error': {'type': type(exc).__name__, 'message': str(exc)}})
+
+        return responses
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        pending: asyncio.Queue[typing.Optional[typing.List[typing.Any]]] = asyncio.Queue(self._max_pending)
+
+        async def worker() -> None:
+            while True:
+                requests = await pending.get()
+
+                if requests is None:
+                    return
+
+                responses = await loop.run_in_executor(self._executor, self._execute, requests)
+
+                writer.write(protocol.pack_json_frame(protocol.FrameType.RESPONSE, responses))
+                await writer.drain()
+
+        self._clients.add(writer)
+        task = asyncio.ensure_future(worker())
+
+        try:
+            while True:
+                frame_type, payload = await protocol.read_frame(reader)
+
+                if frame_type != protocol.FrameType.REQUEST:
+                    raise protocol.ProtocolError(f"Expected REQUEST frame, got {frame_type.name}")
+
+                requests = protocol.unpack_json(payload)
+
+                if not isinstance(requests, list):
+                    raise protocol.ProtocolError('Request frame must contain a list')
+
+                # Blocks reading further requests while the queue is full
+                await pending.put(requests)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except protocol.ProtocolError as exc:
+            _LOGGER.warning(f"Closing remote client: {exc!s}")
+            writer.write(protocol.pack_json_frame(protocol.FrameType.ERROR, {'message': str(exc)}))
+        finally:
+            # Let queued requests finish before disconnecting
+            await pending.put(None)
+
+            try:
+                await task
+            except ConnectionError:
+                pass
+
+            self._clients.discard(writer)
+            writer.close()
+
+
+class RemoteConnection:
+    """ Client for RemoteServer with the same methods as SDKWrapper.Connection.
+
+    Each method call waits for its reply. Use submit to pipeline several requests without waiting, and batch to send
+    several requests in a single frame. """
+
+    def __init__(self, host: str = '127.0.0.1', port: typing.Optional[int] = None, path: typing.Optional[str] = None,
+                 timeout: typing.Optional[float] = None):
+        """ Connect to a server.
+
+        :param host: server address when using TCP
+        :param port: server port when using TCP
+        :param path: socket path, if provided a Unix socket is used instead of TCP
+        :param timeout: default time to wait for replies in seconds, None to wait indefinitely
+        """
+        if path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(path)
+        elif port is not None:
+            self._socket = socket.create_connection((host, port))
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            raise ValueError('Port or path required')
+
+        self._timeout = timeout
+        self._stream = self._socket.makefile('rb')
+
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._futures: typing.Dict[int, concurrent.futures.Future] = {}
+
+        self._batch = threading.local()
+
+        self._capabilities: typing.Optional[capabilities.Capabilities] = None
+
+        self._closed = False
+        self._thread = threading.Thread(target=self._receive, name='pylinkam-remote-client', daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> RemoteConnection:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getattr__(self, name: str) -> typing.Any:
+        if name not in get_remote_methods():
+            raise AttributeError(name)
+
+        attr = getattr(sdk.SDKWrapper.Connection, name)
+
+        def method(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            return self.submit(name, *args, **kwargs).result(self._timeout)
+
+        method.__name__ = name
+        method.__doc__ = attr.__doc__
+
+        return method
+
+    def close(self) -> None:
+        """ Disconnect from server, requests awaiting a reply fail with RemoteError. """
+        self._closed = True
+
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+        self._socket.close()
+
+    def get_capabilities(self) -> capabilities.Capabilities:
+        """ Determine features and values supported by the attached controller and stage. Configuration is only read
+        once per connection.
+
+        :return: capabilities.Capabilities
+        """
+        if self._capabilities is None:
+            self._capabilities = capabilities.Capabilities(self.get_controller_config(), self.get_stage_config())
+
+        return self._capabilities
+
+    def submit(self, method: str, *args: typing.Any, **kwargs: typing.Any) -> concurrent.futures.Future:
+        """ Send a request without waiting for the reply.
+
+        :param method: Connection method name
+        :param args: method arguments
+        :param kwargs: method keyword arguments
+        :return: Future resolving to the method result
+        """
+        if method not in get_remote_methods():
+            raise AttributeError(method)
+
+        if self._closed:
+            raise RemoteError('Connection closed')
+
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        request = {
+            'id': next(self._ids),
+            'method': method,
+            'args': encode(list(args)),
+            'kwargs': {k: encode(v) for k, v in kwargs.items()}
+        }
+
+        self._futures[request['id']] = future
+
+        batch = getattr(self._batch, 'requests', None)
+
+        if batch is not None:
+            batch.append(request)
+        else:
+            self._send([request])
+
+        return future
+
+    @contextmanager
+    def batch(self) -> typing.Generator[None, None, None]:
+        """ Collect requests submitted by the current thread within a context and send them in a single frame on exit.
+        Calls that wait for their reply can't be made within a batch, use submit instead.
+        """
+        if getattr(self._batch, 'requests', None) is not None:
+            # Nested batches join the outer batch
+            yield
+            return
+
+        self._batch.requests = []
+
+        try:
+            yield
+        finally:
+            requests, self._batch.requests = self._batch.requests, None
+
+            if len(requests) > 0:
+                self._send(requests)
+
+    def _send(self, requests: typing.List[typing.Dict[str, typing.Any]]) -> None:
+        frame = protocol.pack_json_frame(protocol.FrameType.REQUEST, requests)
+
+        try:
+            with self._send_lock:
+                self._socket.sendall(frame)
+        except OSError as exc:
+            for request in requests:
+                future = self._futures.pop(request['id'], None)
+
+                if future is not None:
+                    future.set_exception(RemoteError(f"Send failed: {exc!s}"))
+
+    def _receive(self) -> None:
+        try:
+            while True:
+                frame_type, payload = protocol.recv_frame(self._stream)
+                message = protocol.unpack_json(payload)
+
+                if frame_type == protocol.FrameType.ERROR:
+                    raise RemoteError(message.get('message', 'Server error'))
+                elif frame_type != protocol.FrameType.RESPONSE:
+                    raise protocol.ProtocolError(f"Expected RESPONSE frame, got {frame_type.name}")
+
+                for response in message:
+                    future = self._futures.pop(response['id'], None)
+
+                    if future is None:
+                        continue
+
+                    if 'error' in response:
+                        error = response['error']
+                        future.set_exception(_EXCEPTIONS.get(error['type'], RemoteError)(error['message']))
+                    else:
+                        try:
+                            future.set_result(decode(response['result']))
+                        except Exception as exc:
+                            future.set_exception(exc)
+        except Exception as exc:
+            if not self._closed:
+                _LOGGER.warning(f"Remote connection lost: {exc!s}")
+
+            reason = exc
+
+        self._closed = True
+
+        # Fail anything still waiting
+        for request_id in list(self._futures):
+            future = self._futures.pop(request_id, None)
+
+            if future is not None and not future.done():
+                future.set_exception(RemoteError(f"Connection closed: {reason!s}"))
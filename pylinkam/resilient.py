@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+import threading
+import typing
+
+from pylinkam import interface, sdk
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ResilientConnection:
+    """ Connection proxy that detects a lost controller connection and reconnects with exponential backoff. The already
+    initialised SDK is reused, static metadata is served from cache and previously written set-points are restored
+    after reconnecting.
+
+    A connection is considered lost when the SDK fails to process a message and a follow-up status request is not
+    processed either, a message misses its deadline, or the controller status reports a communication or stage cable
+    error. A message rejected on a live connection is returned to the caller unchanged. Only read-only and idempotent
+    calls are repeated after reconnecting, other calls such as set-points and trigger pulses raise the original error
+    once the connection has been re-established.
+
+    All methods of SDKWrapper.Connection are available on this object. """
+
+    # Errors that indicate the connection to the controller has been lost
+    _LOST_ERRORS = (sdk.ConnectionLostError, sdk.SDKTimeoutError, sdk.SDKStalledError, sdk.ControllerConnectError)
+
+    # Controller errors that indicate the controller or stage can no longer be reached
+    _LOST_CONTROLLER_ERRORS = frozenset((
+        interface.ControllerErrorCode.COMMS_ERROR,
+        interface.ControllerErrorCode.STAGE_CABLE_DISCONNECTED
+    ))
+
+    # Static metadata that is cached for the lifetime of the proxy
+    _METADATA_METHODS = frozenset((
+        'get_capabilities',
+        'get_controller_config',
+        'get_controller_firmware_version',
+        'get_controller_hardware_version',
+        'get_controller_name',
+        'get_controller_serial',
+        'get_heater_details',
+        'get_humidity_controller_sensor_hardware_version',
+        'get_humidity_controller_sensor_name',
+        'get_humidity_controller_sensor_serial',
+        'get_stage_config',
+        'get_stage_firmware_version',
+        'get_stage_hardware_version',
+        'get_stage_name',
+        'get_stage_serial',
+        'get_value_range'
+    ))
+
+    # Calls that are safe to repeat after reconnecting
+    _RETRY_METHODS = _METADATA_METHODS | frozenset((
+        'get_controller_error',
+        'get_data_rate',
+        'get_humidity_details',
+        'get_program_state',
+        'get_status',
+        'get_value',
+        'get_value_timed',
+        'get_values',
+        'get_values_timed',
+        'set_data_rate'
+    ))
+
+    def __init__(self, wrapper: sdk.SDKWrapper, serial_number: typing.Optional[str] = None,
+                 port: typing.Optional[str] = None, initial_backoff: float = 0.5, max_backoff: float = 30.0,
+                 max_attempts: typing.Optional[int] = None, restore: bool = True):
+        """ Connect to a controller.
+
+        :param wrapper: initialised SDK wrapper
+        :param serial_number: optional serial number of desired instrument when connecting via USB
+        :param port: serial port name, if provided RS-232 is used instead of USB
+        :param initial_backoff: delay before the first reconnection attempt in seconds
+        :param max_backoff: maximum delay between reconnection attempts in seconds
+        :param max_attempts: maximum number of consecutive reconnection attempts, None to retry indefinitely
+        :param restore: if True re-apply set-points and heater/humidity state after reconnecting
+        """
+        self._wrapper = wrapper
+        self._serial_number = serial_number
+        self._port = port
+
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._max_attempts = max_attempts
+        self._restore = restore
+
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+
+        self._metadata: typing.Dict[typing.Tuple[typing.Any, ...], typing.Any] = {}
+        self._setpoints: typing.Dict[interface.StageValueType, typing.Any] = {}
+        self._enabled: typing.Dict[str, bool] = {}
+
+        self._generation = 0
+        self._reconnects = 0
+
+        self._connection: typing.Optional[sdk.SDKWrapper.Connection] = self._connect()
+
+    def __enter__(self) -> ResilientConnection:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getattr__(self, name: str) -> typing.Any:
+        attr = getattr(sdk.SDKWrapper.Connection, name)
+
+        if not callable(attr) or name.startswith('_'):
+            raise AttributeError(name)
+
+        def method(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            return self._call(name, *args, **kwargs)
+
+        method.__name__ = name
+        method.__doc__ = attr.__doc__
+
+        return method
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None
+
+    @property
+    def reconnects(self) -> int:
+        """ Number of successful reconnections. """
+        return self._reconnects
+
+    def close(self) -> None:
+        """ Close connection and stop any reconnection attempt.
+        """
+        self._closed.set()
+
+        with self._lock:
+            self._disconnect()
+
+    def enable_heater(self, enabled: bool) -> None:
+        self._call('enable_heater', enabled)
+        self._enabled['enable_heater'] = enabled
+
+    def enable_humidity(self, enabled: bool) -> None:
+        self._call('enable_humidity', enabled)
+        self._enabled['enable_humidity'] = enabled
+
+    def set_value(self, value_type: interface.StageValueType, n: typing.Any) -> bool:
+        result = self._call('set_value', value_type, n)
+
+        if result:
+            self._setpoints[value_type] = n
+
+        return typing.cast(bool, result)
+
+    def set_values(self, values: typing.Mapping[interface.StageValueType, typing.Any],
+                   *args: typing.Any, **kwargs: typing.Any) -> typing.Dict[interface.StageValueType, bool]:
+        results = self._call('set_values', values, *args, **kwargs)
+
+        for value_type, result in results.items():
+            if result:
+                self._setpoints[value_type] = values[value_type]
+
+        return typing.cast(typing.Dict[interface.StageValueType, bool], results)
+
+    def _call(self, name: str, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        key = (name,) + args + tuple(sorted(kwargs.items()))
+
+        if name in self._METADATA_METHODS and key in self._metadata:
+            return self._metadata[key]
+
+        for retry in (False, True):
+            with self._lock:
+                connection = self._connection
+                generation = self._generation
+
+            try:
+                if connection is None:
+                    raise sdk.ConnectionLostError('Not connected')
+
+                result = getattr(connection, name)(*args, **kwargs)
+
+                if not connection.get_last_processed():
+                    self._check_processed(connection, name)
+
+                if name == 'get_status':
+                    self._check_status(connection, result)
+            except self._LOST_ERRORS as exc:
+                if retry or self._closed.is_set():
+                    raise
+
+                _LOGGER.warning(f"Connection lost during {name}: {exc!s}")
+                self._reconnect(generation)
+
+                # Calls with side effects may already have reached the controller so are never repeated
+                if name not in self._RETRY_METHODS:
+                    raise
+
+                continue
+
+            if name in self._METADATA_METHODS:
+                self._metadata[key] = result
+
+            return result
+
+    def _check_processed(self, connection: sdk.SDKWrapper.Connection, name: str) -> None:
+        # A message may be rejected on a live connection, only a status request that also fails confirms the loss
+        connection.get_status()
+
+        if not connection.get_last_processed():
+            raise sdk.ConnectionLostError(f"SDK did not process {name}, controller connection lost")
+
+    def _check_status(self, connection: sdk.SDKWrapper.Connection, status: interface.ControllerStatus) -> None:
+        if status.flags.controllerError:
+            error = connection.get_controller_error()
+
+            if error in self._LOST_CONTROLLER_ERRORS:
+                raise sdk.ConnectionLostError(f"Controller reported {error.name}")
+
+    def _connect(self) -> sdk.SDKWrapper.Connection:
+        if self._port is not None:
+            connection = self._wrapper.connect_serial(self._port)
+        else:
+            connection = self._wrapper.connect_usb(self._serial_number)
+
+        return connection
+
+    def _disconnect(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except sdk.SDKError:
+                _LOGGER.debug('Error while closing lost connection', exc_info=True)
+
+            self._connection = None
+
+    def _reconnect(self, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                # Another thread already reconnected
+                return
+
+            self._disconnect()
+
+            attempt = 0
+            delay = self._initial_backoff
+
+            while True:
+                if self._closed.is_set():
+                    raise sdk.ControllerConnectError('Connection closed')
+
+                try:
+                    connection = self._connect()
+                    break
+                except (sdk.SDKError, sdk.ControllerConnectError) as exc:
+                    attempt += 1
+
+                    if self._max_attempts is not None and attempt >= self._max_attempts:
+                        raise
+
+                    _LOGGER.info(f"Reconnection attempt {attempt} failed ({exc!s}), retrying in {delay:.1f} s")
+
+                    self._closed.wait(delay)
+                    delay = min(2 * delay, self._max_backoff)
+
+            self._connection = connection
+            self._generation += 1
+            self._reconnects += 1
+
+            self._restore_state(connection)
+
+            _LOGGER.info(f"Reconnected after {attempt + 1} attempt(s)")
+
+    def _restore_state(self, connection: sdk.SDKWrapper.Connection) -> None:
+        # Discard cached metadata if a different controller answered
+        serial_key = ('get_controller_serial',)
+
+        if serial_key in self._metadata and connection.get_controller_serial() != self._metadata[serial_key]:
+            _LOGGER.warning('Controller serial number changed, discarding cached metadata and set-points')
+            self._metadata.clear()
+            self._setpoints.clear()
+            self._enabled.clear()
+            return
+
+        if not self._restore:
+            return
+
+        if len(self._setpoints) > 0:
+            results = connection.set_values(self._setpoints)
+
+            for value_type, result in results.items():
+                if not result:
+                    _LOGGER.warning(f"Failed to restore {value_type.name}")
+
+        for name, enabled in self._enabled.items():
+            getattr(connection, name)(enabled)
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import collections
+import math
+import threading
+import time
+import typing
+
+from pylinkam import interface, poll
+
+
+class Aggregate(typing.NamedTuple):
+    """ Summary of all samples received within a single time bucket. """
+
+    start: float
+    count: int
+    minimum: float
+    mean: float
+    maximum: float
+
+
+# Default tiers as (resolution in seconds, number of buckets retained), 1 s for a day, 1 min for a week and 1 h for a
+# year
+DEFAULT_TIERS: typing.Tuple[typing.Tuple[float, int], ...] = (
+    (1.0, 86400),
+    (60.0, 10080),
+    (3600.0, 8760)
+)
+
+
+class _Tier:
+    """ Fixed resolution min/mean/max downsampler, updated incrementally as samples arrive. """
+
+    def __init__(self, resolution: float, capacity: int):
+        """ Create a new tier.
+
+        :param resolution: bucket width in seconds
+        :param capacity: maximum number of completed buckets to retain
+        """
+        if resolution <= 0:
+            raise ValueError('Tier resolution must be positive')
+
+        self.resolution = resolution
+        self._buckets: typing.Deque[Aggregate] = collections.deque(maxlen=capacity)
+        self.discarded = False
+
+        # Currently open bucket
+        self._start: typing.Optional[float] = None
+        self._count = 0
+        self._total = 0.0
+        self._minimum = math.inf
+        self._maximum = -math.inf
+
+    def _current(self) -> typing.Optional[Aggregate]:
+        if self._start is None:
+            return None
+
+        return Aggregate(self._start, self._count, self._minimum, self._total / self._count, self._maximum)
+
+    def add(self, timestamp: float, value: float) -> None:
+        start = math.floor(timestamp / self.resolution) * self.resolution
+
+        if self._start is not None and start > self._start:
+            # Bucket complete, move to history
+            if len(self._buckets) == self._buckets.maxlen:
+                self.discarded = True
+
+            self._buckets.append(typing.cast(Aggregate, self._current()))
+            self._start = None
+
+        if self._start is None:
+            self._start = start
+            self._count = 0
+            self._total = 0.0
+            self._minimum = math.inf
+            self._maximum = -math.inf
+
+        # Late samples are folded into the open bucket rather than re-opening history
+        self._count += 1
+        self._total += value
+        self._minimum = min(self._minimum, value)
+        self._maximum = max(self._maximum, value)
+
+    @property
+    def oldest(self) -> typing.Optional[float]:
+        if len(self._buckets) > 0:
+            return self._buckets[0].start
+
+        return self._start
+
+    def buckets(self, start: float = -math.inf, end: float = math.inf) -> typing.List[Aggregate]:
+        buckets = [bucket for bucket in self._buckets
+                   if start <= bucket.start + self.resolution and bucket.start <= end]
+
+        current = self._current()
+
+        if current is not None and start <= current.start + self.resolution and current.start <= end:
+            buckets.append(current)
+
+        return buckets
+
+
+class TieredRetention:
+    """ Bounded memory storage for a single series, keeping raw samples for a recent window and min/mean/max
+    aggregates at progressively coarser resolutions for older data. """
+
+    def __init__(self, raw_window: float = 600.0, raw_capacity: typing.Optional[int] = 100000,
+                 tiers: typing.Sequence[typing.Tuple[float, int]] = DEFAULT_TIERS):
+        """ Create new retention store.
+
+        :param raw_window: duration in seconds for which raw samples are retained
+        :param raw_capacity: maximum number of raw samples to retain regardless of window, None for no limit
+        :param tiers: sequence of tuples containing bucket resolution in seconds and number of buckets retained
+        """
+        if raw_capacity is not None and raw_capacity < 1:
+            raise ValueError('Raw capacity must be at least 1, use None for no limit')
+
+        self._raw_window = raw_window
+        self._raw: typing.Deque[typing.Tuple[float, float]] = collections.deque(maxlen=raw_capacity)
+        self._raw_discarded = False
+        self._tiers = [_Tier(resolution, capacity) for resolution, capacity in sorted(tiers)]
+        self._lock = threading.Lock()
+
+    @property
+    def resolutions(self) -> typing.List[float]:
+        return [tier.resolution for tier in self._tiers]
+
+    def append(self, value: typing.Any, timestamp: typing.Optional[float] = None) -> None:
+        """ Add a sample to the store, updating all tiers.
+
+        :param value: numeric value, quantities are stored as their magnitude
+        :param timestamp: sample time in seconds since the epoch, defaults to current time
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        # Strip units if present
+        value = float(getattr(value, 'magnitude', value))
+
+        with self._lock:
+            if len(self._raw) == self._raw.maxlen:
+                self._raw_discarded = True
+
+            self._raw.append((timestamp, value))
+
+            # Expire raw samples outside of window
+            while len(self._raw) > 0 and self._raw[0][0] < timestamp - self._raw_window:
+                self._raw.popleft()
+                self._raw_discarded = True
+
+            for tier in self._tiers:
+                tier.add(timestamp, value)
+
+    def raw(self, start: float = -math.inf, end: float = math.inf) -> typing.List[typing.Tuple[float, float]]:
+        """ Get retained raw samples.
+
+        :param start: earliest timestamp to return
+        :param end: latest timestamp to return
+        :return: list of tuples containing timestamp and value
+        """
+        with self._lock:
+            return [sample for sample in self._raw if start <= sample[0] <= end]
+
+    def tier(self, resolution: float, start: float = -math.inf, end: float = math.inf) -> typing.List[Aggregate]:
+        """ Get aggregates from a specific tier, including the incomplete bucket currently being filled.
+
+        :param resolution: tier resolution in seconds
+        :param start: earliest timestamp to return
+        :param end: latest timestamp to return
+        :return: list of Aggregate
+        """
+        with self._lock:
+            for tier in self._tiers:
+                if tier.resolution == resolution:
+                    return tier.buckets(start, end)
+
+        raise KeyError(f"No tier with resolution {resolution} s")
+
+    def query(self, start: float, end: float = math.inf) -> typing.Tuple[float, typing.List[Aggregate]]:
+        """ Get data for a time span from the finest resolution that still covers the requested start time.
+
+        :param start: earliest timestamp to return
+        :param end: latest timestamp to return
+        :return: tuple containing resolution in seconds (0 for raw samples) and list of Aggregate
+        """
+        with self._lock:
+            # Raw samples are preferred if they reach back far enough or nothing has been discarded yet
+            if len(self._raw) > 0 and (self._raw[0][0] <= start or not self._raw_discarded):
+                return 0.0, [Aggregate(timestamp, 1, value, value, value) for timestamp, value in self._raw
+                             if start <= timestamp <= end]
+
+            for tier in self._tiers:
+                oldest = tier.oldest
+
+                if oldest is not None and (oldest <= start or not tier.discarded):
+                    return tier.resolution, tier.buckets(start, end)
+
+            # Nothing old enough, use coarsest available
+            if len(self._tiers) > 0:
+                return self._tiers[-1].resolution, self._tiers[-1].buckets(start, end)
+
+            return 0.0, []
+
+
+class ChannelRetention:
+    """ Tiered retention for a set of StageValueType channels. Pass publish() as a Poller or Bus callback to retain
+    everything that is polled. """
+
+    def __init__(self, **kwargs: typing.Any):
+        """ Create new multi-channel retention store.
+
+        :param kwargs: arguments passed to TieredRetention for each channel
+        """
+        self._kwargs = kwargs
+        self._channels: typing.Dict[interface.StageValueType, TieredRetention] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, value_type: interface.StageValueType) -> bool:
+        return value_type in self._channels
+
+    def __getitem__(self, value_type: interface.StageValueType) -> TieredRetention:
+        return self._channels[value_type]
+
+    @property
+    def channels(self) -> typing.List[interface.StageValueType]:
+        return list(self._channels.keys())
+
+    def append(self, values: typing.Mapping[interface.StageValueType, typing.Any],
+               timestamp: typing.Optional[float] = None) -> None:
+        """ Add a set of readings taken at the same time.
+
+        :param values: mapping of channel to reading
+        :param timestamp: sample time in seconds since the epoch, defaults to current time
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        for value_type, value in values.items():
+            if value_type not in self._channels:
+                with self._lock:
+                    if value_type not in self._channels:
+                        self._channels[value_type] = TieredRetention(**self._kwargs)
+
+            self._channels[value_type].append(value, timestamp)
+
+    def publish(self, sample: poll.Sample) -> None:
+        """ Add all readings from a polling cycle, channels without a reading are skipped. Can be used directly as a
+        Poller or Bus callback.
+
+        :param sample: poll.Sample to store
+        """
+        self.append({value_type: value for value_type, value in sample.values.items() if value is not None},
+                    sample.timestamp)
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import typing
+
+from pylinkam import acquisition, interface, poll, sdk
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AxisValues(typing.NamedTuple):
+    """ Parameters controlling a single motor axis. """
+
+    position: interface.StageValueType
+    velocity: interface.StageValueType
+    setpoint: interface.StageValueType
+
+
+AXES: typing.Dict[str, AxisValues] = {
+    'x': AxisValues(interface.StageValueType.MOTOR_POS_X, interface.StageValueType.MOTOR_VEL_X,
+                    interface.StageValueType.MOTOR_SETPOINT_X),
+    'y': AxisValues(interface.StageValueType.MOTOR_POS_Y, interface.StageValueType.MOTOR_VEL_Y,
+                    interface.StageValueType.MOTOR_SETPOINT_Y),
+    'z': AxisValues(interface.StageValueType.MOTOR_POS_Z, interface.StageValueType.MOTOR_VEL_Z,
+                    interface.StageValueType.MOTOR_SETPOINT_Z)
+}
+
+
+class ScanError(Exception):
+    pass
+
+
+class _Move(typing.NamedTuple):
+    # Axes commanded to a new set-point, when the set-points were issued and the expected travel time
+    moving: typing.List[str]
+    issued: float
+    travel: float
+
+
+class ScanPoint(typing.NamedTuple):
+    """ Readings captured once the stage settled at a scan point. """
+
+    index: int
+
+    # Requested position of each axis in um
+    target: typing.Dict[str, float]
+
+    # Measured position of each axis in um
+    position: typing.Dict[str, float]
+
+    # Captured channels, read in the same snapshot as the position
+    values: typing.Dict[interface.StageValueType, typing.Any]
+
+    # Wall-clock time of the snapshot
+    timestamp: float
+
+    # Time from issuing the set-points until the stage settled, in seconds
+    settle_time: float
+
+
+def grid(x: typing.Optional[typing.Sequence[float]] = None, y: typing.Optional[typing.Sequence[float]] = None,
+         z: typing.Optional[typing.Sequence[float]] = None,
+         serpentine: bool = True) -> typing.List[typing.Dict[str, float]]:
+    """ Generate raster scan points, x is the fastest axis and z the slowest.
+
+    :param x: x positions in um, None to leave the axis untouched
+    :param y: y positions in um, None to leave the axis untouched
+    :param z: z positions in um, None to leave the axis untouched
+    :param serpentine: if True reverse direction on alternate rows to avoid fly-back moves
+    :return: list of dicts of axis name to position
+    """
+    points: typing.List[typing.Dict[str, float]] = [{}]
+
+    # Expand from the slowest axis so each faster axis sweeps once per point of the slower ones
+    for name, positions in (('z', z), ('y', y), ('x', x)):
+        if positions is None:
+            continue
+
+        expanded = []
+
+        for n, point in enumerate(points):
+            ordered = list(positions)[::-1] if serpentine and n % 2 else positions
+            expanded.extend(dict(point, **{name: float(position)}) for position in ordered)
+
+        points = expanded
+
+    return points if points != [{}] else []
+
+
+class Scanner:
+    """ Visits a sequence of motor positions and captures readings at each once the stage has settled.
+
+    Dead time between points is kept low by: writing all changed set-points in one locked batch, waiting out the
+    expected travel time before polling, only checking settling on the axes that moved, and using the snapshot that
+    confirms settling as the captured reading. The next set-points are issued straight after that snapshot, so storing
+    the result and running the callback overlap with travel to the next point. """
+
+    def __init__(self, connection: sdk.SDKWrapper.Connection, points: typing.Iterable[typing.Mapping[str, float]],
+                 tolerance: float = 1.0, dwell: float = 0.0,
+                 velocity: typing.Optional[typing.Mapping[str, float]] = None,
+                 capture_values: typing.Iterable[interface.StageValueType] = (interface.StageValueType.HEATER1_TEMP,),
+                 poll_period: typing.Optional[float] = None, timeout: typing.Optional[float] = 60.0,
+                 callback: typing.Optional[typing.Callable[[ScanPoint], None]] = None):
+        """ Create new scan, motion does not begin until run() or start() is called.
+
+        :param connection: controller connection
+        :param points: sequence of dicts of axis name ('x', 'y' or 'z') to position in um, see grid()
+        :param tolerance: maximum distance from the set-point in um for an axis to be considered settled
+        :param dwell: time in seconds the moving axes must remain within tolerance before capturing
+        :param velocity: optional dict of axis name to velocity in um/s to configure before scanning
+        :param capture_values: channels to read at each point in addition to axis positions
+        :param poll_period: interval at which positions are checked while settling, rounded to a multiple of the
+        controller data rate, defaults to the controller data rate
+        :param timeout: maximum time in seconds to wait for each point to settle, None to wait indefinitely
+        :param callback: optional callable to receive each ScanPoint as it is captured
+        """
+        self._points = [dict(point) for point in points]
+        self._velocity = dict(velocity or {})
+
+        for point in self._points + [self._velocity]:
+            unknown = set(point) - set(AXES)
+
+            if len(unknown) > 0:
+                raise ValueError(f"Unknown axes {', '.join(sorted(unknown))}")
+
+        self._axes = [name for name in AXES if any(name in point for point in self._points)]
+
+        self._connection = connection
+        self._tolerance = tolerance
+        self._dwell = dwell
+        self._capture_values = tuple(dict.fromkeys(capture_values))
+        self._poll_period = poll_period
+        self._timeout = timeout
+        self._callback = callback
+
+        self._stop = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+        self._results: typing.List[ScanPoint] = []
+        self._error: typing.Optional[BaseException] = None
+
+    def __enter__(self) -> Scanner:
+        self.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def points(self) -> typing.List[typing.Dict[str, float]]:
+        return [dict(point) for point in self._points]
+
+    @property
+    def results(self) -> typing.List[ScanPoint]:
+        """ Points captured so far. """
+        return list(self._results)
+
+    @property
+    def error(self) -> typing.Optional[BaseException]:
+        """ Exception that ended a background scan early, if any. """
+        return self._error
+
+    def run(self) -> typing.List[ScanPoint]:
+        """ Run the scan in the calling thread, motors are stopped when the scan ends.
+
+        :return: list of ScanPoint, shorter than the number of points if stopped early
+        """
+        self._stop.clear()
+
+        return self._run()
+
+    def _run(self) -> typing.List[ScanPoint]:
+        self._results = []
+        self._error = None
+
+        try:
+            period, speeds = self._prepare()
+            previous: typing.Dict[str, float] = {}
+
+            move: typing.Optional[_Move] = None
+
+            for index, target in enumerate(self._points):
+                if move is None:
+                    move = self._move(index, previous, speeds)
+
+                point = self._settle(index, target, move, period)
+
+                if point is None:
+                    break
+
+                previous.update(target)
+
+                # Start moving to the next point before storing this one and running the callback
+                move = self._move(index + 1, previous, speeds) if index + 1 < len(self._points) else None
+
+                self._results.append(point)
+                self._notify(point)
+        finally:
+            self._connection.enable_motors(False)
+
+        return self.results
+
+    def start(self) -> None:
+        """ Run the scan in a background thread. """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_background, name='pylinkam-scan', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: typing.Optional[float] = None) -> None:
+        """ Stop scanning after the current point.
+
+        :param timeout: maximum time to wait for the scan thread to exit
+        """
+        self._stop.set()
+        self.join(timeout)
+
+    def join(self, timeout: typing.Optional[float] = None) -> None:
+        """ Wait for a background scan to finish.
+
+        :param timeout: maximum time to wait for the scan thread to exit
+        """
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+            if not self._thread.is_alive():
+                self._thread = None
+
+    def _run_background(self) -> None:
+        try:
+            self._run()
+        except Exception as ex:
+            _LOGGER.exception('Scan ended with error')
+            self._error = ex
+
+    def _prepare(self) -> typing.Tuple[float, typing.Dict[str, float]]:
+        # Configure velocities and read back what the controller will use to estimate travel time
+        if len(self._velocity) > 0:
+            results = self._connection.set_values({AXES[name].velocity: speed
+                                                   for name, speed in self._velocity.items()})
+            failed = [value_type.name for value_type, result in results.items() if not result]
+
+            if len(failed) > 0:
+                raise ScanError(f"Failed to set {', '.join(failed)}")
+
+        velocities = self._connection.get_values([AXES[name].velocity for name in self._axes])
+        speeds = {name: abs(acquisition.magnitude(velocities[AXES[name].velocity])) for name in self._axes}
+
+        try:
+            interval: typing.Optional[float] = self._connection.get_data_rate() / 1000
+        except sdk.SDKError:
+            _LOGGER.warning('Unable to read controller data rate', exc_info=True)
+            interval = None
+
+        period = poll.align_period(self._poll_period, interval)
+
+        self._connection.enable_motors(True)
+
+        return period, speeds
+
+    def _move(self, index: int, previous: typing.Dict[str, float], speeds: typing.Dict[str, float]) -> _Move:
+        target = self._points[index]
+
+        # Axes whose set-point is unchanged from the previous point are not waited on
+        moving = [name for name in target if target[name] != previous.get(name)]
+
+        issued = time.monotonic()
+        travel = 0.0
+
+        if len(moving) > 0:
+            results = self._connection.set_values({AXES[name].setpoint: target[name] for name in moving}, verify=False)
+            failed = [value_type.name for value_type, result in results.items() if not result]
+
+            if len(failed) > 0:
+                raise ScanError(f"Failed to set {', '.join(failed)} for point {index}")
+
+            travel = max((abs(target[name] - previous[name]) / speeds[name] for name in moving
+                          if name in previous and speeds.get(name, 0) > 0), default=0.0)
+
+        return _Move(moving, issued, travel)
+
+    def _settle(self, index: int, target: typing.Dict[str, float], move: _Move,
+                period: float) -> typing.Optional[ScanPoint]:
+        moving = move.moving
+        issued = move.issued
+
+        if len(moving) > 0:
+            # Skip polling for most of the expected travel, leaving one poll period of margin
+            if self._stop.wait(max(0.0, issued + move.travel - period - time.monotonic())):
+                return None
+
+        value_types = [AXES[name].position for name in self._axes] + list(self._capture_values)
+        settled_since: typing.Optional[float] = None
+
+        while True:
+            readings = self._connection.get_values_timed(value_types)
+            now = time.monotonic()
+
+            measured = {name: acquisition.magnitude(readings[AXES[name].position].value) for name in self._axes}
+
+            if all(abs(measured[name] - target[name]) <= self._tolerance for name in moving):
+                if settled_since is None:
+                    settled_since = now
+
+                if now - settled_since >= self._dwell:
+                    break
+            else:
+                settled_since = None
+
+            if self._timeout is not None and now - issued > self._timeout:
+                raise ScanError(f"Point {index} did not settle within {self._timeout} s")
+
+            if self._stop.wait(period):
+                return None
+
+        reference = readings[value_types[0]]
+
+        return ScanPoint(
+            index,
+            dict(target),
+            measured,
+            {value_type: readings[value_type].value for value_type in self._capture_values},
+            reference.timestamp,
+            reference.monotonic - issued
+        )
+
+    def _notify(self, point: ScanPoint) -> None:
+        if self._callback is not None:
+            try:
+                self._callback(point)
+            except Exception:
+                _LOGGER.exception('Unhandled exception in scan callback')
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import enum
+import heapq
+import itertools
+import threading
+import time
+import typing
+from contextlib import contextmanager
+
+from pylinkam import interface
+
+
+class Priority(enum.IntEnum):
+    """ SDK access priority classes, lower values are served first. """
+
+    SAFETY = 0
+    CONTROL = 1
+    NORMAL = 2
+    BACKGROUND = 3
+
+
+# Messages that actuate hardware are served ahead of reads
+_CONTROL_PREFIXES = ('START_', 'SET_', 'FORCE_', 'SEND_', 'APPLY_', 'SAVE_', 'INITIALISE_', 'LNP_SET_', 'TST_', 'CSS_')
+
+CONTROL_MESSAGES: typing.FrozenSet[interface.Message] = frozenset(
+    message for message in interface.Message if message.name.startswith(_CONTROL_PREFIXES)
+)
+
+
+class QueueStatistics(typing.NamedTuple):
+    """ Time spent waiting for SDK access by a single priority class. """
+
+    count: int
+    total_delay: float
+    max_delay: float
+
+    @property
+    def mean_delay(self) -> float:
+        return self.total_delay / self.count if self.count > 0 else 0.0
+
+
+class PriorityLock:
+    """ Re-entrant lock that grants access to waiting threads in priority order, then in order of arrival. Can be used
+    as a drop-in replacement for threading.RLock, in which case the calling thread's default priority is used. """
+
+    def __init__(self) -> None:
+        self._state_lock = threading.Lock()
+
+        self._owner: typing.Optional[int] = None
+        self._depth = 0
+
+        self._waiters: typing.List[typing.Tuple[int, int, int, threading.Event]] = []
+        self._sequence = itertools.count()
+
+        self._local = threading.local()
+
+        self._statistics: typing.Dict[Priority, typing.List[float]] = {}
+
+    def __enter__(self) -> PriorityLock:
+        self.acquire()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    @property
+    def default_priority(self) -> Priority:
+        """ Priority used by the current thread when none is specified. """
+        return getattr(self._local, 'priority', Priority.NORMAL)
+
+    @contextmanager
+    def priority(self, priority: Priority) -> typing.Generator[None, None, None]:
+        """ Change default priority for the current thread within a context.
+
+        :param priority: new default priority
+        """
+        previous = self.default_priority
+        self._local.priority = priority
+
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    @contextmanager
+    def hold(self, priority: typing.Optional[Priority] = None) -> typing.Generator[None, None, None]:
+        """ Acquire lock within a context using a specific priority.
+
+        :param priority: access priority, defaults to the current thread default
+        """
+        self.acquire(priority)
+
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, priority: typing.Optional[Priority] = None) -> None:
+        """ Acquire lock, blocking until all waiting threads of equal or higher priority have been served.
+
+        :param priority: access priority, defaults to the current thread default
+        """
+        ident = threading.get_ident()
+
+        if priority is None:
+            priority = self.default_priority
+
+        with self._state_lock:
+            if self._owner == ident:
+                self._depth += 1
+                return
+
+            start = time.monotonic()
+
+            if self._owner is None and len(self._waiters) == 0:
+                self._owner = ident
+                self._depth = 1
+                self._record(priority, 0.0)
+                return
+
+            event = threading.Event()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), ident, event))
+
+        # Ownership is transferred by the releasing thread before the event is set
+        event.wait()
+
+        with self._state_lock:
+            self._record(priority, time.monotonic() - start)
+
+    def release(self) -> None:
+        """ Release lock, handing it to the highest priority waiting thread if any. """
+        with self._state_lock:
+            if self._owner != threading.get_ident():
+                raise RuntimeError('Cannot release un-acquired lock')
+
+            self._depth -= 1
+
+            if self._depth > 0:
+                return
+
+            if len(self._waiters) > 0:
+                _, _, ident, event = heapq.heappop(self._waiters)
+                self._owner = ident
+                self._depth = 1
+                event.set()
+            else:
+                self._owner = None
+
+    def _record(self, priority: Priority, delay: float) -> None:
+        entry = self._statistics.setdefault(Priority(priority), [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += delay
+        entry[2] = max(entry[2], delay)
+
+    def get_statistics(self) -> typing.Dict[Priority, QueueStatistics]:
+        """ Get queueing delay for each priority class.
+
+        :return: dict of priority to QueueStatistics
+        """
+        with self._state_lock:
+            return {priority: QueueStatistics(int(entry[0]), entry[1], entry[2])
+                    for priority, entry in sorted(self._statistics.items())}
+
+    def reset_statistics(self) -> None:
+        with self._state_lock:
+            self._statistics.clear()
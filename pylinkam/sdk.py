@@ -3,37 +3,176 @@ from __future__ import annotations
 
 import ctypes
 import logging
+import math
 import os
 import threading
+import time
 import typing
-from contextlib import contextmanager
-from types import ModuleType
+from contextlib import contextmanager, nullcontext
 
-# Try and use pint for units if available
-try:
-    # noinspection PyPackageRequirements
-    import pint
-except ImportError:
-    pint: typing.Optional[ModuleType] = None
+from pylinkam import (capabilities, interface, scheduler, supervisor, timing,
+                      util)
 
-from pylinkam import interface, util
+if typing.TYPE_CHECKING:
+    import concurrent.futures
 
 _LOGGER = logging.getLogger(__name__)
 
 
-# Locate SDK files and add to system path
+# Locate SDK files, added to system path when the library is first loaded
 SDK_PATH = os.path.dirname(os.path.abspath(__file__))
-util.add_path(SDK_PATH)
+
+# Binary name that selects the simulated controller in place of the Linkam SDK
+SIMULATOR_BIN_NAME = 'simulator'
 
 
 class SDKError(Exception):
     pass
 
 
+class SDKTimeoutError(SDKError):
+    pass
+
+
+class SDKStalledError(SDKError):
+    pass
+
+
+class ConnectionLostError(SDKError):
+    pass
+
+
 class ControllerConnectError(Exception):
     pass
 
 
+class _SharedLibrary:
+    """ Native SDK library, loaded and initialised once per process and shared by all SDKWrapper instances using the
+    same binary. Access to the library is serialised by a single lock regardless of the number of wrappers. """
+
+    _libraries: typing.ClassVar[typing.Dict[typing.Tuple[str, str], _SharedLibrary]] = {}
+    _libraries_lock: typing.ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, key: typing.Tuple[str, str], sdk: ctypes.CDLL, log_path: str, license_path: str):
+        self.key = key
+        self.sdk = sdk
+        self.log_path = log_path
+        self.license_path = license_path
+
+        self.lock = scheduler.PriorityLock()
+        self.supervisor = supervisor.CallSupervisor()
+
+        self.references = 0
+
+    @classmethod
+    def acquire(cls, root_path: str, bin_name: str, log_path: str,
+                license_path: str) -> typing.Tuple[_SharedLibrary, bool]:
+        """ Get a reference to a shared library, loading and initialising it if required.
+
+        :param root_path: search path for SDK binary files
+        :param bin_name: SDK binary name
+        :param log_path: path for SDK logging, only used when the library is first initialised
+        :param license_path: path for SDK license file, only used when the library is first initialised
+        :return: tuple containing library and True if the library was initialised by this call
+        """
+        key = (root_path, bin_name)
+
+        with cls._libraries_lock:
+            library = cls._libraries.get(key)
+            created = library is None
+
+            if library is None:
+                library = cls(key, cls._load(root_path, bin_name, log_path, license_path), log_path, license_path)
+                cls._libraries[key] = library
+            elif (log_path, license_path) != (library.log_path, library.license_path):
+                _LOGGER.warning('Linkam SDK already initialised with different log/license paths, existing paths '
+                                'will be used')
+
+            library.references += 1
+
+        return library, created
+
+    @classmethod
+    def get_libraries(cls) -> typing.List[_SharedLibrary]:
+        with cls._libraries_lock:
+            return list(cls._libraries.values())
+
+    def release(self) -> None:
+        """ Release a reference to the library, the SDK is cleaned up when the last reference is released.
+        """
+        # Exit with the registry locked so a concurrent acquire cannot initialise the library again until it is done
+        with self._libraries_lock:
+            self.references -= 1
+
+            if self.references > 0:
+                return
+
+            if self._libraries.get(self.key) is self:
+                del self._libraries[self.key]
+
+            self.sdk.linkamExitSDK()
+
+        _LOGGER.debug('Cleaned up SDK')
+
+    @staticmethod
+    def _load(root_path: str, bin_name: str, log_path: str, license_path: str) -> ctypes.CDLL:
+        if bin_name == SIMULATOR_BIN_NAME:
+            from pylinkam import simulator
+
+            return typing.cast(ctypes.CDLL, simulator.SimulatedSDK())
+
+        if SDK_PATH not in os.environ.get('PATH', '').split(os.pathsep):
+            util.add_path(SDK_PATH)
+
+        if os.name == 'nt':
+            loader: typing.Type[ctypes.CDLL] = ctypes.WinDLL
+        else:
+            loader = ctypes.CDLL
+
+        try:
+            sdk = loader(bin_name)
+        except FileNotFoundError:
+            # Re-attempt as an absolute path
+            sdk = loader(os.path.join(root_path, bin_name))
+
+        if sdk is None:
+            raise SDKError('Linkam SDK was not loaded')
+
+        # Provide type hints/restrictions
+        sdk.linkamInitialiseSDK.argtypes = (ctypes.c_char_p, ctypes.c_char_p, ctypes.c_bool)
+        sdk.linkamInitialiseSDK.restype = ctypes.c_bool
+
+        sdk.linkamExitSDK.argtypes = ()
+        sdk.linkamExitSDK.restype = None
+
+        sdk.linkamInitialiseSerialCommsInfo.argtypes = (
+            ctypes.POINTER(interface.CommsInfo), ctypes.c_char_p
+        )
+        sdk.linkamInitialiseSerialCommsInfo.restype = None
+
+        sdk.linkamInitialiseUSBCommsInfo.argtypes = (
+            ctypes.POINTER(interface.CommsInfo), ctypes.c_char_p
+        )
+        sdk.linkamInitialiseUSBCommsInfo.restype = None
+
+        sdk.linkamGetVersion.argtypes = (
+            ctypes.c_char_p, ctypes.c_uint64
+        )
+        sdk.linkamGetVersion.restype = ctypes.c_bool
+
+        sdk.linkamProcessMessage.argtypes = (
+            ctypes.c_int32, interface.CommsHandle, ctypes.POINTER(interface.Variant), interface.Variant,
+            interface.Variant, interface.Variant
+        )
+        sdk.linkamProcessMessage.restype = ctypes.c_bool
+
+        # Initialise SDK
+        if not sdk.linkamInitialiseSDK(log_path.encode(), license_path.encode(), False):
+            raise SDKError(f"Failed to initialize Linkam SDK, check {log_path} for details")
+
+        return sdk
+
+
 class SDKWrapper:
     """ Wrapper for Linkam SDK. """
 
@@ -57,6 +196,8 @@ class SDKWrapper:
             self._parent = parent
             self._handle: typing.Optional[interface.CommsHandle] = handle
 
+            self._capabilities: typing.Optional[capabilities.Capabilities] = None
+
         def __del__(self) -> None:
             self.close()
 
@@ -68,6 +209,20 @@ class SDKWrapper:
                 self._parent.process_message(interface.Message.CLOSE_COMMS, comm_handle=self._handle)
                 self._handle = None
 
+        def priority(self, priority: scheduler.Priority) -> typing.ContextManager[None]:
+            """ Change default SDK access priority for calls made by the current thread within a context.
+
+            :param priority: new default priority
+            :return: context manager
+            """
+            return self._parent.priority(priority)
+
+        @property
+        def stalled(self) -> bool:
+            """ True if an SDK message on this connection has exceeded its deadline and not yet returned, further
+            messages on the connection are refused until it does. Other connections are not affected. """
+            return self._handle is not None and self._parent._supervisor.is_stalled(self._handle.value)
+
         def enable_heater(self, enabled: bool) -> None:
             """ Enable/disable the temperature controller.
 
@@ -76,7 +231,8 @@ class SDKWrapper:
             self._parent.process_message(
                 interface.Message.START_HEATING,
                 ('vBoolean', enabled),
-                comm_handle=self._handle
+                comm_handle=self._handle,
+                priority=None if enabled else scheduler.Priority.SAFETY
             )
 
         def enable_humidity(self, enabled: bool) -> None:
@@ -87,9 +243,45 @@ class SDKWrapper:
             self._parent.process_message(
                 interface.Message.START_HUMIDITY,
                 ('vBoolean', enabled),
-                comm_handle=self._handle
+                comm_handle=self._handle,
+                priority=None if enabled else scheduler.Priority.SAFETY
+            )
+
+        def enable_motors(self, enabled: bool) -> None:
+            """ Enable/disable stage motors, enabled motors move towards their set-points.
+
+            :param enabled: if True start motors, otherwise stop motors
+            """
+            self._parent.process_message(
+                interface.Message.START_MOTORS,
+                ('vBoolean', enabled),
+                comm_handle=self._handle,
+                priority=None if enabled else scheduler.Priority.SAFETY
             )
 
+        def enable_trigger_signal(self, signal: interface.TriggerSignal, enabled: bool) -> None:
+            """ Enable/disable a controller trigger output.
+
+            :param signal: trigger output
+            :param enabled: if True enable trigger output, otherwise disable it
+            """
+            message = interface.Message.SET_CONTROLLER_TRIGGER_SIGNAL_ENABLE if enabled else \
+                interface.Message.SET_CONTROLLER_TRIGGER_SIGNAL_DISABLE
+
+            if not self._parent.process_message(message, ('vUint32', signal.value), comm_handle=self._handle):
+                raise SDKError(f"Unable to {'enable' if enabled else 'disable'} trigger signal {signal.name}")
+
+        def get_capabilities(self) -> capabilities.Capabilities:
+            """ Determine features and values supported by the attached controller and stage. Configuration is only read
+            once per connection.
+
+            :return: capabilities.Capabilities
+            """
+            if self._capabilities is None:
+                self._capabilities = capabilities.Capabilities(self.get_controller_config(), self.get_stage_config())
+
+            return self._capabilities
+
         def get_controller_config(self) -> interface.ControllerConfig:
             """ Fetch controller configuration/metadata.
 
@@ -100,6 +292,16 @@ class SDKWrapper:
                 comm_handle=self._handle
             ))
 
+        def get_controller_error(self) -> interface.ControllerErrorCode:
+            """ Get the error currently reported by the controller.
+
+            :return: interface.ControllerErrorCode, NONE if there is no error
+            """
+            return interface.ControllerErrorCode(self._parent.process_message(
+                interface.Message.GET_CONTROLLER_ERROR,
+                comm_handle=self._handle
+            ))
+
         def get_controller_firmware_version(self) -> str:
             """ Get controller firmware version.
 
@@ -144,6 +346,16 @@ class SDKWrapper:
                 self._handle
             )
 
+        def get_data_rate(self) -> int:
+            """ Get interval at which the controller updates readings.
+
+            :return: int interval in milliseconds
+            """
+            return int(self._parent.process_message(
+                interface.Message.GET_DATA_RATE,
+                comm_handle=self._handle
+            ))
+
         def get_heater_details(self, channel: int = 0) -> interface.HeaterDetails:
             """ Get temperature controller characteristics.
 
@@ -208,6 +420,20 @@ class SDKWrapper:
 
             return detail
 
+        def get_last_timing(self) -> typing.Optional[timing.Timing]:
+            """ Get timing of the most recent SDK message processed by the current thread.
+
+            :return: timing.Timing, None if no message has been processed
+            """
+            return self._parent.get_last_timing()
+
+        def get_last_processed(self) -> bool:
+            """ Check if the SDK processed the most recent message sent by the current thread.
+
+            :return: False if the message was not processed, True otherwise
+            """
+            return self._parent.get_last_processed()
+
         def get_program_state(self) -> interface.Running:
             """ Get controller state.
 
@@ -290,7 +516,11 @@ class SDKWrapper:
             assert value_type.variant_field is not None
 
             # Get variant field
-            value = getattr(value, value_type.variant_field)
+            return self._wrap_value(value_type, getattr(value, value_type.variant_field))
+
+        @staticmethod
+        def _wrap_value(value_type: interface.StageValueType, value: typing.Any) -> typing.Any:
+            pint = util.get_pint()
 
             # If unit is available, then encapsulate it
             if pint is not None and value_type.unit is not None:
@@ -306,6 +536,75 @@ class SDKWrapper:
             """
             return self._get_value_msg(interface.Message.GET_VALUE, value_type)
 
+        def get_value_timed(self, value_type: interface.StageValueType) -> timing.Reading:
+            """ Read parameter from Linkam controller/stage along with the time it was sampled.
+
+            :param value_type: parameter to read
+            :return: timing.Reading
+            """
+            value = self.get_value(value_type)
+
+            return timing.Reading.from_timing(value, typing.cast(timing.Timing, self.get_last_timing()))
+
+        def get_values(self, value_types: typing.Iterable[interface.StageValueType], prune: bool = False) \
+                -> typing.Dict[interface.StageValueType, typing.Any]:
+            """ Read several parameters from Linkam controller/stage as a single snapshot.
+
+            Where two or more of the requested parameters are also reported by a composite message (humidity unit data
+            or program state) the composite message is used in place of individual reads.
+
+            :param value_types: parameters to read
+            :param prune: if True silently skip parameters not supported by the attached hardware
+            :return: dict of parameter to value, types vary
+            """
+            readings = self.get_values_timed(value_types, prune)
+
+            return {value_type: reading.value for value_type, reading in readings.items()}
+
+        def get_values_timed(self, value_types: typing.Iterable[interface.StageValueType], prune: bool = False) \
+                -> typing.Dict[interface.StageValueType, timing.Reading]:
+            """ Read several parameters from Linkam controller/stage as a single snapshot, along with the time each was
+            sampled. Parameters read using a composite message share its timing.
+
+            :param value_types: parameters to read
+            :param prune: if True silently skip parameters not supported by the attached hardware
+            :return: dict of parameter to timing.Reading
+            """
+            remaining = list(dict.fromkeys(value_types))
+
+            if prune:
+                remaining = self.get_capabilities().prune(remaining)
+
+            values: typing.Dict[interface.StageValueType, timing.Reading] = {}
+
+            composite_reads: typing.Tuple[typing.Tuple[typing.Mapping[interface.StageValueType, str],
+                                                       typing.Callable[[], typing.Any]], ...] = (
+                (interface.RH_UNIT_VALUES, self.get_humidity_details),
+                (interface.RUNNING_VALUES, self.get_program_state)
+            )
+
+            with self._parent._sdk_lock:
+                for fields, read in composite_reads:
+                    covered = [value_type for value_type in remaining if value_type in fields]
+
+                    if len(covered) < 2:
+                        continue
+
+                    struct = read()
+                    read_timing = typing.cast(timing.Timing, self.get_last_timing())
+
+                    for value_type in covered:
+                        values[value_type] = timing.Reading.from_timing(
+                            self._wrap_value(value_type, getattr(struct, fields[value_type])),
+                            read_timing
+                        )
+                        remaining.remove(value_type)
+
+                for value_type in remaining:
+                    values[value_type] = self.get_value_timed(value_type)
+
+            return values
+
         def get_value_range(self, value_type: interface.StageValueType) -> typing.Tuple[typing.Any, typing.Any]:
             """ Read allowable range from Linkam controller/stage.
 
@@ -315,39 +614,140 @@ class SDKWrapper:
             return self._get_value_msg(interface.Message.GET_MIN_VALUE, value_type),\
                 self._get_value_msg(interface.Message.GET_MAX_VALUE, value_type)
 
-        def set_value(self, value_type: interface.StageValueType, n: typing.Any) -> bool:
+        def initialise_trigger_pulse(self, signal: interface.TriggerSignal) -> None:
+            """ Prepare a trigger output for pulse generation.
+
+            :param signal: trigger output
             """
+            if not self._parent.process_message(interface.Message.INITIALISE_TRIGGER_SIGNAL_PULSE,
+                                                ('vUint32', signal.value), comm_handle=self._handle):
+                raise SDKError(f"Unable to initialise trigger signal {signal.name}")
 
-            :param value_type:
-            :param n:
-            :return:
+        def send_dsc_values(self, message: interface.Message) -> None:
+            """ Apply DSC configuration previously written with set_value, for example SEND_DSC_GAIN_VALUES after
+            setting DSC_GAIN1 to DSC_GAIN3.
+
+            :param message: one of the SEND_DSC_* messages
+            """
+            if not message.name.startswith('SEND_DSC_'):
+                raise ValueError(f"{message.name} is not a DSC configuration message")
+
+            if not self._parent.process_message(message, comm_handle=self._handle):
+                raise SDKError(f"Unable to apply DSC configuration with {message.name}")
+
+        def send_trigger_pulse(self, signal: interface.TriggerSignal) -> None:
+            """ Generate a single pulse on a trigger output, the pulse width is set by the TRIGGER_SIGNAL_PULSE_WIDTH
+            value.
+
+            :param signal: trigger output
             """
+            if not self._parent.process_message(interface.Message.SET_TRIGGER_SIGNAL_PULSE,
+                                                ('vUint32', signal.value), comm_handle=self._handle):
+                raise SDKError(f"Unable to pulse trigger signal {signal.name}")
+
+        def set_data_rate(self, interval: int) -> bool:
+            """ Set interval at which the controller updates readings.
+
+            :param interval: interval in milliseconds
+            :return: True if accepted by the controller
+            """
+            return bool(self._parent.process_message(
+                interface.Message.SET_DATA_RATE,
+                ('vUint32', interval),
+                comm_handle=self._handle
+            ))
+
+        @staticmethod
+        def _unwrap_value(value_type: interface.StageValueType, n: typing.Any) -> typing.Any:
+            pint = util.get_pint()
+
+            # Convert quantities to the units expected by the controller
             if pint is not None and isinstance(n, pint.Quantity):
                 if value_type.unit is not None:
-                    n = n.m_as(value_type.unit)
+                    return n.m_as(value_type.unit)
                 else:
-                    n = n.magnitude
+                    return n.magnitude
+
+            return n
+
+        def set_value(self, value_type: interface.StageValueType, n: typing.Any) -> bool:
+            """
 
+            :param value_type:
+            :param n:
+            :return:
+            """
             return bool(self._parent.process_message(
                 interface.Message.SET_VALUE,
                 ('vStageValueType', value_type.value),
-                (value_type.variant_field, n),
+                (value_type.variant_field, self._unwrap_value(value_type, n)),
                 comm_handle=self._handle
             ))
 
+        def set_values(self, values: typing.Mapping[interface.StageValueType, typing.Any], verify: bool = True,
+                       tolerance: float = 1e-3) -> typing.Dict[interface.StageValueType, bool]:
+            """ Write several parameters to Linkam controller/stage without other threads interleaving, then optionally
+            confirm the new values with a single snapshot read.
+
+            :param values: mapping of parameter to new value
+            :param verify: if True read back all accepted values and compare against those written
+            :param tolerance: absolute tolerance used when comparing floating point values
+            :return: dict of parameter to True if write succeeded (and was verified), otherwise False
+            :raises TypeError: if a value is not compatible with its parameter, nothing is written
+            :raises SDKError: if the SDK fails part way through, values written before the failure remain applied
+            """
+            results: typing.Dict[interface.StageValueType, bool] = {}
+
+            # Convert every value before writing so that invalid input cannot leave a partially applied batch
+            converted = {value_type: self._unwrap_value(value_type, n) for value_type, n in values.items()}
+
+            with self._parent._sdk_lock.hold(scheduler.Priority.CONTROL):
+                for value_type, n in converted.items():
+                    results[value_type] = self.set_value(value_type, n)
+
+                if verify:
+                    accepted = [value_type for value_type, result in results.items() if result]
+                    read_back = self.get_values(accepted)
+
+                    for value_type in accepted:
+                        expected = converted[value_type]
+                        actual = self._unwrap_value(value_type, read_back[value_type])
+
+                        if isinstance(expected, float) or isinstance(actual, float):
+                            results[value_type] = math.isclose(expected, actual, abs_tol=tolerance)
+                        else:
+                            results[value_type] = expected == actual
+
+            failed = [value_type.name for value_type, result in results.items() if not result]
+
+            if len(failed) > 0:
+                _LOGGER.warning(f"Failed to set {', '.join(failed)}")
+
+            return results
+
     def __init__(self, sdk_root_path: typing.Optional[str] = None, sdk_bin_name: typing.Optional[str] = None,
-                 sdk_log_path: typing.Optional[str] = None, sdk_license_path: typing.Optional[str] = None):
+                 sdk_log_path: typing.Optional[str] = None, sdk_license_path: typing.Optional[str] = None,
+                 call_timeout: typing.Optional[float] = None):
         """ Initialise the SDK, loading the required binary files.
 
         :param sdk_root_path: search path for SDK binary files, defaults to module directory
-        :param sdk_bin_name: SDK binary name (on Windows remove .dll extension), defaults to platform-dependant name
+        :param sdk_bin_name: SDK binary name (on Windows remove .dll extension), defaults to platform-dependant name,
+        use SIMULATOR_BIN_NAME for a simulated controller
         :param sdk_log_path: path for SDK logging, defaults to SDK directory
         :param sdk_license_path: path for SDL license file, defaults to SDK directory
+        :param call_timeout: default deadline in seconds for SDK messages, defaults to no deadline
         """
         self._sdk_root_path = sdk_root_path or self._DEFAULT_SDK_ROOT_PATH
 
-        self._sdk: typing.Optional[ctypes.CDLL] = None
-        self._sdk_lock = threading.RLock()
+        self._library: typing.Optional[_SharedLibrary] = None
+        self._library_lock = threading.RLock()
+
+        self._comms_info: typing.Dict[typing.Tuple[str, typing.Optional[str]], interface.CommsInfo] = {}
+
+        self._call_timeout = call_timeout
+
+        # Timing of the most recent message processed by each thread
+        self._timing = threading.local()
 
         # Setup DLL name and paths
         if sdk_bin_name is None:
@@ -368,74 +768,85 @@ class SDKWrapper:
     def open(self) -> None:
         """ Ensure the SDK is initialised for use.
         """
-        _ = self._sdk
+        self._get_library()
 
     def close(self) -> None:
-        if hasattr(self, '_sdk') and self._sdk is not None:
-            self._sdk.linkamExitSDK()
-            _LOGGER.debug('Cleaned up SDK')
+        """ Release this wrapper's reference to the SDK, the SDK is only cleaned up once all wrappers using the same
+        library are closed.
+        """
+        if hasattr(self, '_library') and self._library is not None:
+            self._library.release()
 
-        self._sdk = None
+        self._library = None
 
     @property
     def sdk(self) -> ctypes.CDLL:
-        if self._sdk is None:
-            if os.name == 'nt':
-                loader: typing.Type[ctypes.CDLL] = ctypes.WinDLL
-            else:
-                loader = ctypes.CDLL
+        return self._get_library().sdk
 
-            try:
-                sdk = loader(self.sdk_bin_name)
-            except FileNotFoundError:
-                # Re-attempt as an absolute path
-                sdk = loader(os.path.join(self.sdk_root_path, self.sdk_bin_name))
+    @property
+    def _sdk_lock(self) -> scheduler.PriorityLock:
+        return self._get_library().lock
 
-            if sdk is None:
-                raise SDKError('Linkam SDK was not loaded')
+    @property
+    def _supervisor(self) -> supervisor.CallSupervisor:
+        return self._get_library().supervisor
 
-            # Provide type hints/restrictions
-            sdk.linkamInitialiseSDK.argtypes = (ctypes.c_char_p, ctypes.c_char_p, ctypes.c_bool)
-            sdk.linkamInitialiseSDK.restype = ctypes.c_bool
+    def _get_library(self) -> _SharedLibrary:
+        library = self._library
 
-            sdk.linkamExitSDK.argtypes = ()
-            sdk.linkamExitSDK.restype = None
+        if library is None:
+            with self._library_lock:
+                # Another thread may have completed initialisation while waiting
+                if self._library is None:
+                    library, created = _SharedLibrary.acquire(self.sdk_root_path, self.sdk_bin_name,
+                                                              self.sdk_log_path, self.sdk_license_path)
+                    self._library = library
 
-            sdk.linkamInitialiseSerialCommsInfo.argtypes = (
-                ctypes.POINTER(interface.CommsInfo), ctypes.c_char_p
-            )
-            sdk.linkamInitialiseSerialCommsInfo.restype = None
+                    if created:
+                        # Configure default logging
+                        self.set_logging_level(interface.LoggingLevel.MINIMAL)
 
-            sdk.linkamInitialiseUSBCommsInfo.argtypes = (
-                ctypes.POINTER(interface.CommsInfo), ctypes.c_char_p
-            )
-            sdk.linkamInitialiseUSBCommsInfo.restype = None
+                        _LOGGER.info(f"Initialized Linkam SDK {self.get_version()}")
 
-            sdk.linkamGetVersion.argtypes = (
-                ctypes.c_char_p, ctypes.c_uint64
-            )
-            sdk.linkamGetVersion.restype = ctypes.c_bool
+                library = self._library
 
-            sdk.linkamProcessMessage.argtypes = (
-                ctypes.c_int32, interface.CommsHandle, ctypes.POINTER(interface.Variant), interface.Variant,
-                interface.Variant, interface.Variant
-            )
-            sdk.linkamProcessMessage.restype = ctypes.c_bool
+        return typing.cast(_SharedLibrary, library)
 
-            # Initialise SDK
-            if not sdk.linkamInitialiseSDK(self.sdk_log_path.encode(), self.sdk_license_path.encode(), False):
-                raise SDKError(f"Failed to initialize Linkam SDK, check {self._sdk_log_path} for details")
+    def preload(self, serial_numbers: typing.Sequence[typing.Optional[str]] = (None,),
+                ports: typing.Sequence[str] = ()) -> concurrent.futures.Future:
+        """ Initialise the SDK and prepare connection information for devices on a background thread, so that later
+        calls to connect() do not have to wait for library loading.
+
+        :param serial_numbers: USB serial numbers to prepare, None for the default device
+        :param ports: serial ports to prepare
+        :return: Future that completes when preloading is finished
+        """
+        # Imported on first use, concurrent.futures accounts for a large part of the module import time
+        import concurrent.futures
+
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def run() -> None:
+            if not future.set_running_or_notify_cancel():
+                return
+
+            try:
+                self._get_library()
 
-            # Save handle
-            with self._sdk_lock:
-                self._sdk = sdk
+                for serial_number in serial_numbers:
+                    self.get_usb_comms_info(serial_number)
 
-            # Configure default logging
-            self.set_logging_level(interface.LoggingLevel.MINIMAL)
+                for port in ports:
+                    self.get_serial_comms_info(port)
+            except BaseException as exc:
+                _LOGGER.exception('Error while preloading Linkam SDK')
+                future.set_exception(exc)
+            else:
+                future.set_result(None)
 
-            _LOGGER.info(f"Initialized Linkam SDK {self.get_version()}")
+        threading.Thread(target=run, name='pylinkam-preload', daemon=True).start()
 
-        return self._sdk
+        return future
 
     @property
     def sdk_bin_name(self) -> str:
@@ -453,15 +864,58 @@ class SDKWrapper:
     def sdk_root_path(self) -> str:
         return self._sdk_root_path
 
+    def priority(self, priority: scheduler.Priority) -> typing.ContextManager[None]:
+        """ Change default SDK access priority for calls made by the current thread within a context.
+
+        :param priority: new default priority
+        :return: context manager
+        """
+        return self._sdk_lock.priority(priority)
+
+    def get_queue_statistics(self) -> typing.Dict[scheduler.Priority, scheduler.QueueStatistics]:
+        """ Get time spent waiting for SDK access by each priority class.
+
+        :return: dict of priority to scheduler.QueueStatistics
+        """
+        return self._sdk_lock.get_statistics()
+
+    @property
+    def stalled(self) -> bool:
+        """ True if an SDK message on any connection has exceeded its deadline and not yet returned. """
+        return self._library is not None and self._library.supervisor.stalled
+
+    def get_stall_statistics(self) -> supervisor.StallStatistics:
+        """ Get counts of SDK messages that exceeded their deadline, across all connections using the library.
+
+        :return: supervisor.StallStatistics
+        """
+        return self._supervisor.get_statistics()
+
     def process_message(self, message: interface.Message, *args: typing.Tuple[str, typing.Any],
-                        comm_handle: typing.Optional[interface.CommsHandle] = None) -> typing.Any:
+                        comm_handle: typing.Optional[interface.CommsHandle] = None,
+                        priority: typing.Optional[scheduler.Priority] = None,
+                        timeout: typing.Optional[float] = None, exclusive: bool = True) -> typing.Any:
         """ Process Linkam SDK message.
 
         :param message: message type to process
         :param args: arguments to pass to library (max 3), should be tuples that describe type
         :param comm_handle:
+        :param priority: SDK access priority, defaults to CONTROL for actuating messages otherwise the current thread
+        default
+        :param timeout: deadline in seconds, defaults to the call_timeout provided at initialisation
+        :param exclusive: if False the call is not serialised with other SDK calls, only for use with messages that
+        are safe to run concurrently such as opening independent connections
         :return:
         """
+        if timeout is None:
+            timeout = self._call_timeout
+
+        if priority is None:
+            priority = self._sdk_lock.default_priority
+
+            if message in scheduler.CONTROL_MESSAGES:
+                priority = min(priority, scheduler.Priority.CONTROL)
+
         # Cast arguments to variants
         variant_args = []
 
@@ -485,22 +939,61 @@ class SDKWrapper:
 
         result = interface.Variant()
 
-        with self._sdk_lock:
+        library = self.sdk
+        timings: typing.List[timing.Timing] = []
+
+        def call(*call_args: typing.Any) -> typing.Any:
+            # Measured where the library is called, which may be a supervisor thread
+            start = time.monotonic()
+
             try:
-                self.sdk.linkamProcessMessage(
+                return library.linkamProcessMessage(*call_args)
+            finally:
+                timings.append(timing.Timing(start, time.monotonic()))
+
+        # Non-exclusive calls may run concurrently with other SDK calls
+        with self._sdk_lock.hold(priority) if exclusive else nullcontext():
+            try:
+                processed = self._supervisor.call(
+                    call,
                     message.value,
                     comm_handle,
                     ctypes.pointer(result),
-                    *variant_args
+                    *variant_args,
+                    timeout=timeout,
+                    description=f"SDK message {message.name}",
+                    key=comm_handle.value if exclusive else None
                 )
+            except supervisor.CallStalledError as exc:
+                raise SDKStalledError(str(exc)) from exc
+            except TimeoutError as exc:
+                raise SDKTimeoutError(str(exc)) from exc
             except OSError as exc:
                 raise SDKError('Error occurred while accessing Linkam SDK library') from exc
 
+        self._timing.last = timings[0] if len(timings) > 0 else None
+        self._timing.processed = bool(processed)
+
         if message.variant_field is not None:
             return getattr(result, message.variant_field)
 
         return result
 
+    def get_last_timing(self) -> typing.Optional[timing.Timing]:
+        """ Get timing of the most recent SDK message processed by the current thread.
+
+        :return: timing.Timing, None if no message has been processed
+        """
+        return getattr(self._timing, 'last', None)
+
+    def get_last_processed(self) -> bool:
+        """ Check if the SDK processed the most recent message sent by the current thread. A message that was not
+        processed may have been rejected by the controller or may indicate the connection has been lost.
+
+        :return: False if linkamProcessMessage reported the message was not processed, True otherwise
+        """
+        return getattr(self._timing, 'processed', True)
+
     def process_message_str(self, message: interface.Message, buffer_length: int,
                             comm_handle: typing.Optional[interface.CommsHandle] = None) -> str:
         """ Wrapped version of _sdk_process_message which includes string decoding.
@@ -546,7 +1039,7 @@ class SDKWrapper:
 
         return version_buffer.value.decode()
 
-    def _connect_common(self, comm_info: interface.CommsInfo) -> Connection:
+    def _connect_common(self, comm_info: interface.CommsInfo, exclusive: bool = True) -> Connection:
         # Apparently this is ignored internally...
         comm_handle = interface.CommsHandle(0)
 
@@ -554,7 +1047,8 @@ class SDKWrapper:
         connection_result = self.process_message(
             interface.Message.OPEN_COMMS,
             ('vPtr', comm_info),
-            ('vPtr', comm_handle)
+            ('vPtr', comm_handle),
+            exclusive=exclusive
         )
 
         if not connection_result.flags.connected:
@@ -583,37 +1077,71 @@ class SDKWrapper:
 
         return self.Connection(self, comm_handle)
 
-    def connect_serial(self, port: str) -> Connection:
+    def get_serial_comms_info(self, port: str) -> interface.CommsInfo:
+        """ Get SDK connection information for a serial port, results are cached.
+
+        :param port: serial port name
+        :return: interface.CommsInfo
+        """
+        key = ('serial', port)
+
+        if key not in self._comms_info:
+            comm_info = interface.CommsInfo()
+
+            port_enc = ctypes.create_string_buffer(port.encode())
+            self.sdk.linkamInitialiseSerialCommsInfo(ctypes.pointer(comm_info), port_enc)
+
+            self._comms_info[key] = comm_info
+
+        return self._comms_info[key]
+
+    def get_usb_comms_info(self, serial_number: typing.Optional[str] = None) -> interface.CommsInfo:
+        """ Get SDK connection information for a USB device, results are cached.
+
+        :param serial_number: optional serial number of desired instrument
+        :return: interface.CommsInfo
+        """
+        key = ('usb', serial_number)
+
+        if key not in self._comms_info:
+            comm_info = interface.CommsInfo()
+
+            if serial_number is not None:
+                serial_number_enc = ctypes.create_string_buffer(serial_number.encode())
+            else:
+                serial_number_enc = None
+
+            self.sdk.linkamInitialiseUSBCommsInfo(ctypes.pointer(comm_info), serial_number_enc)
+
+            self._comms_info[key] = comm_info
+
+        return self._comms_info[key]
+
+    def connect_serial(self, port: str, exclusive: bool = True) -> Connection:
         """ Use SDK to connect to an instrument over RS-232. Not tested.
 
         :param port: serial port name
+        :param exclusive: if False opening the port is not serialised with other SDK calls, allowing several ports to be
+        probed concurrently
         :return: Connection
         """
         # Configure serial connection
-        comm_info = interface.CommsInfo()
-
-        port_enc = ctypes.create_string_buffer(port.encode())
-        self.sdk.linkamInitialiseSerialCommsInfo(ctypes.pointer(comm_info), port_enc)
+        comm_info = interface.CommsInfo.from_buffer_copy(self.get_serial_comms_info(port))
 
-        return self._connect_common(comm_info)
+        return self._connect_common(comm_info, exclusive)
 
-    def connect_usb(self, serial_number: typing.Optional[str] = None) -> Connection:
+    def connect_usb(self, serial_number: typing.Optional[str] = None, exclusive: bool = True) -> Connection:
         """ Use SDK to connect to an instrument over USB.
 
         :param serial_number: optional serial number of desired instrument
+        :param exclusive: if False opening the device is not serialised with other SDK calls, allowing several devices
+        to be probed concurrently
         :return: Connection
         """
         # Configure USB connection
-        comm_info = interface.CommsInfo()
-
-        if serial_number is not None:
-            serial_number_enc = ctypes.create_string_buffer(serial_number.encode())
-        else:
-            serial_number_enc = None
-
-        self.sdk.linkamInitialiseUSBCommsInfo(ctypes.pointer(comm_info), serial_number_enc)
+        comm_info = interface.CommsInfo.from_buffer_copy(self.get_usb_comms_info(serial_number))
 
-        return self._connect_common(comm_info)
+        return self._connect_common(comm_info, exclusive)
 
     @contextmanager
     def connect(self, *args, use_serial: bool = False, **kwargs) -> typing.Generator[Connection, None, None]:
@@ -635,3 +1163,23 @@ class SDKWrapper:
     def __exit__(self, exc_type, exc_val, exc_tb):
         # Cleanup SDK
         self.close()
+
+
+def convert_value(value_type: interface.StageValueType, n: typing.Any) -> typing.Any:
+    """ Convert a value to the form sent to the controller, checking that it can be written before any SDK call is made.
+
+    :param value_type: parameter to be written
+    :param n: new value, quantities are converted to the parameter unit
+    :return: value as passed to the SDK
+    :raises ValueError: if the parameter cannot be written with set_value
+    :raises TypeError: if the value is not compatible with the parameter type
+    """
+    if value_type.variant_field is None or value_type.variant_field == 'vPtr':
+        raise ValueError(f"{value_type.name} cannot be written with set_value")
+
+    value = SDKWrapper.Connection._unwrap_value(value_type, n)
+
+    # Assigning to a variant applies the same checks as process_message
+    setattr(interface.Variant(), value_type.variant_field, value)
+
+    return value
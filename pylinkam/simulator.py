@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import ctypes
+import logging
+import math
+import threading
+import time
+import typing
+
+from pylinkam import interface
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Messages that return identification strings and the simulated responses
+_STRINGS: typing.Dict[interface.Message, str] = {
+    interface.Message.GET_CONTROLLER_NAME: 'Simulated controller',
+    interface.Message.GET_CONTROLLER_SERIAL: 'SIM000001',
+    interface.Message.GET_CONTROLLER_FIRMWARE_VERSION: '1.0.0',
+    interface.Message.GET_CONTROLLER_HARDWARE_VERSION: '1.0',
+    interface.Message.GET_STAGE_NAME: 'Simulated stage',
+    interface.Message.GET_STAGE_SERIAL: 'SIMSTAGE01',
+    interface.Message.GET_STAGE_FIRMWARE_VERSION: '1.0.0',
+    interface.Message.GET_STAGE_HARDWARE_VERSION: '1.0'
+}
+
+_TRIGGER_MESSAGES = frozenset((
+    interface.Message.SET_CONTROLLER_TRIGGER_SIGNAL_ENABLE,
+    interface.Message.SET_CONTROLLER_TRIGGER_SIGNAL_DISABLE,
+    interface.Message.INITIALISE_TRIGGER_SIGNAL_PULSE,
+    interface.Message.SET_TRIGGER_SIGNAL_PULSE
+))
+
+_DEFAULT_RANGES: typing.Dict[interface.StageValueType, typing.Tuple[typing.Any, typing.Any]] = {
+    interface.StageValueType.HEATER_SETPOINT: (-196.0, 600.0),
+    interface.StageValueType.HEATER_RATE: (0.01, 150.0),
+    interface.StageValueType.RAMP_HOLD_TIME: (0.0, 86400.0)
+}
+
+# Position, velocity and set-point of each simulated motor axis
+_MOTOR_AXES: typing.Tuple[typing.Tuple[interface.StageValueType, interface.StageValueType,
+                                       interface.StageValueType], ...] = (
+    (interface.StageValueType.MOTOR_POS_X, interface.StageValueType.MOTOR_VEL_X,
+     interface.StageValueType.MOTOR_SETPOINT_X),
+    (interface.StageValueType.MOTOR_POS_Y, interface.StageValueType.MOTOR_VEL_Y,
+     interface.StageValueType.MOTOR_SETPOINT_Y),
+    (interface.StageValueType.MOTOR_POS_Z, interface.StageValueType.MOTOR_VEL_Z,
+     interface.StageValueType.MOTOR_SETPOINT_Z)
+)
+
+
+class TriggerEvent(typing.NamedTuple):
+    """ Trigger message received by the simulated controller. """
+
+    monotonic: float
+    message: interface.Message
+    signal: interface.TriggerSignal
+
+
+class _Function:
+    # Stands in for a ctypes function pointer so that argtypes/restype can be assigned
+    def __init__(self, func: typing.Callable[..., typing.Any]):
+        self._func = func
+        self.argtypes: typing.Any = None
+        self.restype: typing.Any = None
+
+    def __call__(self, *args: typing.Any) -> typing.Any:
+        return self._func(*args)
+
+
+class SimulatedSDK:
+    """ Pure Python stand-in for the Linkam SDK library simulating a single heating stage with X/Y/Z motors. Selected by
+    passing sdk.SIMULATOR_BIN_NAME as the SDK binary name.
+
+    The heater ramps towards its set-point at the configured rate once heating is enabled, then holds for the ramp hold
+    time. Motors move towards their set-points at their configured velocity once motors are enabled. Trigger messages
+    are recorded in trigger_events. """
+
+    def __init__(self, time_scale: float = 1.0, temperature: float = 25.0):
+        """ Create simulated library.
+
+        :param time_scale: simulated seconds per real second
+        :param temperature: initial stage temperature in degrees Celsius
+        """
+        self.time_scale = time_scale
+
+        self.controller_config = interface.ControllerConfig()
+        self.controller_config.flags.supportsHeater = 1
+        self.controller_config.flags.xMotorCardReady = 1
+        self.controller_config.flags.yMotorCardReady = 1
+        self.controller_config.flags.zMotorCardReady = 1
+
+        self.stage_config = interface.StageConfig()
+        self.stage_config.flags.heater1 = 1
+        self.stage_config.flags.motorX = 1
+        self.stage_config.flags.motorY = 1
+        self.stage_config.flags.motorZ = 1
+
+        self.values: typing.Dict[interface.StageValueType, typing.Any] = {
+            interface.StageValueType.HEATER1_TEMP: temperature,
+            interface.StageValueType.HEATER_SETPOINT: temperature,
+            interface.StageValueType.HEATER_RATE: 10.0,
+            interface.StageValueType.RAMP_HOLD_TIME: 0.0,
+            interface.StageValueType.TRIGGER_SIGNAL_PULSE_WIDTH: 1
+        }
+
+        for position, velocity, setpoint in _MOTOR_AXES:
+            self.values.update({position: 0.0, velocity: 1000.0, setpoint: 0.0})
+
+        self.ranges = dict(_DEFAULT_RANGES)
+
+        # Names, serial numbers and versions reported by the controller and stage
+        self.strings = dict(_STRINGS)
+
+        self.data_rate = 100
+
+        # Clear to simulate a controller that has been unplugged, messages then fail until it is set again
+        self.connected = True
+
+        # Messages that are not processed even while connected, used to simulate a controller rejecting a message
+        self.rejected: typing.Set[interface.Message] = set()
+
+        # Error reported in the controller status
+        self.controller_error = interface.ControllerErrorCode.NONE
+
+        self.heating = False
+        self.motors = False
+
+        self.trigger_events: typing.List[TriggerEvent] = []
+        self.messages: typing.Dict[interface.Message, int] = {}
+
+        # Optional callable returning a delay in seconds before each message is processed, given the message and comms
+        # handle, used to simulate slow or hung calls
+        self.latency: typing.Optional[typing.Callable[[interface.Message, int], float]] = None
+
+        self._next_handle = 1
+
+        self._lock = threading.RLock()
+
+        self._updated = time.monotonic()
+        self._hold_remaining = 0.0
+        self._ramp_done = False
+
+        self.linkamInitialiseSDK = _Function(lambda log_path, license_path, debug: True)
+        self.linkamExitSDK = _Function(lambda: None)
+        self.linkamInitialiseSerialCommsInfo = _Function(lambda comm_info, port: None)
+        self.linkamInitialiseUSBCommsInfo = _Function(lambda comm_info, serial_number: None)
+        self.linkamGetVersion = _Function(self._get_version)
+        self.linkamProcessMessage = _Function(self._process_message)
+
+    @staticmethod
+    def _get_version(buffer: typing.Any, length: int) -> bool:
+        version = b'Simulator'[:length - 1]
+        ctypes.memmove(buffer, version + b'\0', len(version) + 1)
+
+        return True
+
+    def _advance(self) -> None:
+        # Step heater model forward to the current time
+        now = time.monotonic()
+        elapsed = (now - self._updated) * self.time_scale
+        self._updated = now
+
+        if self.motors and elapsed > 0:
+            for position, velocity, setpoint in _MOTOR_AXES:
+                step = self.values[velocity] * elapsed
+                distance = self.values[setpoint] - self.values[position]
+
+                self.values[position] = self.values[setpoint] if abs(distance) <= step else \
+                    self.values[position] + math.copysign(step, distance)
+
+        if not self.heating or elapsed <= 0:
+            return
+
+        temperature = self.values[interface.StageValueType.HEATER1_TEMP]
+        setpoint = self.values[interface.StageValueType.HEATER_SETPOINT]
+
+        if temperature != setpoint:
+            step = self.values[interface.StageValueType.HEATER_RATE] / 60 * elapsed
+
+            if abs(setpoint - temperature) <= step:
+                # Reached set-point, use remaining time for hold
+                elapsed -= abs(setpoint - temperature) / (step / elapsed)
+                temperature = setpoint
+
+                self._hold_remaining = self.values[interface.StageValueType.RAMP_HOLD_TIME]
+            else:
+                temperature += step if setpoint > temperature else -step
+                elapsed = 0.0
+
+            self.values[interface.StageValueType.HEATER1_TEMP] = temperature
+
+        if temperature == setpoint and not self._ramp_done:
+            self._hold_remaining = max(0.0, self._hold_remaining - elapsed)
+
+            if self._hold_remaining == 0:
+                self._ramp_done = True
+
+    def _get_program_status(self) -> interface.ControllerProgramStatus:
+        status = interface.ControllerProgramStatus()
+
+        if not self.heating:
+            return status
+
+        temperature = self.values[interface.StageValueType.HEATER1_TEMP]
+        setpoint = self.values[interface.StageValueType.HEATER_SETPOINT]
+
+        status.flags.started = 1
+        status.flags.heat = int(setpoint > temperature)
+        status.flags.cool = int(setpoint < temperature)
+        status.flags.dirn = int(setpoint > temperature)
+        status.flags.hold = int(setpoint == temperature and not self._ramp_done)
+        status.flags.rampDone = int(self._ramp_done)
+
+        return status
+
+    def _get_value(self, value_type: interface.StageValueType) -> typing.Any:
+        if value_type == interface.StageValueType.RAMP_HOLD_REMAINING:
+            return self._hold_remaining if self.heating else 0.0
+
+        return self.values.get(value_type, 0)
+
+    def _get_status(self) -> interface.ControllerStatus:
+        status = interface.ControllerStatus()
+        status.flags.controllerError = int(self.controller_error != interface.ControllerErrorCode.NONE)
+        status.flags.heater1Started = int(self.heating)
+        status.flags.heater1RampSetPoint = int(self.heating and self.values[interface.StageValueType.HEATER1_TEMP] ==
+                                               self.values[interface.StageValueType.HEATER_SETPOINT])
+
+        return status
+
+    def _set_value(self, value_type: interface.StageValueType, value: typing.Any) -> bool:
+        if value_type in self.ranges:
+            minimum, maximum = self.ranges[value_type]
+
+            if not minimum <= value <= maximum:
+                return False
+
+        self.values[value_type] = value
+
+        if value_type == interface.StageValueType.HEATER_SETPOINT:
+            # New ramp segment
+            self._ramp_done = False
+            self._hold_remaining = self.values[interface.StageValueType.RAMP_HOLD_TIME]
+
+        return True
+
+    def _process_message(self, message_value: int, comm_handle: typing.Any, result_ptr: typing.Any,
+                         param1: interface.Variant, param2: interface.Variant, param3: interface.Variant) -> bool:
+        message = interface.Message(message_value)
+        result = result_ptr.contents
+
+        if self.latency is not None:
+            # Delay outside the lock so that other handles are not held up
+            time.sleep(self.latency(message, comm_handle.value))
+
+        with self._lock:
+            self.messages[message] = self.messages.get(message, 0) + 1
+            self._advance()
+
+            if not self.connected:
+                if message == interface.Message.OPEN_COMMS:
+                    result.vConnectionStatus.flags.errorNoDeviceFound = 1
+                    return True
+
+                return message == interface.Message.CLOSE_COMMS
+
+            if message in self.rejected:
+                return False
+
+            if message == interface.Message.OPEN_COMMS:
+                ctypes.cast(param2.vPtr, ctypes.POINTER(interface.CommsHandle)).contents.value = self._next_handle
+                self._next_handle += 1
+                result.vConnectionStatus.flags.connected = 1
+            elif message in self.strings:
+                data = self.strings[message].encode()[:param2.vUint32]
+                ctypes.memmove(param1.vPtr, data + b'\0', len(data) + 1)
+                result.vBoolean = True
+            elif message == interface.Message.GET_CONTROLLER_CONFIG:
+                result.vControllerConfig = self.controller_config
+            elif message == interface.Message.GET_STAGE_CONFIG:
+                result.vStageConfig = self.stage_config
+            elif message == interface.Message.GET_CONTROLLER_ERROR:
+                result.vControllerError = self.controller_error
+            elif message == interface.Message.GET_STATUS:
+                result.vControllerStatus = self._get_status()
+            elif message == interface.Message.GET_DATA_RATE:
+                result.vUint32 = self.data_rate
+            elif message == interface.Message.SET_DATA_RATE:
+                self.data_rate = param1.vUint32
+                result.vBoolean = True
+            elif message == interface.Message.START_HEATING:
+                self.heating = param1.vBoolean
+                result.vBoolean = True
+            elif message == interface.Message.START_MOTORS:
+                self.motors = param1.vBoolean
+                result.vBoolean = True
+            elif message == interface.Message.GET_PROGRAM_STATE:
+                state = ctypes.cast(param2.vPtr, ctypes.POINTER(interface.Running)).contents
+
+                for value_type, field in interface.RUNNING_VALUES.items():
+                    setattr(state, field, self._get_value(value_type))
+
+                state.status = self._get_program_status()
+                state.dllStatus = self._get_status()
+                result.vBoolean = True
+            elif message == interface.Message.GET_CONTROLLER_HEATER_DETAILS:
+                details = ctypes.cast(param1.vPtr, ctypes.POINTER(interface.HeaterDetails)).contents
+                details.minLimit, details.maxLimit = _DEFAULT_RANGES[interface.StageValueType.HEATER_SETPOINT]
+                details.maxRate = _DEFAULT_RANGES[interface.StageValueType.HEATER_RATE][1]
+                result.vBoolean = True
+            elif message in (interface.Message.GET_VALUE, interface.Message.GET_MIN_VALUE,
+                             interface.Message.GET_MAX_VALUE):
+                value_type = interface.StageValueType(param1.vStageValueType)
+
+                if value_type == interface.StageValueType.STAGE_HUMIDITY_UNIT_DATA:
+                    detail = ctypes.cast(param2.vPtr, ctypes.POINTER(interface.RHUnit)).contents
+
+                    for rh_value_type, field in interface.RH_UNIT_VALUES.items():
+                        setattr(detail, field, self._get_value(rh_value_type))
+
+                    result.vBoolean = True
+                elif message == interface.Message.GET_VALUE:
+                    setattr(result, value_type.variant_field, self._get_value(value_type))
+                else:
+                    setattr(result, value_type.variant_field,
+                            self.ranges.get(value_type, (0, 0))[message == interface.Message.GET_MAX_VALUE])
+            elif message == interface.Message.SET_VALUE:
+                value_type = interface.StageValueType(param1.vStageValueType)
+                result.vBoolean = self._set_value(value_type, getattr(param2, value_type.variant_field))
+            elif message in _TRIGGER_MESSAGES:
+                self.trigger_events.append(TriggerEvent(time.monotonic(), message,
+                                                        interface.TriggerSignal(param1.vUint32)))
+                result.vBoolean = True
+            else:
+                result.vBoolean = True
+
+        return True
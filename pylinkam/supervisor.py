@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+import typing
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CallStalledError(Exception):
+    pass
+
+
+class StallStatistics(typing.NamedTuple):
+    """ Summary of supervised call activity. """
+
+    calls: int
+    timeouts: int
+    recovered: int
+    stalled: bool
+    stall_duration: float
+    max_stall_duration: float
+
+
+class _Job:
+    def __init__(self, func: typing.Callable[..., typing.Any], args: typing.Tuple[typing.Any, ...], description: str,
+                 key: typing.Hashable):
+        self.func = func
+        self.args = args
+        self.description = description
+        self.key = key
+
+        self.done = threading.Event()
+        self.result: typing.Any = None
+        self.exception: typing.Optional[BaseException] = None
+
+        self.started: typing.Optional[float] = None
+
+
+class _Lane:
+    # Worker thread and queue for calls sharing a key
+    def __init__(self, key: typing.Hashable):
+        self.key = key
+        self.queue: queue.Queue[_Job] = queue.Queue()
+        self.thread: typing.Optional[threading.Thread] = None
+
+
+class CallSupervisor:
+    """ Runs blocking calls on supervised worker threads so that callers can give up after a deadline. A call that
+    misses its deadline is tracked as stalled and further calls with the same key are refused until it returns.
+
+    Calls are grouped by key, normally one key per connection. Each key has its own worker thread, so a call stalled on
+    one key does not hold up calls made with other keys. Calls without a key run on a worker of their own. Idle workers
+    exit and are restarted on demand. """
+
+    # Time in seconds an idle worker waits for another call before exiting
+    IDLE_TIMEOUT = 5.0
+
+    def __init__(self, name: str = 'pylinkam-supervisor'):
+        """ Create new supervisor, worker threads are started on first use.
+
+        :param name: worker thread name prefix
+        """
+        self._name = name
+        self._lanes: typing.Dict[typing.Hashable, _Lane] = {}
+        self._lock = threading.Lock()
+
+        self._stalls: typing.List[_Job] = []
+
+        self._calls = 0
+        self._timeouts = 0
+        self._recovered = 0
+        self._max_stall_duration = 0.0
+
+    @property
+    def stalled(self) -> bool:
+        """ True if any call is stalled. """
+        return len(self._stalls) > 0
+
+    def is_stalled(self, key: typing.Hashable) -> bool:
+        """ Check if a call made with a key is stalled.
+
+        :param key: call key
+        :return: True if a call with the key is stalled
+        """
+        with self._lock:
+            return any(job.key == key for job in self._stalls)
+
+    def check(self, key: typing.Hashable = None) -> None:
+        """ Raise an exception if a previous call with the same key is still stalled.
+
+        :param key: call key, calls without a key are never refused
+        """
+        if key is None:
+            return
+
+        with self._lock:
+            stall = next((job for job in self._stalls if job.key == key), None)
+
+        if stall is not None:
+            duration = time.monotonic() - (stall.started or time.monotonic())
+            raise CallStalledError(f"{stall.description} has been stalled for {duration:.1f} s")
+
+    def call(self, func: typing.Callable[..., typing.Any], *args: typing.Any, timeout: typing.Optional[float] = None,
+             description: str = 'call', key: typing.Hashable = None) -> typing.Any:
+        """ Run a callable, optionally with a deadline.
+
+        :param func: callable to run
+        :param args: arguments for callable
+        :param timeout: maximum time to wait in seconds, None to run inline in the calling thread without a deadline
+        :param description: description of call used in error messages
+        :param key: calls with the same key share a worker thread and stall state, None to use a worker of its own
+        :return: value returned by callable
+        :raises CallStalledError: if a previous call with the same key is stalled
+        :raises TimeoutError: if the deadline expires, the call is then tracked as stalled
+        """
+        self.check(key)
+
+        with self._lock:
+            self._calls += 1
+
+        if timeout is None:
+            return func(*args)
+
+        job = _Job(func, args, description, key)
+
+        with self._lock:
+            lane = self._lanes.get(key) if key is not None else None
+
+            if lane is None:
+                lane = _Lane(key)
+
+                if key is not None:
+                    self._lanes[key] = lane
+
+            # Queued under the lock so an idle worker cannot exit between the check and the put
+            if lane.thread is None:
+                lane.thread = threading.Thread(target=self._run, args=(lane,), name=self._name, daemon=True)
+                lane.thread.start()
+
+            lane.queue.put(job)
+
+        if not job.done.wait(timeout):
+            with self._lock:
+                stalled = not job.done.is_set()
+
+                if stalled:
+                    self._timeouts += 1
+                    self._stalls.append(job)
+
+            if stalled:
+                _LOGGER.error(f"{description} exceeded {timeout:.3f} s deadline")
+                raise TimeoutError(f"{description} exceeded {timeout:.3f} s deadline")
+
+        if job.exception is not None:
+            raise job.exception
+
+        return job.result
+
+    def get_statistics(self) -> StallStatistics:
+        """ Get counts of calls, timeouts and recovered stalls across all keys.
+
+        :return: StallStatistics, stall_duration is that of the longest current stall
+        """
+        with self._lock:
+            now = time.monotonic()
+            duration = max((now - job.started for job in self._stalls if job.started is not None), default=0.0)
+
+            return StallStatistics(self._calls, self._timeouts, self._recovered, len(self._stalls) > 0, duration,
+                                   max(self._max_stall_duration, duration))
+
+    def _run(self, lane: _Lane) -> None:
+        # Workers for calls without a key only ever run one call
+        idle_timeout = self.IDLE_TIMEOUT if lane.key is not None else 0.0
+
+        while True:
+            try:
+                job = lane.queue.get(timeout=idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    if lane.queue.empty():
+                        lane.thread = None
+
+                        if self._lanes.get(lane.key) is lane:
+                            del self._lanes[lane.key]
+
+                        return
+
+                continue
+
+            job.started = time.monotonic()
+
+            try:
+                job.result = job.func(*job.args)
+            except BaseException as exc:
+                job.exception = exc
+
+            with self._lock:
+                job.done.set()
+
+                if job in self._stalls:
+                    duration = time.monotonic() - job.started
+                    self._max_stall_duration = max(self._max_stall_duration, duration)
+                    self._recovered += 1
+                    self._stalls.remove(job)
+
+                    _LOGGER.warning(f"{job.description} recovered after {duration:.3f} s")
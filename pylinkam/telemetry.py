@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import math
+import struct
+import typing
+
+from pylinkam import interface, poll, protocol, sdk
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Sample header, timestamp, status present flag and status word, followed by one float64 per channel
+_SAMPLE_HEADER = struct.Struct('<dBQ')
+
+# Time allowed for a client to send its subscription after connecting
+_HELLO_TIMEOUT = 5.0
+
+
+def _to_float(value: typing.Any) -> float:
+    if value is None:
+        return math.nan
+
+    return float(getattr(value, 'magnitude', value))
+
+
+class _Client:
+    def __init__(self, writer: asyncio.StreamWriter, value_types: typing.List[interface.StageValueType], status: bool,
+                 decimation: int, max_pending: int):
+        self.writer = writer
+        self.value_types = value_types
+        self.status = status
+        self.decimation = decimation
+
+        self.values_struct = struct.Struct(f"<{len(value_types)}d")
+
+        # Oldest frames are discarded when a slow client falls behind
+        self.pending: typing.Deque[bytes] = collections.deque(maxlen=max_pending)
+        self.ready = asyncio.Event()
+
+        self.count = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def queue(self, sample: poll.Sample) -> None:
+        self.count += 1
+
+        if self.count % self.decimation != 0:
+            return
+
+        status = sample.status if self.status else None
+
+        payload = _SAMPLE_HEADER.pack(sample.timestamp, status is not None, status.value if status is not None else 0)
+        payload += self.values_struct.pack(*(_to_float(sample.values.get(value_type))
+                                             for value_type in self.value_types))
+
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1
+
+        self.pending.append(protocol.pack_frame(protocol.FrameType.DATA, payload))
+        self.ready.set()
+
+
+class TelemetryServer:
+    """ Streams sampled parameters from a single controller connection to any number of local clients over TCP or a
+    Unix socket. One polling loop reads the union of all client subscriptions, each client may receive every n-th
+    sample and slow clients lose their oldest unsent samples rather than delaying others.
+
+    Clients send a HELLO frame with a JSON subscription, for example {"value_types": ["HEATER1_TEMP"], "status": true,
+    "decimation": 10}. The server replies with a CHANNELS frame and then one DATA frame per sample. """
+
+    def __init__(self, connection: sdk.SDKWrapper.Connection, period: typing.Optional[float] = None,
+                 prune: bool = True, max_pending: int = 64):
+        """ Create new server, call start_tcp or start_unix to begin accepting clients.
+
+        :param connection: connection to poll
+        :param period: requested polling period in seconds, rounded to a multiple of the controller data rate, defaults
+        to the controller data rate
+        :param prune: if True skip parameters not supported by the attached hardware, these are sent as NaN
+        :param max_pending: maximum number of unsent samples held for each client
+        """
+        self._max_pending = max_pending
+
+        self._poller = poll.Poller(connection, (), period=period, prune=prune, callback=self._on_sample)
+
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._server: typing.Optional[asyncio.AbstractServer] = None
+        self._clients: typing.List[_Client] = []
+
+    async def __aenter__(self) -> TelemetryServer:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def poller(self) -> poll.Poller:
+        return self._poller
+
+    @property
+    def sockets(self) -> typing.Tuple[typing.Any, ...]:
+        """ Listening sockets, use to find the bound port when started with port 0. """
+        return tuple(self._server.sockets) if self._server is not None else ()
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    async def start_tcp(self, host: str = '127.0.0.1', port: int = 0) -> None:
+        """ Start polling and accept clients over TCP.
+
+        :param host: address to listen on, defaults to localhost only
+        :param port: port to listen on, 0 to pick a free port
+        """
+        await self._start_polling()
+        self._server = await asyncio.start_server(self._handle, host, port)
+
+    async def start_unix(self, path: str) -> None:
+        """ Start polling and accept clients over a Unix socket.
+
+        :param path: socket path
+        """
+        await self._start_polling()
+        self._server = await asyncio.start_unix_server(self._handle, path)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            raise RuntimeError('Server not started')
+
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """ Stop accepting clients, disconnect existing clients and stop polling. """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        for client in list(self._clients):
+            client.writer.close()
+
+        await asyncio.get_running_loop().run_in_executor(None, self._poller.stop)
+
+    async def _start_polling(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+        # Resolving the polling period reads from the controller, keep it off the event loop
+        await self._loop.run_in_executor(None, self._poller.start)
+
+    def _update(self) -> None:
+        value_types: typing.Dict[interface.StageValueType, None] = {}
+
+        for client in self._clients:
+            value_types.update(dict.fromkeys(client.value_types))
+
+        self._poller.set_value_types(value_types)
+        self._poller.set_include_status(any(client.status for client in self._clients))
+
+    def _on_sample(self, sample: poll.Sample) -> None:
+        # Called from polling thread
+        loop = self._loop
+
+        if loop is None or loop.is_closed():
+            return
+
+        try:
+            loop.call_soon_threadsafe(self._broadcast, sample)
+        except RuntimeError:
+            # Loop closed while polling
+            pass
+
+    def _broadcast(self, sample: poll.Sample) -> None:
+        for client in self._clients:
+            client.queue(sample)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            frame_type, payload = await asyncio.wait_for(protocol.read_frame(reader), _HELLO_TIMEOUT)
+
+            if frame_type != protocol.FrameType.HELLO:
+                raise protocol.ProtocolError(f"Expected HELLO frame, got {frame_type.name}")
+
+            hello = protocol.unpack_json(payload)
+
+            value_types = list(dict.fromkeys(interface.StageValueType[name] for name in hello.get('value_types', ())))
+            status = bool(hello.get('status', False))
+            decimation = int(hello.get('decimation', 1))
+
+            if decimation < 1:
+                raise ValueError('Decimation must be at least 1')
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except (protocol.ProtocolError, AttributeError, KeyError, TypeError, ValueError) as exc:
+            writer.write(protocol.pack_json_frame(protocol.FrameType.ERROR, {'message': f"Bad subscription: {exc!s}"}))
+            writer.close()
+            return
+
+        client = _Client(writer, value_types, status, decimation, self._max_pending)
+
+        writer.write(protocol.pack_json_frame(protocol.FrameType.CHANNELS, {
+            'value_types': [value_type.name for value_type in value_types],
+            'status': status,
+            'period': self._poller.period * decimation
+        }))
+
+        self._clients.append(client)
+        self._update()
+
+        _LOGGER.info(f"Telemetry client connected for {len(value_types)} channel(s)")
+
+        sender = asyncio.ensure_future(self._send(client))
+
+        try:
+            # Clients send nothing further, wait for them to disconnect
+            while len(await reader.read(1024)) > 0:
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            sender.cancel()
+
+            self._clients.remove(client)
+            self._update()
+
+            writer.close()
+
+            _LOGGER.info(f"Telemetry client disconnected after {client.sent} sample(s), {client.dropped} dropped")
+
+    @staticmethod
+    async def _send(client: _Client) -> None:
+        try:
+            while True:
+                await client.ready.wait()
+                client.ready.clear()
+
+                while len(client.pending) > 0:
+                    client.writer.write(client.pending.popleft())
+                    client.sent += 1
+
+                # Samples queue up while the client is slow to read
+                await client.writer.drain()
+        except ConnectionError:
+            pass
+
+
+class TelemetryClient:
+    """ Receives streamed samples from a TelemetryServer. """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 value_types: typing.List[interface.StageValueType], status: bool, period: float):
+        """ Wrap an established stream, use TelemetryClient.connect instead.
+
+        :param reader: stream reader
+        :param writer: stream writer
+        :param value_types: channels in the order sent by the server
+        :param status: True if samples include controller status
+        :param period: interval between samples in seconds
+        """
+        self._reader = reader
+        self._writer = writer
+
+        self._value_types = value_types
+        self._status = status
+        self._period = period
+
+        self._values_struct = struct.Struct(f"<{len(value_types)}d")
+
+    async def __aenter__(self) -> TelemetryClient:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __aiter__(self) -> TelemetryClient:
+        return self
+
+    async def __anext__(self) -> poll.Sample:
+        try:
+            return await self.read()
+        except EOFError:
+            raise StopAsyncIteration from None
+
+    @classmethod
+    async def connect(cls, value_types: typing.Iterable[interface.StageValueType], status: bool = False,
+                      decimation: int = 1, host: str = '127.0.0.1', port: typing.Optional[int] = None,
+                      path: typing.Optional[str] = None) -> TelemetryClient:
+        """ Connect to a server and subscribe to parameters.
+
+        :param value_types: parameters to receive
+        :param status: if True also receive controller status
+        :param decimation: receive every n-th sample
+        :param host: server address when using TCP
+        :param port: server port when using TCP
+        :param path: socket path, if provided a Unix socket is used instead of TCP
+        :return: TelemetryClient
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        elif port is not None:
+            reader, writer = await asyncio.open_connection(host, port)
+        else:
+            raise ValueError('Port or path required')
+
+        writer.write(protocol.pack_json_frame(protocol.FrameType.HELLO, {
+            'value_types': [value_type.name for value_type in value_types],
+            'status': status,
+            'decimation': decimation
+        }))
+
+        try:
+            frame_type, payload = await protocol.read_frame(reader)
+            reply = protocol.unpack_json(payload)
+
+            if frame_type == protocol.FrameType.ERROR:
+                raise protocol.ProtocolError(reply.get('message', 'Subscription rejected'))
+            elif frame_type != protocol.FrameType.CHANNELS:
+                raise protocol.ProtocolError(f"Expected CHANNELS frame, got {frame_type.name}")
+        except BaseException:
+            writer.close()
+            raise
+
+        return cls(reader, writer, [interface.StageValueType[name] for name in reply['value_types']],
+                   reply['status'], reply['period'])
+
+    @property
+    def period(self) -> float:
+        """ Interval between samples in seconds. """
+        return self._period
+
+    @property
+    def value_types(self) -> typing.List[interface.StageValueType]:
+        return list(self._value_types)
+
+    async def close(self) -> None:
+        self._writer.close()
+
+    async def read(self) -> poll.Sample:
+        """ Read next sample, values are plain floats in the units of each parameter and unsupported parameters are
+        NaN.
+
+        :return: poll.Sample
+        :raises EOFError: if the server closed the connection
+        """
+        try:
+            frame_type, payload = await protocol.read_frame(self._reader)
+        except asyncio.IncompleteReadError:
+            raise EOFError('Telemetry server closed connection') from None
+
+        if frame_type != protocol.FrameType.DATA:
+            raise protocol.ProtocolError(f"Expected DATA frame, got {frame_type.name}")
+
+        timestamp, has_status, status = _SAMPLE_HEADER.unpack_from(payload)
+        values = self._values_struct.unpack_from(payload, _SAMPLE_HEADER.size)
+
+        return poll.Sample(
+            timestamp,
+            dict(zip(self._value_types, values)),
+            interface.ControllerStatus(value=status) if has_status else None
+        )
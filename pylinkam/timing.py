@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import functools
+import threading
+import time
+import typing
+
+# Offset changes faster than this between synchronisations are treated as wall-clock steps rather than drift
+_MAX_DRIFT = 1e-3
+
+
+class Timing(typing.NamedTuple):
+    """ Monotonic clock readings taken immediately before and after an SDK message was processed. """
+
+    start: float
+    end: float
+
+    @property
+    def midpoint(self) -> float:
+        return (self.start + self.end) / 2
+
+    @property
+    def uncertainty(self) -> float:
+        """ Half the time taken to process the message. """
+        return (self.end - self.start) / 2
+
+
+class Reading(typing.NamedTuple):
+    """ Value read from the controller with the time it was sampled. """
+
+    value: typing.Any
+
+    # Wall-clock time at the midpoint of the SDK message
+    timestamp: float
+
+    # Monotonic clock time at the midpoint of the SDK message
+    monotonic: float
+
+    # Maximum error of timestamp in seconds
+    uncertainty: float
+
+    @classmethod
+    def from_timing(cls, value: typing.Any, timing: Timing,
+                    wall_clock: typing.Optional[WallClock] = None) -> Reading:
+        """ Create reading from message timing.
+
+        :param value: value read
+        :param timing: Timing of message that returned the value
+        :param wall_clock: clock used to convert to wall-clock time, defaults to the shared clock
+        :return: Reading
+        """
+        wall_clock = wall_clock or get_wall_clock()
+
+        return cls(value, wall_clock.to_wall(timing.midpoint), timing.midpoint, timing.uncertainty)
+
+
+class WallClock:
+    """ Converts monotonic clock readings to wall-clock time. The offset between the two clocks is measured periodically
+    and drift between measurements is corrected linearly. """
+
+    def __init__(self, resync_interval: float = 60.0, attempts: int = 5,
+                 monotonic: typing.Callable[[], float] = time.monotonic, wall: typing.Callable[[], float] = time.time):
+        """ Create new clock, the first measurement is made on first use.
+
+        :param resync_interval: time between offset measurements in seconds
+        :param attempts: number of readings per measurement, the tightest is used
+        :param monotonic: monotonic clock source
+        :param wall: wall-clock source
+        """
+        self._resync_interval = resync_interval
+        self._attempts = attempts
+        self._monotonic = monotonic
+        self._wall = wall
+
+        self._lock = threading.Lock()
+
+        self._reference: typing.Optional[float] = None
+        self._offset = 0.0
+        self._drift = 0.0
+
+    @property
+    def drift(self) -> float:
+        """ Estimated drift of wall-clock time relative to monotonic time in seconds per second. """
+        return self._drift
+
+    def _measure(self) -> typing.Tuple[float, float]:
+        best: typing.Optional[typing.Tuple[float, float, float]] = None
+
+        for _ in range(self._attempts):
+            before = self._monotonic()
+            wall = self._wall()
+            after = self._monotonic()
+
+            if best is None or after - before < best[0]:
+                best = (after - before, (before + after) / 2, wall)
+
+        assert best is not None
+
+        _, monotonic, wall = best
+
+        return monotonic, wall - monotonic
+
+    def sync(self) -> None:
+        """ Measure clock offset now and update drift estimate. """
+        monotonic, offset = self._measure()
+
+        with self._lock:
+            if self._reference is not None and monotonic > self._reference:
+                # Compare with the offset predicted by the previous estimate
+                predicted = self._offset + self._drift * (monotonic - self._reference)
+                drift = self._drift + (offset - predicted) / (monotonic - self._reference)
+
+                if abs(drift) > _MAX_DRIFT:
+                    # Wall clock was stepped, restart drift estimation
+                    drift = 0.0
+
+                self._drift = drift
+
+            self._reference = monotonic
+            self._offset = offset
+
+    def to_wall(self, monotonic: float) -> float:
+        """ Convert monotonic clock reading to wall-clock time.
+
+        :param monotonic: time.monotonic() value
+        :return: float seconds since the epoch
+        """
+        reference = self._reference
+
+        if reference is None or self._monotonic() - reference > self._resync_interval:
+            self.sync()
+
+        with self._lock:
+            return monotonic + self._offset + self._drift * (monotonic - typing.cast(float, self._reference))
+
+
+@functools.lru_cache(maxsize=None)
+def get_wall_clock() -> WallClock:
+    """ Get clock shared by all readings in this process.
+
+    :return: WallClock
+    """
+    return WallClock()
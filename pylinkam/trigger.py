@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+import typing
+
+from pylinkam import interface, poll, sdk, timing
+
+_LOGGER = logging.getLogger(__name__)
+
+# Program state check interval in seconds used when neither a poll period nor the controller data rate is known
+DEFAULT_POLL_PERIOD = 0.1
+
+
+def _get_segment(state: interface.Running) -> typing.Tuple[int, ...]:
+    # Program segment identified by ramp direction, hold and completion flags
+    flags = state.status.flags
+
+    return flags.started, flags.heat, flags.cool, flags.hold, flags.rampDone
+
+
+class TriggerScheduler:
+    """ Generates controller trigger pulses so that external instruments can acquire in lockstep with the stage, either
+    at a fixed period or whenever the temperature program moves to a new segment (ramp, hold, complete).
+
+    Pulses are timed by a software thread on the host, not by the controller, so each pulse is subject to thread
+    scheduling and USB/serial latency jitter, typically in the order of milliseconds. The measured send time and its
+    uncertainty are recorded for every pulse in pulses. Segment boundaries are only detected at the next program state
+    check, adding up to one poll period of delay. """
+
+    def __init__(self, connection: sdk.SDKWrapper.Connection,
+                 signals: typing.Iterable[interface.TriggerSignal] = (interface.TriggerSignal.BLUE,),
+                 period: typing.Optional[float] = None, segments: bool = False,
+                 pulse_width: typing.Optional[int] = None, poll_period: typing.Optional[float] = None,
+                 callback: typing.Optional[typing.Callable[[timing.Reading], None]] = None):
+        """ Create new scheduler, trigger outputs are not armed until start() is called.
+
+        :param connection: controller connection
+        :param signals: trigger outputs to pulse
+        :param period: interval between pulses in seconds, mutually exclusive with segments
+        :param segments: if True pulse at each program segment boundary
+        :param pulse_width: pulse width to configure, in the units of TRIGGER_SIGNAL_PULSE_WIDTH, defaults to the
+        controller setting
+        :param poll_period: interval at which program state is checked when pulsing on segment boundaries, rounded to a
+        multiple of the controller data rate, defaults to the controller data rate or DEFAULT_POLL_PERIOD if that is
+        unknown
+        :param callback: optional callable to receive a Reading for each pulse, with the pulse number as the value
+        """
+        if (period is None) == (not segments):
+            raise ValueError('Either a period or segment triggering is required')
+
+        if period is not None and period <= 0:
+            raise ValueError('Trigger period must be positive')
+
+        self._connection = connection
+        self._signals = tuple(dict.fromkeys(signals))
+        self._period = period
+        self._segments = segments
+        self._pulse_width = pulse_width
+        self._poll_period = poll_period
+        self._callback = callback
+
+        self._stop = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+        self._pulses: typing.List[timing.Reading] = []
+        self._overruns = 0
+
+    def __enter__(self) -> TriggerScheduler:
+        self.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def pulses(self) -> typing.List[timing.Reading]:
+        """ Time of each pulse sent, with the pulse number as the value. """
+        return list(self._pulses)
+
+    @property
+    def overruns(self) -> int:
+        """ Number of periodic pulses skipped because sending took longer than the period. """
+        return self._overruns
+
+    def arm(self) -> None:
+        """ Enable and initialise trigger outputs. """
+        if self._pulse_width is not None:
+            if not self._connection.set_value(interface.StageValueType.TRIGGER_SIGNAL_PULSE_WIDTH, self._pulse_width):
+                raise sdk.SDKError('Unable to set trigger pulse width')
+
+        for signal in self._signals:
+            self._connection.enable_trigger_signal(signal, True)
+            self._connection.initialise_trigger_pulse(signal)
+
+    def disarm(self) -> None:
+        """ Disable trigger outputs. """
+        for signal in self._signals:
+            self._connection.enable_trigger_signal(signal, False)
+
+    def fire(self) -> timing.Reading:
+        """ Send a pulse on all outputs now.
+
+        :return: timing.Reading with the pulse number as the value, timed at the first output
+        """
+        pulse_timing: typing.Optional[timing.Timing] = None
+
+        for signal in self._signals:
+            self._connection.send_trigger_pulse(signal)
+
+            if pulse_timing is None:
+                pulse_timing = self._connection.get_last_timing()
+
+        reading = timing.Reading.from_timing(len(self._pulses), typing.cast(timing.Timing, pulse_timing))
+        self._pulses.append(reading)
+
+        if self._callback is not None:
+            try:
+                self._callback(reading)
+            except Exception:
+                _LOGGER.exception('Unhandled exception in trigger callback')
+
+        return reading
+
+    def start(self) -> None:
+        """ Arm trigger outputs and start generating pulses. """
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self.arm()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_segments if self._segments else self._run_periodic,
+                                        name='pylinkam-trigger', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: typing.Optional[float] = None) -> None:
+        """ Stop generating pulses and disarm trigger outputs.
+
+        :param timeout: maximum time to wait for the thread to exit
+        """
+        self._stop.set()
+
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+        self._thread = None
+
+        self.disarm()
+
+    def _run_periodic(self) -> None:
+        period = typing.cast(float, self._period)
+        deadline = time.monotonic()
+
+        while not self._stop.is_set():
+            try:
+                self.fire()
+            except Exception:
+                # Keep the thread alive, a single failed pulse must not end the schedule
+                _LOGGER.exception('Error while sending trigger pulse')
+
+            deadline += period
+            now = time.monotonic()
+
+            if now > deadline:
+                # Skip missed pulses but stay on the original schedule
+                missed = math.ceil((now - deadline) / period)
+                self._overruns += missed
+                deadline += missed * period
+
+            self._stop.wait(deadline - now)
+
+    def _run_segments(self) -> None:
+        try:
+            interval: typing.Optional[float] = self._connection.get_data_rate() / 1000
+        except Exception:
+            _LOGGER.warning('Unable to read controller data rate', exc_info=True)
+            interval = None
+
+        if self._poll_period is None and (interval is None or interval <= 0):
+            _LOGGER.warning(f"Controller data rate unknown, checking program state every {DEFAULT_POLL_PERIOD} s")
+            period = DEFAULT_POLL_PERIOD
+        else:
+            period = poll.align_period(self._poll_period, interval)
+
+        segment: typing.Optional[typing.Tuple[int, ...]] = None
+
+        while not self._stop.is_set():
+            try:
+                current = _get_segment(self._connection.get_program_state())
+
+                if segment is not None and current != segment:
+                    _LOGGER.debug(f"Program segment changed from {segment} to {current}")
+                    self.fire()
+
+                segment = current
+            except Exception:
+                # Keep the thread alive, a single failed check must not stop segment tracking
+                _LOGGER.exception('Error while checking program state')
+
+            self._stop.wait(period)
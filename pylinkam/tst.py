@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+import typing
+
+from pylinkam import acquisition, interface, poll, sdk
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Channels read together in every capture cycle
+TST_VALUES: typing.Tuple[interface.StageValueType, ...] = (
+    interface.StageValueType.TST_FORCE,
+    interface.StageValueType.TST_MOTOR_POS,
+    interface.StageValueType.TST_STRAIN,
+    interface.StageValueType.TST_STRESS
+)
+
+# Default proof strain for yield detection, in strain units (0.2 %)
+DEFAULT_YIELD_OFFSET = 0.002
+
+# Default portion of the curve up to peak stress used to fit the elastic modulus, as fractions of peak stress
+DEFAULT_ELASTIC_RANGE = (0.1, 0.4)
+
+
+class TSTError(Exception):
+    pass
+
+
+class CurvePoint(typing.NamedTuple):
+    """ Single point on a stress-strain curve. """
+
+    index: int
+    timestamp: float
+    force: float
+    position: float
+    strain: float
+    stress: float
+
+
+class YieldPoint(typing.NamedTuple):
+    """ Result of offset yield detection. """
+
+    point: CurvePoint
+
+    # Slope of the elastic region in stress per unit strain
+    modulus: float
+
+    # Stress at zero strain of the fitted elastic line
+    intercept: float
+
+
+def find_peak(stress: typing.Any) -> typing.Optional[int]:
+    """ Find index of maximum stress.
+
+    :param stress: array of stress values
+    :return: int index, None if the array is empty
+    """
+    stress = acquisition.require_numpy(TSTError, 'TST capture').asarray(stress)
+
+    if len(stress) == 0:
+        return None
+
+    return int(stress.argmax())
+
+
+def find_yield(strain: typing.Any, stress: typing.Any, offset: float = DEFAULT_YIELD_OFFSET,
+               elastic_range: typing.Tuple[float, float] = DEFAULT_ELASTIC_RANGE
+               ) -> typing.Optional[typing.Tuple[int, float, float]]:
+    """ Find yield point using the offset method: a line is fitted to the elastic region, shifted along the strain axis
+    by the offset, and yield is the first sample at which the curve falls below it.
+
+    :param strain: array of strain values
+    :param stress: array of stress values
+    :param offset: proof strain in the units of strain, use 0.2 when strain is reported as a percentage
+    :param elastic_range: lower and upper bound of the elastic region as fractions of peak stress
+    :return: tuple of sample index, modulus and intercept, None if the curve has not yielded yet
+    """
+    np = acquisition.require_numpy(TSTError, 'TST capture')
+
+    strain = np.asarray(strain, dtype=float)
+    stress = np.asarray(stress, dtype=float)
+
+    peak = find_peak(stress)
+
+    if peak is None or stress[peak] <= 0:
+        return None
+
+    # Elastic region is taken from the loading part of the curve only
+    lower, upper = elastic_range[0] * stress[peak], elastic_range[1] * stress[peak]
+    elastic = np.flatnonzero((stress[:peak + 1] >= lower) & (stress[:peak + 1] <= upper))
+
+    if len(elastic) < 2 or np.ptp(strain[elastic]) == 0:
+        return None
+
+    modulus, intercept = np.polyfit(strain[elastic], stress[elastic], 1)
+
+    if modulus <= 0:
+        return None
+
+    start = int(elastic[0])
+    below = np.flatnonzero(stress[start:] < modulus * (strain[start:] - offset) + intercept)
+
+    if len(below) == 0:
+        return None
+
+    return start + int(below[0]), float(modulus), float(intercept)
+
+
+class TensileCapture(acquisition.BlockAcquisition):
+    """ Continuous capture of force, motor position, strain and stress from a tensile stage. All channels are read in a
+    single batch each cycle so that every row is a consistent snapshot, and the curve is built incrementally in
+    preallocated arrays. Peak stress is tracked as blocks arrive, yield is detected on demand. """
+
+    FIELDS = ('timestamp', 'force', 'position', 'strain', 'stress')
+
+    ERROR = TSTError
+
+    DESCRIPTION = 'TST capture'
+
+    def __init__(self, connection: sdk.SDKWrapper.Connection, period: typing.Optional[float] = None,
+                 batch_size: int = 16, capacity: int = 4096,
+                 callback: typing.Optional[typing.Callable[[typing.Dict[str, typing.Any]], None]] = None):
+        """ Create new capture, reading does not begin until start() is called.
+
+        :param connection: controller connection
+        :param period: requested sampling period in seconds, rounded to a multiple of the controller data rate,
+        defaults to the controller data rate
+        :param batch_size: number of samples processed together
+        :param capacity: initial number of samples to allocate
+        :param callback: optional callable to receive each processed block as a dict of arrays
+        """
+        self._peak: typing.Optional[int] = None
+
+        super().__init__(connection, TST_VALUES, period, batch_size, capacity, callback)
+
+    def __enter__(self) -> TensileCapture:
+        self.start()
+
+        return self
+
+    def clear(self) -> None:
+        """ Discard all captured samples. """
+        with self._lock:
+            self._pending.clear()
+            self._buffer.clear()
+            self._peak = None
+
+    def get_peak(self) -> typing.Optional[CurvePoint]:
+        """ Get point of maximum stress processed so far.
+
+        :return: CurvePoint, None if no samples have been processed
+        """
+        with self._lock:
+            return self._get_point(self._peak) if self._peak is not None else None
+
+    def get_yield(self, offset: float = DEFAULT_YIELD_OFFSET,
+                  elastic_range: typing.Tuple[float, float] = DEFAULT_ELASTIC_RANGE) -> typing.Optional[YieldPoint]:
+        """ Detect yield point in the samples processed so far, see find_yield.
+
+        :param offset: proof strain in the units of strain, use 0.2 when strain is reported as a percentage
+        :param elastic_range: lower and upper bound of the elastic region as fractions of peak stress
+        :return: YieldPoint, None if the curve has not yielded yet
+        """
+        with self._lock:
+            result = find_yield(self._buffer.view('strain'), self._buffer.view('stress'), offset, elastic_range)
+
+            if result is None:
+                return None
+
+            index, modulus, intercept = result
+
+            return YieldPoint(self._get_point(index), modulus, intercept)
+
+    def _get_point(self, index: int) -> CurvePoint:
+        # Must be called with lock held
+        return CurvePoint(index, *(float(self._buffer.view(field)[index]) for field in self.FIELDS))
+
+    def _row(self, sample: poll.Sample) -> typing.Tuple[float, ...]:
+        values = sample.values
+
+        return tuple(acquisition.magnitude(values[value_type]) for value_type in TST_VALUES)
+
+    def _extended(self, start: int, block: typing.Dict[str, typing.Any]) -> None:
+        # Only the new block needs to be compared against the running peak
+        block_peak = start + int(block['stress'].argmax())
+
+        if self._peak is None or self._buffer.view('stress')[block_peak] > self._buffer.view('stress')[self._peak]:
+            self._peak = block_peak
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
+import functools
 import os
 import sys
 import typing
 from contextlib import contextmanager
+from types import ModuleType
 
 
 def add_path(path: str) -> None:
@@ -11,3 +13,18 @@ def add_path(path: str) -> None:
     :param path: path to add to PATH
     """
     os.environ['PATH'] = path + os.pathsep + os.environ['PATH']
+
+
+@functools.lru_cache(maxsize=None)
+def get_pint() -> typing.Optional[ModuleType]:
+    """ Import pint on first use, pint is slow to import and only needed once values are read.
+
+    :return: pint module, or None if pint is not installed
+    """
+    try:
+        # noinspection PyPackageRequirements
+        import pint
+    except ImportError:
+        return None
+
+    return pint
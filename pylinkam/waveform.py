@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+import typing
+
+from pylinkam import acquisition, interface, poll, records, sdk
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Set-points that can be streamed and the channel used to measure tracking
+MEASURED_VALUES: typing.Dict[interface.StageValueType, interface.StageValueType] = {
+    interface.StageValueType.HEATER_SETPOINT: interface.StageValueType.HEATER1_TEMP,
+    interface.StageValueType.HUMIDITY_SETPOINT: interface.StageValueType.HUMIDITY,
+    interface.StageValueType.MOTOR_SETPOINT_X: interface.StageValueType.MOTOR_POS_X,
+    interface.StageValueType.MOTOR_SETPOINT_Y: interface.StageValueType.MOTOR_POS_Y,
+    interface.StageValueType.MOTOR_SETPOINT_Z: interface.StageValueType.MOTOR_POS_Z
+}
+
+_FIELDS = ('time', 'timestamp', 'setpoint', 'measured', 'error')
+
+
+class WaveformError(Exception):
+    pass
+
+
+class TrackingSample(typing.NamedTuple):
+    """ Set-point in effect at a feeder update and the measured response. """
+
+    # Time since the start of the waveform in seconds
+    time: float
+
+    # Wall-clock time of the measurement
+    timestamp: float
+
+    # Last set-point accepted by the controller, which differs from the waveform when an update was suppressed by the
+    # deadband or rejected
+    setpoint: float
+
+    measured: float
+
+    # Measured minus set-point
+    error: float
+
+
+class TrackingStatistics(typing.NamedTuple):
+    """ Summary of tracking error over all feeder updates. """
+
+    count: int
+    mean: float
+    rms: float
+    max: float
+
+
+class WaveformFeeder:
+    """ Streams a set-point waveform to the controller from a background thread.
+
+    The waveform is resampled onto the update schedule once, before streaming starts, so each update only indexes a
+    precomputed array. Updates run on a fixed schedule aligned to the controller data rate, which is the fastest rate at
+    which the controller applies new set-points; late updates are skipped rather than sent in a burst. Set-points are
+    clamped to the range accepted by the controller, and the measured channel is read after each update to record
+    tracking error. """
+
+    def __init__(self, connection: sdk.SDKWrapper.Connection, value_type: interface.StageValueType,
+                 waveform: typing.Any, measured: typing.Optional[interface.StageValueType] = None,
+                 period: typing.Optional[float] = None, deadband: float = 0.0, repeat: bool = False, clamp: bool = True,
+                 capacity: int = 4096,
+                 callback: typing.Optional[typing.Callable[[TrackingSample], None]] = None):
+        """ Create new feeder, set-points are not sent until start() is called.
+
+        :param connection: controller connection
+        :param value_type: set-point to stream, one of MEASURED_VALUES unless measured is given
+        :param waveform: array of shape (n, 2) with rows of time in seconds from start and set-point, time must be
+        increasing, set-points in the units of value_type
+        :param measured: channel used to measure tracking error, defaults to the channel paired with value_type
+        :param period: requested update period in seconds, rounded to a multiple of the controller data rate, defaults
+        to the controller data rate
+        :param deadband: minimum change in set-point for an update to be sent, the measured channel is still read and
+        compared with the set-point last sent
+        :param repeat: if True loop the waveform until stopped, the last row should then describe the end of one period
+        :param clamp: if True limit set-points to the range reported by the controller
+        :param capacity: initial number of updates to allocate for tracking history
+        :param callback: optional callable to receive a TrackingSample for each update
+        """
+        np = acquisition.require_numpy(WaveformError, 'waveform streaming')
+
+        waveform = np.asarray(waveform, dtype=float)
+
+        if waveform.ndim != 2 or waveform.shape[1] != 2 or len(waveform) < 1:
+            raise ValueError('Waveform must be an array of (time, set-point) rows')
+
+        if np.any(np.diff(waveform[:, 0]) <= 0):
+            raise ValueError('Waveform time must be strictly increasing')
+
+        if repeat and waveform[-1, 0] <= 0:
+            raise ValueError('Repeating waveform must have a positive duration')
+
+        if measured is None:
+            if value_type not in MEASURED_VALUES:
+                raise ValueError(f"No measured channel known for {value_type.name}")
+
+            measured = MEASURED_VALUES[value_type]
+
+        self._connection = connection
+        self._value_type = value_type
+        self._measured = measured
+        self._waveform = waveform
+        self._period = period
+        self._deadband = deadband
+        self._repeat = repeat
+        self._clamp = clamp
+        self._callback = callback
+
+        self._lock = threading.Lock()
+        self._buffer = records.ColumnBuffer(_FIELDS, capacity)
+
+        self._stop = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+
+        self._overruns = 0
+
+    def __enter__(self) -> WaveformFeeder:
+        self.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def overruns(self) -> int:
+        """ Number of updates skipped because the previous update took longer than the period. """
+        return self._overruns
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """ Start streaming from the beginning of the waveform. """
+        if self.running:
+            return
+
+        period, setpoints = self._resample()
+
+        self._stop.clear()
+        self._overruns = 0
+
+        with self._lock:
+            self._buffer.clear()
+
+        self._thread = threading.Thread(target=self._run, args=(period, setpoints), name='pylinkam-waveform',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: typing.Optional[float] = None) -> None:
+        """ Stop streaming, the last set-point sent remains in effect.
+
+        :param timeout: maximum time to wait for the feeder thread to exit
+        """
+        self._stop.set()
+        self.join(timeout)
+
+    def join(self, timeout: typing.Optional[float] = None) -> None:
+        """ Wait for a non-repeating waveform to finish.
+
+        :param timeout: maximum time to wait for the feeder thread to exit
+        """
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+            if not self._thread.is_alive():
+                self._thread = None
+
+    def get_data(self) -> typing.Dict[str, typing.Any]:
+        """ Get copy of tracking history.
+
+        :return: dict of 'time', 'timestamp', 'setpoint', 'measured' and 'error' arrays
+        """
+        with self._lock:
+            return self._buffer.to_dict()
+
+    def get_statistics(self) -> TrackingStatistics:
+        """ Summarise tracking error so far.
+
+        :return: TrackingStatistics, NaN values if no updates have been made
+        """
+        np = acquisition.require_numpy(WaveformError, 'waveform streaming')
+
+        with self._lock:
+            error = self._buffer.view('error')
+
+            if len(error) == 0:
+                return TrackingStatistics(0, math.nan, math.nan, math.nan)
+
+            return TrackingStatistics(len(error), float(error.mean()), float(np.sqrt(np.mean(error ** 2))),
+                                      float(np.abs(error).max()))
+
+    def _resample(self) -> typing.Tuple[float, typing.Any]:
+        # Interpolate the whole waveform onto the update schedule up front
+        np = acquisition.require_numpy(WaveformError, 'waveform streaming')
+
+        try:
+            interval: typing.Optional[float] = self._connection.get_data_rate() / 1000
+        except sdk.SDKError:
+            _LOGGER.warning('Unable to read controller data rate', exc_info=True)
+            interval = None
+
+        period = poll.align_period(self._period, interval)
+
+        times = self._waveform[:, 0]
+        duration = times[-1]
+        count = int(math.floor(duration / period)) + (0 if self._repeat else 1)
+        ticks = np.arange(max(count, 1)) * period
+
+        setpoints = np.interp(ticks, times, self._waveform[:, 1], period=duration if self._repeat else None)
+
+        if self._clamp:
+            minimum, maximum = (acquisition.magnitude(x) for x in self._connection.get_value_range(self._value_type))
+
+            # Controllers report an empty range where no limit is defined
+            if minimum < maximum:
+                clipped = np.clip(setpoints, minimum, maximum)
+
+                if np.any(clipped != setpoints):
+                    _LOGGER.warning(f"Waveform clamped to {self._value_type.name} range {minimum} to {maximum}")
+
+                setpoints = clipped
+
+        return period, setpoints
+
+    def _run(self, period: float, setpoints: typing.Any) -> None:
+        start = time.monotonic()
+        count = len(setpoints)
+        tick = 0
+        sent_tick = -1
+        last: typing.Optional[float] = None
+
+        while not self._stop.is_set():
+            if not self._repeat and tick >= count:
+                if sent_tick == count - 1:
+                    break
+
+                # Always finish on the final set-point, even if its update was skipped
+                tick = count - 1
+
+            setpoint = float(setpoints[tick % count])
+            sent_tick = tick
+
+            try:
+                if last is None or abs(setpoint - last) >= self._deadband:
+                    if not self._connection.set_value(self._value_type, setpoint):
+                        _LOGGER.warning(f"Controller rejected {self._value_type.name} {setpoint}")
+                    else:
+                        last = setpoint
+
+                reading = self._connection.get_value_timed(self._measured)
+
+                # Tracking is measured against the set-point actually in effect, once one has been accepted
+                if last is not None:
+                    self._record(tick * period, reading.timestamp, last, acquisition.magnitude(reading.value))
+            except Exception:
+                # Keep streaming, a single failed update must not end the waveform
+                _LOGGER.exception('Error while streaming waveform')
+
+            tick += 1
+            deadline = start + tick * period
+            now = time.monotonic()
+
+            if now > deadline:
+                # Skip missed updates but stay on the original schedule
+                missed = math.ceil((now - deadline) / period)
+                self._overruns += missed
+                tick += missed
+                deadline += missed * period
+
+            self._stop.wait(deadline - now)
+
+    def _record(self, elapsed: float, timestamp: float, setpoint: float, measured: float) -> None:
+        sample = TrackingSample(elapsed, timestamp, setpoint, measured, measured - setpoint)
+
+        with self._lock:
+            self._buffer.extend({field: (value,) for field, value in zip(_FIELDS, sample)})
+
+        if self._callback is not None:
+            try:
+                self._callback(sample)
+            except Exception:
+                _LOGGER.exception('Unhandled exception in waveform callback')
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import typing
+
+from pylinkam import interface, sdk
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WriterStatistics(typing.NamedTuple):
+    """ Counters describing write-behind activity. """
+
+    requested: int
+    written: int
+    coalesced: int
+    failed: int
+
+
+class CoalescingWriter:
+    """ Write-behind layer for set-points. Updates are queued without blocking the caller and bursts of updates to the
+    same parameter are coalesced so that only the latest value is sent, at no more than a maximum rate per
+    parameter. """
+
+    def __init__(self, connection: sdk.SDKWrapper.Connection, max_rate: float = 10.0,
+                 rates: typing.Optional[typing.Mapping[interface.StageValueType, float]] = None):
+        """ Create new writer and start the background thread.
+
+        :param connection: connection to write to
+        :param max_rate: default maximum number of writes per second for each parameter
+        :param rates: optional per-parameter overrides of max_rate
+        """
+        if max_rate <= 0:
+            raise ValueError('Maximum write rate must be positive')
+
+        self._connection = connection
+        self._max_rate = max_rate
+        self._rates = dict(rates or {})
+
+        self._condition = threading.Condition()
+        self._pending: typing.Dict[interface.StageValueType, typing.Any] = {}
+        self._last_write: typing.Dict[interface.StageValueType, float] = {}
+        self._in_flight = 0
+        self._closed = False
+
+        self._requested = 0
+        self._written = 0
+        self._coalesced = 0
+        self._failed = 0
+
+        self._thread = threading.Thread(target=self._run, name='pylinkam-writer', daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> CoalescingWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def statistics(self) -> WriterStatistics:
+        with self._condition:
+            return WriterStatistics(self._requested, self._written, self._coalesced, self._failed)
+
+    def set_rate(self, value_type: interface.StageValueType, max_rate: float) -> None:
+        """ Set maximum write rate for a single parameter.
+
+        :param value_type: parameter
+        :param max_rate: maximum number of writes per second
+        """
+        if max_rate <= 0:
+            raise ValueError('Maximum write rate must be positive')
+
+        with self._condition:
+            self._rates[value_type] = max_rate
+            self._condition.notify_all()
+
+    def set_value(self, value_type: interface.StageValueType, n: typing.Any) -> None:
+        """ Queue a new value, replacing any value for the same parameter that has not yet been sent.
+
+        :param value_type: parameter to write
+        :param n: new value, checked and converted before it is queued
+        :raises ValueError: if the parameter cannot be written
+        :raises TypeError: if the value is not compatible with the parameter
+        """
+        n = sdk.convert_value(value_type, n)
+
+        with self._condition:
+            if self._closed:
+                raise sdk.SDKError('Writer is closed')
+
+            self._requested += 1
+
+            if value_type in self._pending:
+                self._coalesced += 1
+
+            self._pending[value_type] = n
+            self._condition.notify_all()
+
+    def flush(self, timeout: typing.Optional[float] = None) -> bool:
+        """ Wait until all queued values have been sent.
+
+        :param timeout: maximum time to wait in seconds
+        :return: True if all values were sent, False on timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self._pending) == 0 and self._in_flight == 0, timeout)
+
+    def close(self, flush: bool = True, timeout: typing.Optional[float] = None) -> None:
+        """ Stop background thread.
+
+        :param flush: if True send queued values before stopping, otherwise discard them
+        :param timeout: maximum time to wait for queued values to be sent
+        """
+        if flush:
+            self.flush(timeout)
+
+        with self._condition:
+            self._closed = True
+            self._pending.clear()
+            self._condition.notify_all()
+
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _interval(self, value_type: interface.StageValueType) -> float:
+        return 1 / self._rates.get(value_type, self._max_rate)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+
+                    now = time.monotonic()
+                    next_due: typing.Optional[float] = None
+                    ready = {}
+
+                    for value_type, n in self._pending.items():
+                        due = self._last_write.get(value_type, -float('inf')) + self._interval(value_type)
+
+                        if due <= now:
+                            ready[value_type] = n
+                        elif next_due is None or due < next_due:
+                            next_due = due
+
+                    if len(ready) > 0:
+                        break
+
+                    self._condition.wait(None if next_due is None else next_due - now)
+
+                for value_type in ready:
+                    del self._pending[value_type]
+                    self._last_write[value_type] = now
+
+                self._in_flight = len(ready)
+
+            for value_type, n in ready.items():
+                result = False
+
+                try:
+                    result = self._connection.set_value(value_type, n)
+
+                    if not result:
+                        _LOGGER.warning(f"Controller rejected {value_type.name} value {n!r}")
+                except Exception:
+                    # Keep the thread alive, a failed write must not leave flush() waiting forever
+                    _LOGGER.exception(f"Error while writing {value_type.name}")
+                finally:
+                    with self._condition:
+                        if result:
+                            self._written += 1
+                        else:
+                            self._failed += 1
+
+                        self._in_flight -= 1
+                        self._condition.notify_all()
@@ -28,6 +28,9 @@ setup(
     maintainer=maintainer,
     maintainer_email=maintainer_email,
     packages=find_packages(),
+    extras_require={
+        'numpy': ['numpy']
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
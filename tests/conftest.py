@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pylinkam import sdk
+
+# Controller data rate used by tests in milliseconds, fast enough to keep polling tests short
+DATA_RATE = 10
+
+
+@pytest.fixture
+def wrapper():
+    wrapper = sdk.SDKWrapper(sdk_bin_name=sdk.SIMULATOR_BIN_NAME)
+    wrapper.open()
+
+    yield wrapper
+
+    wrapper.close()
+
+
+@pytest.fixture
+def simulator(wrapper):
+    simulator = wrapper.sdk
+    simulator.data_rate = DATA_RATE
+
+    return simulator
+
+
+@pytest.fixture
+def connection(wrapper, simulator):
+    connection = wrapper.connect_usb()
+
+    yield connection
+
+    connection.close()
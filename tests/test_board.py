@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import math
+import threading
+
+import pytest
+
+from pylinkam import board, interface, poll
+
+CHANNELS = (interface.StageValueType.HEATER1_TEMP, interface.StageValueType.HEATER_SETPOINT)
+
+
+@pytest.fixture
+def publisher():
+    publisher = board.LatestValueBoard.create(CHANNELS)
+
+    yield publisher
+
+    publisher.close()
+
+
+def test_nothing_published(publisher):
+    assert publisher.read() is None
+    assert math.isnan(publisher.get(interface.StageValueType.HEATER1_TEMP))
+
+
+def test_publish_and_attach(publisher):
+    status = interface.ControllerStatus()
+    status.flags.heater1Started = 1
+
+    publisher.publish(poll.Sample(1.5, {interface.StageValueType.HEATER1_TEMP: 30.0}, status))
+
+    with board.LatestValueBoard.attach(publisher.name) as reader:
+        sample = reader.read()
+
+        assert reader.value_types == CHANNELS
+        assert sample.timestamp == 1.5
+        assert sample.values[interface.StageValueType.HEATER1_TEMP] == 30.0
+        assert math.isnan(sample.values[interface.StageValueType.HEATER_SETPOINT])
+        assert sample.status.flags.heater1Started
+        assert reader.get(interface.StageValueType.HEATER1_TEMP) == 30.0
+
+
+def test_invalid_sample_leaves_board_readable(publisher):
+    publisher.publish(poll.Sample(1.0, {interface.StageValueType.HEATER1_TEMP: 30.0}))
+
+    with pytest.raises((TypeError, ValueError)):
+        publisher.publish(poll.Sample(2.0, {interface.StageValueType.HEATER1_TEMP: 'hot'}))
+
+    sample = publisher.read(timeout=0.01)
+
+    assert sample.timestamp == 1.0
+    assert sample.values[interface.StageValueType.HEATER1_TEMP] == 30.0
+
+
+def test_readers_never_see_torn_samples(publisher):
+    stop = threading.Event()
+
+    def publish():
+        n = 0
+
+        while not stop.is_set():
+            n += 1
+            publisher.publish(poll.Sample(float(n), {channel: float(n) for channel in CHANNELS}))
+
+    thread = threading.Thread(target=publish)
+    thread.start()
+
+    try:
+        with board.LatestValueBoard.attach(publisher.name) as reader:
+            for _ in range(2000):
+                sample = reader.read(timeout=1.0)
+
+                if sample is not None:
+                    assert all(value == sample.timestamp for value in sample.values.values())
+    finally:
+        stop.set()
+        thread.join()
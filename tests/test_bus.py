@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from pylinkam import bus, interface, poll
+
+
+def _publish(shared, count):
+    # Deliver samples directly rather than through the polling thread so that queue contents are deterministic
+    for n in range(count):
+        shared._publish(poll.Sample(float(n), {interface.StageValueType.HEATER1_TEMP: n}))
+
+
+def _timestamps(subscription):
+    timestamps = []
+
+    while True:
+        sample = subscription.get_nowait()
+
+        if sample is None:
+            return timestamps
+
+        timestamps.append(sample.timestamp)
+
+
+def test_subscribers_receive_own_channels(connection):
+    with bus.Bus(connection) as shared:
+        temperature = shared.subscribe([interface.StageValueType.HEATER1_TEMP], status=True)
+        setpoint = shared.subscribe([interface.StageValueType.HEATER_SETPOINT])
+
+        first = temperature.get(timeout=5)
+        second = setpoint.get(timeout=5)
+
+    assert set(first.values) == {interface.StageValueType.HEATER1_TEMP}
+    assert first.status is not None
+    assert set(second.values) == {interface.StageValueType.HEATER_SETPOINT}
+    assert second.status is None
+
+    # Timing uncertainty survives filtering
+    assert first.uncertainty > 0
+    assert second.uncertainty > 0
+
+
+def test_drop_oldest(connection):
+    shared = bus.Bus(connection)
+    fast = shared.subscribe([interface.StageValueType.HEATER1_TEMP])
+    slow = shared.subscribe([interface.StageValueType.HEATER1_TEMP], maxsize=2,
+                            backpressure=bus.Backpressure.DROP_OLDEST)
+
+    _publish(shared, 5)
+
+    # Slow subscriber keeps the most recent samples without holding up the others
+    assert _timestamps(slow) == [3.0, 4.0]
+    assert (slow.delivered, slow.dropped) == (5, 3)
+    assert _timestamps(fast) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert fast.dropped == 0
+
+
+def test_drop_newest(connection):
+    shared = bus.Bus(connection)
+    fast = shared.subscribe([interface.StageValueType.HEATER1_TEMP])
+    slow = shared.subscribe([interface.StageValueType.HEATER1_TEMP], maxsize=2,
+                            backpressure=bus.Backpressure.DROP_NEWEST)
+
+    _publish(shared, 5)
+
+    assert _timestamps(slow) == [0.0, 1.0]
+    assert (slow.delivered, slow.dropped) == (2, 3)
+    assert _timestamps(fast) == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_block(connection):
+    shared = bus.Bus(connection)
+    slow = shared.subscribe([interface.StageValueType.HEATER1_TEMP], maxsize=1, backpressure=bus.Backpressure.BLOCK)
+    received = []
+
+    def consume():
+        for _ in range(5):
+            time.sleep(0.02)
+            received.append(slow.get(timeout=5).timestamp)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+
+    start = time.monotonic()
+    _publish(shared, 5)
+    duration = time.monotonic() - start
+
+    consumer.join(5)
+
+    # Publishing waits for the slow subscriber so every sample arrives
+    assert received == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert (slow.delivered, slow.dropped) == (5, 0)
+    assert duration >= 0.06
+
+
+def test_block_timeout(connection):
+    shared = bus.Bus(connection)
+    slow = shared.subscribe([interface.StageValueType.HEATER1_TEMP], maxsize=1, backpressure=bus.Backpressure.BLOCK,
+                            block_timeout=0.01)
+
+    _publish(shared, 3)
+
+    assert _timestamps(slow) == [0.0]
+    assert (slow.delivered, slow.dropped) == (1, 2)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from pylinkam import capabilities, interface
+
+
+def _capabilities(controller_flags=(), stage_flags=()):
+    controller_config = interface.ControllerConfig()
+    stage_config = interface.StageConfig()
+
+    for flag in controller_flags:
+        setattr(controller_config.flags, flag, 1)
+
+    for flag in stage_flags:
+        setattr(stage_config.flags, flag, 1)
+
+    return capabilities.Capabilities(controller_config, stage_config)
+
+
+def test_features_from_flags():
+    caps = _capabilities(('supportsHeater', 'lnpDualReady'), ('heater1', 'supportsHumidity'))
+
+    # Any one of the flags listed for a feature on either the controller or stage is enough
+    assert caps.features == frozenset(('heater', 'lnp', 'humidity'))
+    assert _capabilities().features == frozenset()
+
+
+def test_supports_value():
+    caps = _capabilities(('supportsHeater',), ('heater1',))
+
+    assert caps.supports_value(interface.StageValueType.HEATER1_TEMP)
+    assert not caps.supports_value(interface.StageValueType.HEATER2_TEMP)
+    assert not caps.supports_value(interface.StageValueType.HUMIDITY)
+
+    # Matched by the more specific LNP rule before the general heater rule
+    assert not caps.supports_value(interface.StageValueType.HEATER1_LNP_SPEED)
+    assert _capabilities(('lnpReady',)).supports_value(interface.StageValueType.HEATER1_LNP_SPEED)
+
+    # Values not covered by any rule are assumed to be supported
+    assert caps.supports_value(interface.StageValueType.TRIGGER_SIGNAL_PULSE_WIDTH)
+
+
+def test_simulator_capabilities(connection, simulator):
+    caps = connection.get_capabilities()
+
+    assert caps.features == frozenset(('heater', 'motor_x', 'motor_y', 'motor_z'))
+    assert connection.get_capabilities() is caps
+    assert simulator.messages[interface.Message.GET_CONTROLLER_CONFIG] == 1
+    assert simulator.messages[interface.Message.GET_STAGE_CONFIG] == 1
+
+
+def test_prune(connection, simulator):
+    value_types = [
+        interface.StageValueType.HEATER1_TEMP,
+        interface.StageValueType.HUMIDITY,
+        interface.StageValueType.MOTOR_POS_X,
+        interface.StageValueType.DSC_POWER_TERM1,
+        interface.StageValueType.HEATER_SETPOINT
+    ]
+
+    assert connection.get_capabilities().prune(value_types) == [
+        interface.StageValueType.HEATER1_TEMP,
+        interface.StageValueType.MOTOR_POS_X,
+        interface.StageValueType.HEATER_SETPOINT
+    ]
+
+    simulator.messages.clear()
+
+    values = connection.get_values(value_types, prune=True)
+
+    assert list(values) == connection.get_capabilities().prune(value_types)
+    assert simulator.messages == {interface.Message.GET_VALUE: 3}
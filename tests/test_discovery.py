@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from pylinkam import discovery, interface, sdk
+
+
+def _wait_closed(simulator):
+    deadline = time.monotonic() + 5
+
+    while simulator.messages.get(interface.Message.CLOSE_COMMS, 0) < simulator.messages.get(
+            interface.Message.OPEN_COMMS, 0) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_discover_default_device(wrapper, simulator):
+    results = discovery.discover(wrapper, serial_numbers=(None,))
+
+    assert len(results) == 1
+    assert results[0].found
+    assert results[0].error is None
+    assert results[0].controller_name is not None
+
+
+def test_unknown_transport():
+    with pytest.raises(ValueError):
+        discovery.probe(None, 'bluetooth', None)
+
+
+def test_probes_timed_individually(wrapper, simulator):
+    release = threading.Event()
+    opened = []
+
+    def latency(message, handle):
+        if message == interface.Message.OPEN_COMMS:
+            opened.append(None)
+
+            # Only the first probe hangs
+            if len(opened) == 1:
+                release.wait(5)
+
+        return 0.0
+
+    simulator.latency = latency
+
+    try:
+        start = time.monotonic()
+        results = discovery.discover(wrapper, serial_numbers=('a', 'b', 'c'), timeout=0.3, max_workers=1)
+        elapsed = time.monotonic() - start
+    finally:
+        release.set()
+        _wait_closed(simulator)
+
+    assert [result.found for result in results] == [False, True, True]
+    assert results[0].error == 'Timeout'
+    assert results[0].duration == pytest.approx(0.3, abs=0.1)
+    assert all(result.duration < 0.3 for result in results[1:])
+    assert elapsed < 1.0
+
+
+def test_probes_overlap_with_call_deadline():
+    wrapper = sdk.SDKWrapper(sdk_bin_name=sdk.SIMULATOR_BIN_NAME, call_timeout=1.0)
+
+    try:
+        wrapper.sdk.latency = lambda message, handle: 0.2 if message == interface.Message.OPEN_COMMS else 0.0
+
+        start = time.monotonic()
+        results = discovery.discover(wrapper, serial_numbers=('a', 'b', 'c', 'd'))
+
+        assert all(result.found for result in results)
+        assert time.monotonic() - start < 0.6
+    finally:
+        wrapper.close()
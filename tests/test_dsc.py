@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+from pylinkam import dsc, interface
+
+numpy = pytest.importorskip('numpy')
+
+
+@pytest.fixture
+def dsc_simulator(simulator):
+    simulator.values.update({
+        interface.StageValueType.HEATER1_TEMP: 20.0,
+        interface.StageValueType.DSC: 3,
+        interface.StageValueType.DSC_POWER: 50.0
+    })
+
+    return simulator
+
+
+def test_send_and_read_baseline(connection, dsc_simulator):
+    dsc.send_baseline(connection, [1.0, 0.5])
+
+    assert dsc.get_baseline(connection) == pytest.approx([1.0, 0.5, 0.0, 0.0, 0.0])
+    assert dsc_simulator.messages[interface.Message.SEND_DSC_BASELINE_POWER_VALUES] == 1
+
+    with pytest.raises(ValueError):
+        dsc.send_gains(connection, [1.0, 2.0, 3.0, 4.0])
+
+
+def test_acquisition_blocks(connection, dsc_simulator):
+    blocks = []
+    event = threading.Event()
+
+    def callback(block):
+        blocks.append(block)
+
+        if len(blocks) >= 2:
+            event.set()
+
+    with dsc.DSCAcquisition(connection, baseline=[1.0, 0.5], batch_size=4, callback=callback) as acquisition:
+        assert event.wait(5)
+
+    data = acquisition.get_data()
+
+    assert set(data) == set(dsc.DSCAcquisition.FIELDS)
+    assert len(acquisition) == len(data['timestamp']) >= 8
+    assert all(len(block['timestamp']) == 4 for block in blocks[:2])
+    assert numpy.all(numpy.diff(data['timestamp']) > 0)
+    assert data['heat_flow'] == pytest.approx(numpy.full(len(acquisition), 50.0 - (1.0 + 0.5 * 20.0)))
+
+    acquisition.set_baseline([2.0])
+
+    assert acquisition.get_data()['heat_flow'] == pytest.approx(numpy.full(len(acquisition), 48.0))
+
+    acquisition.clear()
+
+    assert len(acquisition) == 0
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import pytest
+
+from pylinkam import interface, inventory
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return inventory.InventoryCache(str(tmp_path))
+
+
+def _rebuilt(simulator):
+    # Rebuilding reads the configuration, a cache hit only reads identifying strings
+    return interface.Message.GET_CONTROLLER_CONFIG in simulator.messages
+
+
+def test_cache_hit(cache, connection, simulator):
+    first = cache.get(connection)
+
+    assert _rebuilt(simulator)
+    assert os.listdir(cache.path) == ['SIM000001.json']
+
+    simulator.messages.clear()
+    second = cache.get(connection)
+
+    assert not _rebuilt(simulator)
+    assert interface.Message.GET_MIN_VALUE not in simulator.messages
+    assert second == first
+
+    minimum, maximum = second.get_value_range(interface.StageValueType.HEATER_SETPOINT)
+
+    assert getattr(minimum, 'magnitude', minimum) == pytest.approx(-196.0)
+    assert getattr(maximum, 'magnitude', maximum) == pytest.approx(600.0)
+    assert second.get_capabilities().features == connection.get_capabilities().features
+
+
+@pytest.mark.parametrize('message', [
+    interface.Message.GET_CONTROLLER_FIRMWARE_VERSION,
+    interface.Message.GET_STAGE_SERIAL
+])
+def test_invalidated_on_mismatch(cache, connection, simulator, message):
+    cache.get(connection)
+
+    simulator.strings[message] = 'changed'
+    simulator.messages.clear()
+
+    rebuilt = cache.get(connection)
+
+    assert _rebuilt(simulator)
+    assert 'changed' in (rebuilt.controller_firmware_version, rebuilt.stage_serial)
+
+    # Rebuilt inventory replaces the stored one
+    assert cache.load('SIM000001') == rebuilt
+
+
+def test_invalidate(cache, connection, simulator):
+    cache.get(connection)
+    cache.invalidate('SIM000001')
+    cache.invalidate('SIM000001')
+
+    assert cache.load('SIM000001') is None
+
+
+def test_unreadable_file_discarded(cache, connection):
+    stored = cache.get(connection)
+
+    with open(os.path.join(cache.path, 'SIM000001.json'), 'w') as f:
+        f.write('{"format": 1, "inventory": {')
+
+    assert cache.load('SIM000001') is None
+    assert cache.get(connection) == stored
+
+
+def test_atomic_write(cache, connection, monkeypatch):
+    stored = cache.get(connection)
+    filename = os.path.join(cache.path, 'SIM000001.json')
+
+    with open(filename) as f:
+        content = f.read()
+
+    def failed_dump(obj, f, **kwargs):
+        f.write('{"format": 1, ')
+        raise OSError('Disk full')
+
+    monkeypatch.setattr(inventory.json, 'dump', failed_dump)
+
+    with pytest.raises(OSError):
+        cache.save(stored._replace(controller_name='Partial'))
+
+    # Previous file is untouched and the temporary file is removed
+    with open(filename) as f:
+        assert f.read() == content
+
+    assert os.listdir(cache.path) == ['SIM000001.json']
+    assert json.loads(content)['inventory']['controller_name'] == stored.controller_name
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+from pylinkam import interface, poll
+
+
+@pytest.mark.parametrize('period, interval, expected', [
+    (None, 0.1, 0.1),
+    (1.0, 0.1, 1.0),
+    (0.26, 0.1, 0.3),
+    (0.01, 0.1, 0.1),
+    (0.5, None, 0.5),
+    (0.5, 0.0, 0.5)
+])
+def test_align_period(period, interval, expected):
+    assert poll.align_period(period, interval) == pytest.approx(expected)
+
+
+def test_align_period_requires_period_when_interval_unknown():
+    with pytest.raises(ValueError):
+        poll.align_period(None, None)
+
+
+def test_period_aligned_to_data_rate(connection, simulator):
+    simulator.data_rate = 20
+
+    poller = poll.Poller(connection, [interface.StageValueType.HEATER1_TEMP], period=0.065)
+
+    assert poller.period == pytest.approx(0.06)
+
+
+def test_poll_sample(connection, simulator):
+    simulator.values[interface.StageValueType.HEATER1_TEMP] = 42.0
+
+    poller = poll.Poller(connection, [interface.StageValueType.HEATER1_TEMP], include_status=True)
+    sample = poller.poll()
+
+    value = sample.values[interface.StageValueType.HEATER1_TEMP]
+
+    assert getattr(value, 'magnitude', value) == pytest.approx(42.0)
+    assert sample.status is not None
+    assert sample.uncertainty >= 0
+    assert poller.latest is sample
+
+
+def test_background_polling(connection):
+    received = []
+    event = threading.Event()
+
+    def callback(sample):
+        received.append(sample)
+
+        if len(received) >= 5:
+            event.set()
+
+    with poll.Poller(connection, [interface.StageValueType.HEATER1_TEMP], callback=callback) as poller:
+        assert event.wait(5)
+        assert poller.running
+
+    assert not poller.running
+    assert all(b.timestamp > a.timestamp for a, b in zip(received, received[1:]))
+
+
+def test_polling_survives_unexpected_errors(connection, monkeypatch):
+    calls = []
+    event = threading.Event()
+    get_values_timed = connection.get_values_timed
+
+    def failing(*args, **kwargs):
+        calls.append(None)
+
+        if len(calls) == 1:
+            raise TypeError('Unexpected error')
+
+        event.set()
+
+        return get_values_timed(*args, **kwargs)
+
+    monkeypatch.setattr(connection, 'get_values_timed', failing)
+
+    with poll.Poller(connection, [interface.StageValueType.HEATER1_TEMP]) as poller:
+        assert event.wait(5)
+        assert poller.running
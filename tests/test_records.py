@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import ctypes
+
+import pytest
+
+from pylinkam import interface, records
+
+numpy = pytest.importorskip('numpy')
+
+
+@pytest.mark.parametrize('struct_type', [
+    interface.ControllerConfig,
+    interface.ControllerStatus,
+    interface.HeaterDetails,
+    interface.RHUnit,
+    interface.Running,
+    interface.StageConfig
+])
+def test_dtype_matches_struct_size(struct_type):
+    assert records.get_dtype(struct_type).itemsize == ctypes.sizeof(struct_type)
+
+
+def test_from_buffer():
+    state = interface.Running()
+    state.timeLeft = 12.5
+    state.pwm = 40.0
+    state.dllStatus.flags.heater1Started = 1
+
+    array = records.from_buffer(interface.Running, state)
+
+    assert array.shape == (1,)
+    assert array['timeLeft'][0] == pytest.approx(12.5)
+    assert array['pwm'][0] == pytest.approx(40.0)
+    assert array['dllStatus'][0] == state.dllStatus.value
+
+
+def test_unpack_flags():
+    status = interface.ControllerStatus()
+    status.flags.controllerError = 1
+    status.flags.heater1Started = 1
+
+    flags = records.unpack_flags(interface.ControllerStatusFlags, [status.value, 0])
+
+    assert flags['controllerError'].tolist() == [True, False]
+    assert flags['heater1Started'].tolist() == [True, False]
+    assert flags['heater1RampSetPoint'].tolist() == [False, False]
+    assert flags['controllerError'].dtype == bool
+
+
+def test_record_buffer_growth():
+    buffer = records.RecordBuffer(interface.HeaterDetails, capacity=1)
+
+    for n in range(5):
+        details = interface.HeaterDetails()
+        details.maxRate = float(n)
+        buffer.append(details)
+
+    assert len(buffer) == 5
+    assert buffer.records['maxRate'].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    with pytest.raises(records.RecordError):
+        buffer.append(interface.Running())
+
+
+def test_column_buffer_growth():
+    buffer = records.ColumnBuffer(('a', 'b'), capacity=2)
+
+    buffer.extend({'a': [1.0, 2.0, 3.0], 'b': [4.0, 5.0, 6.0]})
+    buffer.extend({'a': numpy.arange(10.0), 'b': numpy.zeros(10)})
+
+    assert len(buffer) == 13
+    assert buffer.fields == ('a', 'b')
+
+    data = buffer.to_dict()
+
+    assert data['a'][:3].tolist() == [1.0, 2.0, 3.0]
+    assert data['a'][3:].tolist() == list(numpy.arange(10.0))
+    assert data['b'][:3].tolist() == [4.0, 5.0, 6.0]
+
+    # Copies are not affected by later changes to the buffer
+    buffer.view('a')[0] = -1.0
+
+    assert data['a'][0] == 1.0
+    assert buffer.view('a')[0] == -1.0
+
+    with pytest.raises(records.RecordError):
+        buffer.extend({'a': [1.0], 'b': [1.0, 2.0]})
+
+    buffer.clear()
+
+    assert len(buffer) == 0
+    assert buffer.to_dict()['a'].size == 0
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+
+import pytest
+
+from pylinkam import interface, remote, sdk, timing
+
+
+@pytest.fixture
+def server_port(connection):
+    loop = asyncio.new_event_loop()
+    server = remote.RemoteServer(connection)
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    asyncio.run_coroutine_threadsafe(server.start_tcp(), loop).result(5)
+
+    yield server.sockets[0].getsockname()[1]
+
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+@pytest.fixture
+def client(server_port):
+    client = remote.RemoteConnection(port=server_port, timeout=5)
+
+    yield client
+
+    client.close()
+
+
+def test_encode_round_trip():
+    status = interface.ControllerStatus()
+    status.flags.heater1Started = 1
+
+    value = {
+        interface.StageValueType.HEATER1_TEMP: timing.Reading(25.0, 100.0, 1.0, 0.001),
+        'status': status,
+        'pair': (1, 'a')
+    }
+
+    decoded = remote.decode(remote.encode(value))
+
+    assert type(decoded[interface.StageValueType.HEATER1_TEMP]) is timing.Reading
+    assert decoded[interface.StageValueType.HEATER1_TEMP] == value[interface.StageValueType.HEATER1_TEMP]
+    assert decoded['status'].flags.heater1Started
+    assert decoded['pair'] == (1, 'a')
+
+
+def test_timed_reading_over_localhost(client, simulator):
+    simulator.values[interface.StageValueType.HEATER1_TEMP] = 42.0
+
+    reading = client.get_value_timed(interface.StageValueType.HEATER1_TEMP)
+
+    assert isinstance(reading, timing.Reading)
+    assert getattr(reading.value, 'magnitude', reading.value) == pytest.approx(42.0)
+    assert reading.uncertainty >= 0
+
+    readings = client.get_values_timed([interface.StageValueType.HEATER1_TEMP])
+
+    assert isinstance(readings[interface.StageValueType.HEATER1_TEMP], timing.Reading)
+
+
+def test_calls_over_localhost(client, simulator):
+    assert client.set_value(interface.StageValueType.HEATER_SETPOINT, 50.0)
+    assert getattr(simulator.values[interface.StageValueType.HEATER_SETPOINT], 'magnitude',
+                   simulator.values[interface.StageValueType.HEATER_SETPOINT]) == pytest.approx(50.0)
+
+    futures = [client.submit('get_data_rate') for _ in range(3)]
+
+    assert [future.result(5) for future in futures] == [simulator.data_rate] * 3
+
+
+def test_errors_keep_type(client, simulator):
+    simulator.rejected.add(interface.Message.SET_TRIGGER_SIGNAL_PULSE)
+
+    with pytest.raises(sdk.SDKError) as exc_info:
+        client.send_trigger_pulse(interface.TriggerSignal.BLUE)
+
+    assert type(exc_info.value) is sdk.SDKError
+
+    simulator.rejected.clear()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+from pylinkam import interface, resilient, sdk
+
+
+def _magnitude(value):
+    return getattr(value, 'magnitude', value)
+
+
+def _disconnect(simulator, duration=0.1):
+    simulator.connected = False
+
+    timer = threading.Timer(duration, setattr, (simulator, 'connected', True))
+    timer.start()
+
+    return timer
+
+
+@pytest.fixture
+def proxy(wrapper, simulator):
+    proxy = resilient.ResilientConnection(wrapper, initial_backoff=0.02, max_backoff=0.05)
+
+    yield proxy
+
+    proxy.close()
+
+
+def test_unprocessed_message_reported(connection, simulator):
+    simulator.connected = False
+
+    connection.get_value(interface.StageValueType.HEATER1_TEMP)
+
+    assert not connection.get_last_processed()
+
+    simulator.connected = True
+
+    connection.get_value(interface.StageValueType.HEATER1_TEMP)
+
+    assert connection.get_last_processed()
+
+
+def test_rejected_message_does_not_raise(connection, simulator):
+    simulator.rejected.add(interface.Message.SET_VALUE)
+
+    assert not connection.set_value(interface.StageValueType.HEATER_SETPOINT, 50.0)
+    assert not connection.get_last_processed()
+
+
+def test_rejected_message_does_not_reconnect(proxy, simulator):
+    simulator.rejected.add(interface.Message.SET_VALUE)
+
+    assert not proxy.set_value(interface.StageValueType.HEATER_SETPOINT, 50.0)
+    assert proxy.reconnects == 0
+
+
+def test_lost_connection_gives_up(wrapper, simulator):
+    proxy = resilient.ResilientConnection(wrapper, initial_backoff=0.01, max_attempts=2)
+
+    try:
+        simulator.connected = False
+
+        with pytest.raises(sdk.ControllerConnectError):
+            proxy.get_value(interface.StageValueType.HEATER1_TEMP)
+
+        assert proxy.reconnects == 0
+    finally:
+        proxy.close()
+
+
+def test_read_retried_after_reconnect(proxy, simulator):
+    simulator.values[interface.StageValueType.HEATER1_TEMP] = 42.0
+
+    _disconnect(simulator)
+
+    value = proxy.get_value(interface.StageValueType.HEATER1_TEMP)
+
+    assert _magnitude(value) == pytest.approx(42.0)
+    assert proxy.reconnects == 1
+
+
+def test_write_not_replayed(proxy, simulator):
+    _disconnect(simulator)
+
+    with pytest.raises(sdk.ConnectionLostError):
+        proxy.set_value(interface.StageValueType.HEATER_SETPOINT, 50.0)
+
+    # Connection is re-established but the set-point is left for the caller to decide on
+    assert proxy.connected
+    assert proxy.reconnects == 1
+    assert _magnitude(simulator.values[interface.StageValueType.HEATER_SETPOINT]) == pytest.approx(25.0)
+
+
+def test_setpoints_restored(proxy, simulator):
+    assert proxy.set_value(interface.StageValueType.HEATER_SETPOINT, 50.0)
+
+    _disconnect(simulator)
+    simulator.values[interface.StageValueType.HEATER_SETPOINT] = 25.0
+
+    proxy.get_value(interface.StageValueType.HEATER1_TEMP)
+
+    assert proxy.reconnects == 1
+    assert _magnitude(simulator.values[interface.StageValueType.HEATER_SETPOINT]) == pytest.approx(50.0)
+
+
+def test_controller_comms_error_triggers_reconnect(proxy, simulator):
+    simulator.controller_error = interface.ControllerErrorCode.COMMS_ERROR
+
+    with pytest.raises(sdk.ConnectionLostError):
+        proxy.get_status()
+
+    assert proxy.reconnects == 1
+
+    simulator.controller_error = interface.ControllerErrorCode.NONE
+
+    assert not proxy.get_status().flags.controllerError
+    assert proxy.get_controller_error() == interface.ControllerErrorCode.NONE
+
+
+def test_other_controller_errors_ignored(proxy, simulator):
+    simulator.controller_error = interface.ControllerErrorCode.T95_FAN_NOT_WORKING
+
+    assert proxy.get_status().flags.controllerError
+    assert proxy.reconnects == 0
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pylinkam import interface, poll, retention
+
+
+def test_raw_window_expiry():
+    store = retention.TieredRetention(raw_window=10.0, tiers=())
+
+    for timestamp in range(30):
+        store.append(float(timestamp), timestamp)
+
+    assert [timestamp for timestamp, _ in store.raw()] == list(range(19, 30))
+
+
+def test_zero_raw_capacity_rejected():
+    with pytest.raises(ValueError):
+        retention.TieredRetention(raw_capacity=0)
+
+
+def test_tier_aggregates():
+    store = retention.TieredRetention(raw_window=1.0, tiers=((10.0, 10),))
+
+    for timestamp in range(25):
+        store.append(float(timestamp), timestamp)
+
+    buckets = store.tier(10.0)
+
+    assert [(bucket.start, bucket.count, bucket.minimum, bucket.maximum) for bucket in buckets] == [
+        (0.0, 10, 0.0, 9.0),
+        (10.0, 10, 10.0, 19.0),
+        (20.0, 5, 20.0, 24.0)
+    ]
+    assert buckets[0].mean == pytest.approx(4.5)
+
+
+def test_query_falls_back_to_coarser_tier():
+    store = retention.TieredRetention(raw_window=5.0, tiers=((10.0, 100),))
+
+    for timestamp in range(50):
+        store.append(1.0, timestamp)
+
+    resolution, aggregates = store.query(0.0)
+
+    assert resolution == 10.0
+    assert aggregates[0].start == 0.0
+
+
+def test_publish_sample():
+    store = retention.ChannelRetention(raw_window=100.0)
+
+    for timestamp in range(3):
+        store.publish(poll.Sample(float(timestamp), {
+            interface.StageValueType.HEATER1_TEMP: 25.0 + timestamp,
+            interface.StageValueType.HEATER_SETPOINT: None
+        }))
+
+    assert store.channels == [interface.StageValueType.HEATER1_TEMP]
+    assert store[interface.StageValueType.HEATER1_TEMP].raw() == [(0.0, 25.0), (1.0, 26.0), (2.0, 27.0)]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pylinkam import interface, scan
+
+
+def test_grid_serpentine():
+    assert scan.grid(x=[0, 1, 2], y=[0, 1]) == [
+        {'y': 0.0, 'x': 0.0}, {'y': 0.0, 'x': 1.0}, {'y': 0.0, 'x': 2.0},
+        {'y': 1.0, 'x': 2.0}, {'y': 1.0, 'x': 1.0}, {'y': 1.0, 'x': 0.0}
+    ]
+    assert scan.grid(x=[0, 1], y=[0, 1], serpentine=False)[2] == {'y': 1.0, 'x': 0.0}
+    assert scan.grid() == []
+
+
+def test_unknown_axis_rejected(connection):
+    with pytest.raises(ValueError):
+        scan.Scanner(connection, [{'w': 1.0}])
+
+
+def test_scan_visits_points(connection, simulator):
+    points = scan.grid(x=[0.0, 20.0, 40.0], y=[0.0, 20.0])
+    setpoints = []
+
+    def callback(point):
+        # The next move is already under way when the callback runs
+        setpoints.append((simulator.values[interface.StageValueType.MOTOR_SETPOINT_X],
+                          simulator.values[interface.StageValueType.MOTOR_SETPOINT_Y]))
+
+    results = scan.Scanner(connection, points, tolerance=0.5, callback=callback).run()
+
+    assert [point.index for point in results] == list(range(len(points)))
+
+    for point, target in zip(results, points):
+        assert point.target == target
+        assert all(point.position[name] == pytest.approx(target[name], abs=0.5) for name in target)
+        assert interface.StageValueType.HEATER1_TEMP in point.values
+
+    assert [pytest.approx((target['x'], target['y'])) for target in points[1:]] == setpoints[:-1]
+    assert not simulator.motors
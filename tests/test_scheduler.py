@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from pylinkam import scheduler
+
+
+def _wait_for_waiters(lock, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+
+    while len(lock._waiters) < count:
+        assert time.monotonic() < deadline, 'Threads did not start waiting'
+        time.sleep(0.001)
+
+
+def _start_waiter(lock, priority, order, name):
+    def run():
+        with lock.hold(priority):
+            order.append(name)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+
+    return thread
+
+
+def test_priority_order():
+    lock = scheduler.PriorityLock()
+    order = []
+    threads = []
+
+    with lock.hold(scheduler.Priority.NORMAL):
+        # Arrive in the reverse of the order they should be served
+        for index, (priority, name) in enumerate((
+            (scheduler.Priority.BACKGROUND, 'background'),
+            (scheduler.Priority.NORMAL, 'normal 1'),
+            (scheduler.Priority.NORMAL, 'normal 2'),
+            (scheduler.Priority.SAFETY, 'safety')
+        )):
+            threads.append(_start_waiter(lock, priority, order, name))
+            _wait_for_waiters(lock, index + 1)
+
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ['safety', 'normal 1', 'normal 2', 'background']
+
+
+def test_reentrant():
+    lock = scheduler.PriorityLock()
+    order = []
+
+    lock.acquire(scheduler.Priority.BACKGROUND)
+    lock.acquire(scheduler.Priority.SAFETY)
+
+    thread = _start_waiter(lock, scheduler.Priority.SAFETY, order, 'other')
+    _wait_for_waiters(lock, 1)
+
+    lock.release()
+
+    # Still held by the outer acquisition
+    time.sleep(0.02)
+    assert order == []
+
+    lock.release()
+    thread.join(5)
+
+    assert order == ['other']
+
+    with pytest.raises(RuntimeError):
+        lock.release()
+
+
+def test_default_priority():
+    lock = scheduler.PriorityLock()
+
+    assert lock.default_priority == scheduler.Priority.NORMAL
+
+    with lock.priority(scheduler.Priority.BACKGROUND):
+        assert lock.default_priority == scheduler.Priority.BACKGROUND
+
+        # Default priority is per thread
+        other = []
+        thread = threading.Thread(target=lambda: other.append(lock.default_priority))
+        thread.start()
+        thread.join(5)
+
+        assert other == [scheduler.Priority.NORMAL]
+
+        with lock:
+            pass
+
+    assert lock.default_priority == scheduler.Priority.NORMAL
+    assert list(lock.get_statistics()) == [scheduler.Priority.BACKGROUND]
+
+
+def test_statistics():
+    lock = scheduler.PriorityLock()
+    order = []
+
+    with lock.hold(scheduler.Priority.CONTROL):
+        thread = _start_waiter(lock, scheduler.Priority.BACKGROUND, order, 'background')
+        _wait_for_waiters(lock, 1)
+
+        time.sleep(0.05)
+
+    thread.join(5)
+
+    with lock.hold(scheduler.Priority.BACKGROUND):
+        pass
+
+    statistics = lock.get_statistics()
+
+    assert list(statistics) == [scheduler.Priority.CONTROL, scheduler.Priority.BACKGROUND]
+    assert statistics[scheduler.Priority.CONTROL] == scheduler.QueueStatistics(1, 0.0, 0.0)
+
+    background = statistics[scheduler.Priority.BACKGROUND]
+
+    assert background.count == 2
+    assert background.max_delay >= 0.05
+    assert background.mean_delay == pytest.approx(background.total_delay / 2)
+
+    lock.reset_statistics()
+
+    assert lock.get_statistics() == {}
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from pylinkam import interface, sdk
+
+# Maximum time in seconds to import pylinkam.sdk in a fresh interpreter, several times the typical import time so that
+# slow machines pass while regressions such as eagerly importing pint or NumPy are caught
+IMPORT_BUDGET = 0.25
+
+_IMPORT_SCRIPT = '''
+import json, os, sys, time
+path = os.environ.get('PATH')
+start = time.perf_counter()
+import pylinkam.sdk
+duration = time.perf_counter() - start
+print(json.dumps({
+    'duration': duration,
+    'modules': [name for name in ('pint', 'numpy', 'concurrent.futures') if name in sys.modules],
+    'path_changed': os.environ.get('PATH') != path
+}))
+'''
+
+
+def _wrapper():
+    wrapper = sdk.SDKWrapper(sdk_bin_name=sdk.SIMULATOR_BIN_NAME)
+    wrapper.open()
+
+    return wrapper
+
+
+def test_library_shared_and_reference_counted():
+    first = _wrapper()
+    second = _wrapper()
+
+    library = first._library
+    exits = []
+    first.sdk.linkamExitSDK = lambda: exits.append(time.monotonic())
+
+    try:
+        assert first.sdk is second.sdk
+        assert first._library.references == 2
+
+        first.close()
+
+        assert exits == []
+        assert second._library.references == 1
+        assert second.get_version() == 'Simulator'
+    finally:
+        first.close()
+        second.close()
+
+    assert len(exits) == 1
+    assert library not in sdk._SharedLibrary.get_libraries()
+
+
+def test_exit_not_interleaved_with_init(monkeypatch):
+    events = []
+    load = sdk._SharedLibrary._load
+
+    def counted_load(*args):
+        events.append('load')
+
+        return load(*args)
+
+    monkeypatch.setattr(sdk._SharedLibrary, '_load', staticmethod(counted_load))
+
+    first = _wrapper()
+    exiting = threading.Event()
+
+    def slow_exit():
+        events.append('exit')
+        exiting.set()
+        time.sleep(0.1)
+        events.append('exited')
+
+    first.sdk.linkamExitSDK = slow_exit
+
+    closer = threading.Thread(target=first.close)
+    closer.start()
+
+    assert exiting.wait(5)
+
+    # Opened while the last reference is being released, must wait for exit to finish then initialise again
+    second = _wrapper()
+
+    closer.join(5)
+
+    try:
+        assert events == ['load', 'exit', 'exited', 'load']
+        assert second.sdk is not None
+    finally:
+        second.close()
+
+
+def _count_loads(monkeypatch, delay=0.0):
+    loads = []
+    load = sdk._SharedLibrary._load
+
+    def counted_load(*args):
+        loads.append(threading.current_thread().name)
+
+        # Widen the window in which other threads may attempt initialisation
+        time.sleep(delay)
+
+        return load(*args)
+
+    monkeypatch.setattr(sdk._SharedLibrary, '_load', staticmethod(counted_load))
+
+    return loads
+
+
+def test_concurrent_first_access_initialises_once(monkeypatch):
+    loads = _count_loads(monkeypatch, 0.05)
+
+    shared = sdk.SDKWrapper(sdk_bin_name=sdk.SIMULATOR_BIN_NAME)
+    separate = [sdk.SDKWrapper(sdk_bin_name=sdk.SIMULATOR_BIN_NAME) for _ in range(4)]
+    wrappers = [shared] * 4 + separate
+
+    barrier = threading.Barrier(len(wrappers))
+    libraries = []
+
+    def access(wrapper):
+        barrier.wait()
+        libraries.append(wrapper.sdk)
+
+    threads = [threading.Thread(target=access, args=(wrapper,)) for wrapper in wrappers]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join(5)
+
+    try:
+        assert len(loads) == 1
+        assert len(libraries) == len(wrappers)
+        assert all(library is libraries[0] for library in libraries)
+        assert shared._library.references == 1 + len(separate)
+    finally:
+        for wrapper in [shared] + separate:
+            wrapper.close()
+
+
+def test_preload(monkeypatch):
+    loads = _count_loads(monkeypatch)
+
+    wrapper = sdk.SDKWrapper(sdk_bin_name=sdk.SIMULATOR_BIN_NAME)
+
+    try:
+        future = wrapper.preload(ports=('COM1',))
+
+        assert future.result(5) is None
+        assert loads == ['pylinkam-preload']
+
+        with wrapper.connect() as connection:
+            assert connection.get_controller_serial()
+
+        assert len(loads) == 1
+    finally:
+        wrapper.close()
+
+
+def test_preload_error(monkeypatch):
+    def failed_load(*args):
+        raise sdk.SDKError('Failed to initialize Linkam SDK')
+
+    monkeypatch.setattr(sdk._SharedLibrary, '_load', staticmethod(failed_load))
+
+    wrapper = sdk.SDKWrapper(sdk_bin_name=sdk.SIMULATOR_BIN_NAME)
+    future = wrapper.preload()
+
+    assert isinstance(future.exception(5), sdk.SDKError)
+    assert wrapper._library is None
+
+
+def test_import_budget():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(sdk.__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (root, os.environ.get('PYTHONPATH')))))
+
+    # Best of several runs, the first may include filling the bytecode cache
+    runs = [
+        json.loads(subprocess.run([sys.executable, '-c', _IMPORT_SCRIPT], env=env, check=True, capture_output=True,
+                                  text=True).stdout)
+        for _ in range(3)
+    ]
+
+    assert all(run['modules'] == [] for run in runs)
+    assert not any(run['path_changed'] for run in runs)
+    assert min(run['duration'] for run in runs) < IMPORT_BUDGET
+
+
+def _magnitude(value):
+    return getattr(value, 'magnitude', value)
+
+
+def test_set_values_batch(connection, simulator):
+    results = connection.set_values({
+        interface.StageValueType.HEATER_SETPOINT: 50.0,
+        interface.StageValueType.HEATER_RATE: 12.5,
+        interface.StageValueType.RAMP_HOLD_TIME: 1000000.0
+    })
+
+    # Hold time is outside the simulated range so is rejected without affecting the other writes
+    assert results == {
+        interface.StageValueType.HEATER_SETPOINT: True,
+        interface.StageValueType.HEATER_RATE: True,
+        interface.StageValueType.RAMP_HOLD_TIME: False
+    }
+    assert _magnitude(simulator.values[interface.StageValueType.HEATER_SETPOINT]) == pytest.approx(50.0)
+    assert _magnitude(simulator.values[interface.StageValueType.HEATER_RATE]) == pytest.approx(12.5)
+    assert simulator.messages[interface.Message.SET_VALUE] == 3
+
+
+def test_set_values_verify_mismatch(connection, simulator):
+    set_value = simulator._set_value
+
+    # Controller applies a slightly different value to the one requested
+    simulator._set_value = lambda value_type, value: set_value(value_type, value + 0.01)
+
+    values = {interface.StageValueType.HEATER_SETPOINT: 50.0}
+
+    assert connection.set_values(values) == {interface.StageValueType.HEATER_SETPOINT: False}
+    assert connection.set_values(values, tolerance=0.1) == {interface.StageValueType.HEATER_SETPOINT: True}
+    assert connection.set_values(values, verify=False) == {interface.StageValueType.HEATER_SETPOINT: True}
+
+
+def test_set_values_invalid_writes_nothing(connection, simulator):
+    pint = pytest.importorskip('pint')
+
+    with pytest.raises(TypeError):
+        connection.set_values({
+            interface.StageValueType.HEATER_RATE: 12.5,
+            interface.StageValueType.HEATER_SETPOINT: pint.Quantity(50.0, 'meter')
+        })
+
+    assert interface.Message.SET_VALUE not in simulator.messages
+
+
+def test_composite_reads(connection, simulator):
+    simulator.values.update({
+        interface.StageValueType.HUMIDITY: 45.5,
+        interface.StageValueType.HUMIDITY_TEMP: 31.25,
+        interface.StageValueType.HUMIDITY_DRYING_TIME_LEFT: 120,
+        interface.StageValueType.HEATER1_POWER: 62.5,
+        interface.StageValueType.HEATER1_LNP_SPEED: 12.5
+    })
+
+    value_types = [
+        interface.StageValueType.HUMIDITY,
+        interface.StageValueType.HUMIDITY_TEMP,
+        interface.StageValueType.HUMIDITY_DRYING_TIME_LEFT,
+        interface.StageValueType.HEATER1_POWER,
+        interface.StageValueType.HEATER1_LNP_SPEED,
+        interface.StageValueType.HEATER1_TEMP
+    ]
+
+    simulator.messages.clear()
+
+    readings = connection.get_values_timed(value_types)
+
+    # One message for each composite structure plus one for the channel that is not part of either
+    assert simulator.messages == {
+        interface.Message.GET_VALUE: 2,
+        interface.Message.GET_PROGRAM_STATE: 1
+    }
+
+    # Channels read from the same structure share its timing
+    humidity = [readings[value_type] for value_type in value_types[:3]]
+    running = [readings[value_type] for value_type in value_types[3:5]]
+
+    assert all(reading.timestamp == humidity[0].timestamp for reading in humidity)
+    assert all(reading.timestamp == running[0].timestamp for reading in running)
+
+    for value_type in value_types:
+        assert _magnitude(readings[value_type].value) == pytest.approx(_magnitude(connection.get_value(value_type)))
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from pylinkam import interface, sdk, supervisor
+
+
+def test_call_with_deadline():
+    calls = supervisor.CallSupervisor()
+
+    assert calls.call(lambda a, b: a + b, 1, 2, timeout=1.0, key='a') == 3
+    assert calls.call(lambda: 4) == 4
+
+    with pytest.raises(ValueError):
+        calls.call(int, 'x', timeout=1.0, key='a')
+
+    assert calls.get_statistics().calls == 3
+
+
+def test_stall_scoped_to_key():
+    calls = supervisor.CallSupervisor()
+    release = threading.Event()
+
+    with pytest.raises(TimeoutError):
+        calls.call(release.wait, timeout=0.05, key='a')
+
+    assert calls.stalled
+    assert calls.is_stalled('a')
+    assert not calls.is_stalled('b')
+
+    with pytest.raises(supervisor.CallStalledError):
+        calls.call(lambda: None, timeout=1.0, key='a')
+
+    # Other keys and calls without a key use their own workers
+    assert calls.call(lambda: 'b', timeout=1.0, key='b') == 'b'
+    assert calls.call(lambda: 'none', timeout=1.0) == 'none'
+
+    release.set()
+
+    deadline = time.monotonic() + 5
+
+    while calls.stalled and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    statistics = calls.get_statistics()
+
+    assert not statistics.stalled
+    assert (statistics.timeouts, statistics.recovered) == (1, 1)
+    assert calls.call(lambda: 'a', timeout=1.0, key='a') == 'a'
+
+
+def test_idle_worker_restarted(monkeypatch):
+    monkeypatch.setattr(supervisor.CallSupervisor, 'IDLE_TIMEOUT', 0.01)
+
+    calls = supervisor.CallSupervisor()
+
+    for n in range(5):
+        assert calls.call(lambda: n, timeout=1.0, key='a') == n
+        time.sleep(0.02)
+
+
+def test_stalled_connection_does_not_block_others():
+    wrapper = sdk.SDKWrapper(sdk_bin_name=sdk.SIMULATOR_BIN_NAME, call_timeout=0.2)
+
+    try:
+        first = wrapper.connect_usb()
+        second = wrapper.connect_usb()
+
+        release = threading.Event()
+        hung = first._handle.value
+
+        def latency(message, handle):
+            if handle == hung and message == interface.Message.GET_VALUE:
+                release.wait(5)
+
+            return 0.0
+
+        wrapper.sdk.latency = latency
+
+        with pytest.raises(sdk.SDKTimeoutError):
+            first.get_value(interface.StageValueType.HEATER1_TEMP)
+
+        assert first.stalled
+        assert not second.stalled
+
+        with pytest.raises(sdk.SDKStalledError):
+            first.get_value(interface.StageValueType.HEATER1_TEMP)
+
+        assert second.get_value(interface.StageValueType.HEATER1_TEMP) is not None
+
+        release.set()
+        deadline = time.monotonic() + 5
+
+        while first.stalled and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert not wrapper.stalled
+        assert first.get_value(interface.StageValueType.HEATER1_TEMP) is not None
+
+        first.close()
+        second.close()
+    finally:
+        wrapper.close()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import io
+
+import pytest
+
+from pylinkam import interface, protocol, telemetry
+
+
+def test_frame_round_trip():
+    stream = io.BytesIO(protocol.pack_json_frame(protocol.FrameType.HELLO, {'status': True}) +
+                        protocol.pack_frame(protocol.FrameType.DATA, b'\x01\x02'))
+
+    frame_type, payload = protocol.recv_frame(stream)
+
+    assert frame_type == protocol.FrameType.HELLO
+    assert protocol.unpack_json(payload) == {'status': True}
+    assert protocol.recv_frame(stream) == (protocol.FrameType.DATA, b'\x01\x02')
+
+    with pytest.raises(EOFError):
+        protocol.recv_frame(stream)
+
+
+def test_stream_over_localhost(connection, simulator):
+    simulator.values[interface.StageValueType.HEATER1_TEMP] = 42.0
+
+    async def run():
+        async with telemetry.TelemetryServer(connection) as server:
+            await server.start_tcp()
+            port = server.sockets[0].getsockname()[1]
+
+            client = await telemetry.TelemetryClient.connect([interface.StageValueType.HEATER1_TEMP], status=True,
+                                                             port=port)
+
+            try:
+                return client.value_types, [await asyncio.wait_for(client.read(), 5) for _ in range(3)]
+            finally:
+                await client.close()
+
+    value_types, samples = asyncio.run(run())
+
+    assert value_types == [interface.StageValueType.HEATER1_TEMP]
+    assert all(sample.values[interface.StageValueType.HEATER1_TEMP] == pytest.approx(42.0) for sample in samples)
+    assert all(sample.status is not None for sample in samples)
+    assert all(b.timestamp > a.timestamp for a, b in zip(samples, samples[1:]))
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import contextlib
+
+import pytest
+
+from pylinkam import interface, poll, timing
+
+
+class _Clock:
+    def __init__(self, monotonic, wall):
+        self.monotonic = monotonic
+        self.wall = wall
+
+    def advance(self, seconds, drift=0.0):
+        self.monotonic += seconds
+        self.wall += seconds * (1 + drift)
+
+    def get_wall_clock(self, resync_interval=10.0):
+        return timing.WallClock(resync_interval, attempts=1, monotonic=lambda: self.monotonic, wall=lambda: self.wall)
+
+
+def test_timing():
+    read_timing = timing.Timing(10.0, 10.5)
+
+    assert read_timing.midpoint == pytest.approx(10.25)
+    assert read_timing.uncertainty == pytest.approx(0.25)
+
+
+def test_drift_corrected():
+    clock = _Clock(100.0, 1000.0)
+    wall_clock = clock.get_wall_clock()
+
+    assert wall_clock.to_wall(100.0) == pytest.approx(1000.0)
+    assert wall_clock.drift == 0.0
+
+    # Wall clock runs 100 ppm fast, not noticed until the next synchronisation
+    clock.advance(5.0, 1e-4)
+
+    assert wall_clock.to_wall(clock.monotonic) == pytest.approx(1005.0)
+
+    clock.advance(10.0, 1e-4)
+
+    assert wall_clock.to_wall(clock.monotonic) == pytest.approx(clock.wall)
+    assert wall_clock.drift == pytest.approx(1e-4)
+
+    # Between synchronisations the estimated drift is applied
+    clock.advance(10.0, 1e-4)
+
+    assert wall_clock.to_wall(clock.monotonic) == pytest.approx(clock.wall, abs=1e-9)
+
+
+def test_step_resets_drift():
+    clock = _Clock(100.0, 1000.0)
+    wall_clock = clock.get_wall_clock()
+
+    wall_clock.to_wall(100.0)
+
+    clock.advance(20.0, 1e-4)
+    wall_clock.sync()
+
+    # Wall clock set forwards, the jump is not drift
+    clock.wall += 5.0
+    clock.advance(20.0, 1e-4)
+
+    assert wall_clock.to_wall(clock.monotonic) == pytest.approx(clock.wall)
+    assert wall_clock.drift == 0.0
+
+
+def test_tightest_measurement_used():
+    # First attempt is interrupted between the two monotonic readings, the last reading is taken by to_wall
+    monotonic = iter((0.0, 1.0, 5.0, 5.001, 6.0))
+    wall = iter((100.0, 105.0005))
+
+    wall_clock = timing.WallClock(attempts=2, monotonic=lambda: next(monotonic), wall=lambda: next(wall))
+    wall_clock.sync()
+
+    assert wall_clock.to_wall(10.0) == pytest.approx(110.0)
+
+
+def test_reading_from_timing():
+    clock = _Clock(100.0, 1000.0)
+
+    reading = timing.Reading.from_timing(42.0, timing.Timing(100.0, 100.2), clock.get_wall_clock())
+
+    assert reading == (42.0, pytest.approx(1000.1), pytest.approx(100.1), pytest.approx(0.1))
+
+
+class _Connection:
+    # Returns readings with fixed timings in place of a controller
+    def __init__(self, readings, status_timing):
+        self._readings = readings
+        self._status_timing = status_timing
+
+    def priority(self, priority):
+        return contextlib.nullcontext()
+
+    def get_values_timed(self, value_types, prune=False):
+        return {value_type: self._readings[value_type] for value_type in value_types}
+
+    def get_status(self):
+        return interface.ControllerStatus()
+
+    def get_last_timing(self):
+        return self._status_timing
+
+
+def test_sample_uncertainty(monkeypatch):
+    clock = _Clock(10.0, 1000.0)
+    wall_clock = clock.get_wall_clock()
+
+    monkeypatch.setattr(timing, 'get_wall_clock', lambda: wall_clock)
+
+    readings = {
+        interface.StageValueType.HEATER1_TEMP: timing.Reading(25.0, 0.0, 10.1, 0.1),
+        interface.StageValueType.HEATER_SETPOINT: timing.Reading(30.0, 0.0, 10.35, 0.05)
+    }
+    connection = _Connection(readings, timing.Timing(10.5, 10.6))
+
+    # Sample covers the window from the start of the first read to the end of the status read
+    sample = poll.Poller(connection, readings, include_status=True).poll()
+
+    assert sample.uncertainty == pytest.approx(0.3)
+    assert sample.timestamp == pytest.approx(1000.3)
+    assert sample.values == {value_type: reading.value for value_type, reading in readings.items()}
+
+    sample = poll.Poller(connection, readings).poll()
+
+    assert sample.uncertainty == pytest.approx(0.2)
+    assert sample.timestamp == pytest.approx(1000.2)
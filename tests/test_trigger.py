@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from pylinkam import interface, trigger
+
+
+def test_period_or_segments_required(connection):
+    with pytest.raises(ValueError):
+        trigger.TriggerScheduler(connection)
+
+    with pytest.raises(ValueError):
+        trigger.TriggerScheduler(connection, period=1.0, segments=True)
+
+
+def test_periodic_pulses(connection, simulator):
+    event = threading.Event()
+
+    def callback(reading):
+        if reading.value >= 2:
+            event.set()
+
+    with trigger.TriggerScheduler(connection, signals=(interface.TriggerSignal.BLUE, interface.TriggerSignal.GREEN),
+                                  period=0.02, callback=callback) as scheduler:
+        assert event.wait(5)
+
+    pulses = scheduler.pulses
+    sent = [event for event in simulator.trigger_events if event.message == interface.Message.SET_TRIGGER_SIGNAL_PULSE]
+
+    assert [pulse.value for pulse in pulses] == list(range(len(pulses)))
+    assert all(b.monotonic > a.monotonic for a, b in zip(pulses, pulses[1:]))
+    assert len(sent) == 2 * len(pulses)
+
+
+def test_segment_pulses_without_data_rate(connection, simulator):
+    # Data rate of zero and no poll period falls back to the default check interval
+    simulator.data_rate = 0
+    event = threading.Event()
+
+    with trigger.TriggerScheduler(connection, segments=True, callback=lambda reading: event.set()):
+        # Allow the initial segment to be read before the program starts
+        time.sleep(3 * trigger.DEFAULT_POLL_PERIOD)
+
+        connection.set_value(interface.StageValueType.HEATER_SETPOINT, 30.0)
+        connection.enable_heater(True)
+
+        assert event.wait(5)
+
+
+def test_periodic_pulses_continue_after_error(connection, monkeypatch):
+    send_trigger_pulse = connection.send_trigger_pulse
+    calls = []
+
+    def failing_send(signal):
+        calls.append(signal)
+
+        if len(calls) == 1:
+            raise RuntimeError('Unexpected failure')
+
+        send_trigger_pulse(signal)
+
+    monkeypatch.setattr(connection, 'send_trigger_pulse', failing_send)
+
+    event = threading.Event()
+
+    with trigger.TriggerScheduler(connection, period=0.02, callback=lambda reading: event.set()) as scheduler:
+        assert event.wait(5)
+
+    assert len(scheduler.pulses) >= 1
+    assert len(calls) > len(scheduler.pulses)
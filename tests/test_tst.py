@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from pylinkam import interface, tst
+
+numpy = pytest.importorskip('numpy')
+
+
+def _curve():
+    # Linear elastic region with a modulus of 1000 up to 0.01 strain, then perfectly plastic
+    strain = numpy.linspace(0.0, 0.05, 501)
+    stress = numpy.minimum(1000.0 * strain, 10.0)
+
+    return strain, stress
+
+
+def test_find_peak():
+    assert tst.find_peak([]) is None
+    assert tst.find_peak([1.0, 3.0, 2.0]) == 1
+
+
+def test_find_yield():
+    strain, stress = _curve()
+
+    index, modulus, intercept = tst.find_yield(strain, stress)
+
+    assert modulus == pytest.approx(1000.0)
+    assert intercept == pytest.approx(0.0, abs=1e-9)
+    assert strain[index] == pytest.approx(0.012, abs=2e-4)
+
+
+def test_no_yield_while_elastic():
+    strain = numpy.linspace(0.0, 0.005, 51)
+
+    assert tst.find_yield(strain, 1000.0 * strain) is None
+
+
+def _wait_for(capture, count):
+    deadline = time.monotonic() + 5
+
+    while len(capture) + len(capture._pending) < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_capture_tracks_peak(connection, simulator):
+    def set_point(stress):
+        simulator.values.update({
+            interface.StageValueType.TST_FORCE: stress / 10,
+            interface.StageValueType.TST_MOTOR_POS: stress,
+            interface.StageValueType.TST_STRAIN: stress / 1000,
+            interface.StageValueType.TST_STRESS: stress
+        })
+
+    set_point(10.0)
+
+    with tst.TensileCapture(connection, batch_size=4) as capture:
+        for stress in (10.0, 100.0, 50.0):
+            set_point(stress)
+            _wait_for(capture, len(capture) + len(capture._pending) + 3)
+
+    data = capture.get_data()
+    peak = capture.get_peak()
+
+    assert set(data) == set(tst.TensileCapture.FIELDS)
+    assert peak.stress == pytest.approx(100.0)
+    assert peak.strain == pytest.approx(0.1)
+    assert data['stress'][peak.index] == peak.stress
+
+    capture.clear()
+
+    assert capture.get_peak() is None
+    assert len(capture) == 0
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pylinkam import interface, waveform
+
+numpy = pytest.importorskip('numpy')
+
+
+def test_invalid_waveform_rejected(connection):
+    with pytest.raises(ValueError):
+        waveform.WaveformFeeder(connection, interface.StageValueType.HEATER_SETPOINT, [[0.0, 30.0], [0.0, 31.0]])
+
+    with pytest.raises(ValueError):
+        waveform.WaveformFeeder(connection, interface.StageValueType.RAMP_HOLD_TIME, [[0.0, 30.0]])
+
+
+def test_stream_ramp(connection, simulator):
+    feeder = waveform.WaveformFeeder(connection, interface.StageValueType.HEATER_SETPOINT,
+                                     [[0.0, 30.0], [0.1, 40.0]])
+    feeder.start()
+    feeder.join(5)
+
+    data = feeder.get_data()
+    statistics = feeder.get_statistics()
+
+    assert not feeder.running
+    assert data['setpoint'][-1] == pytest.approx(40.0)
+    assert numpy.all(numpy.diff(data['setpoint']) > 0)
+    assert data['error'] == pytest.approx(data['measured'] - data['setpoint'])
+    assert statistics.count == len(feeder)
+    assert simulator.values[interface.StageValueType.HEATER_SETPOINT] == pytest.approx(40.0)
+
+
+def test_deadband_records_setpoint_in_effect(connection, simulator):
+    feeder = waveform.WaveformFeeder(connection, interface.StageValueType.HEATER_SETPOINT,
+                                     [[0.0, 30.0], [0.1, 30.2]], deadband=0.5)
+    feeder.start()
+    feeder.join(5)
+
+    assert simulator.messages[interface.Message.SET_VALUE] == 1
+    assert feeder.get_data()['setpoint'] == pytest.approx(numpy.full(len(feeder), 30.0))
+
+
+def test_streaming_survives_unexpected_errors(connection, monkeypatch):
+    calls = []
+    get_value_timed = connection.get_value_timed
+
+    def failing(value_type):
+        calls.append(None)
+
+        if len(calls) == 1:
+            raise RuntimeError('Unexpected error')
+
+        return get_value_timed(value_type)
+
+    monkeypatch.setattr(connection, 'get_value_timed', failing)
+
+    feeder = waveform.WaveformFeeder(connection, interface.StageValueType.HEATER_SETPOINT,
+                                     [[0.0, 30.0], [0.1, 40.0]])
+    feeder.start()
+    feeder.join(5)
+
+    assert not feeder.running
+    assert len(calls) > 1
+    assert feeder.get_data()['setpoint'][-1] == pytest.approx(40.0)
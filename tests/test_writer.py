@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pylinkam import interface, writer
+
+
+def _magnitude(value):
+    return getattr(value, 'magnitude', value)
+
+
+def test_burst_coalesced(connection, simulator):
+    with writer.CoalescingWriter(connection, max_rate=1.0) as w:
+        for n in range(10):
+            w.set_value(interface.StageValueType.HEATER_SETPOINT, float(n))
+
+        assert w.flush(5)
+
+        statistics = w.statistics
+
+    assert statistics.requested == 10
+    assert statistics.failed == 0
+    assert statistics.written + statistics.coalesced == 10
+    assert statistics.written <= 2
+    assert _magnitude(simulator.values[interface.StageValueType.HEATER_SETPOINT]) == pytest.approx(9.0)
+
+
+def test_invalid_value_rejected_before_queue(connection):
+    with writer.CoalescingWriter(connection) as w:
+        with pytest.raises(TypeError):
+            w.set_value(interface.StageValueType.HEATER_SETPOINT, 'hot')
+
+        with pytest.raises(ValueError):
+            w.set_value(interface.StageValueType.STAGE_HUMIDITY_UNIT_DATA, 1)
+
+        assert w.statistics.requested == 0
+
+
+def test_flush_after_unexpected_error(connection, monkeypatch):
+    def failing(value_type, n):
+        raise RuntimeError('Unexpected error')
+
+    monkeypatch.setattr(connection, 'set_value', failing)
+
+    with writer.CoalescingWriter(connection) as w:
+        w.set_value(interface.StageValueType.HEATER_SETPOINT, 30.0)
+
+        assert w.flush(5)
+        assert w.statistics.failed == 1
+
+        monkeypatch.undo()
+
+        w.set_value(interface.StageValueType.HEATER_SETPOINT, 31.0)
+
+        assert w.flush(5)
+        assert w.statistics.written == 1